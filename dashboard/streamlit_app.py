@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 import requests
@@ -24,8 +24,17 @@ if "presentation_mode" not in st.session_state:
 if "page" not in st.session_state:
     st.session_state.page = 1
 
+if "cursor" not in st.session_state:
+    st.session_state.cursor = ""  # "" = primeira página
+
 if "last_filters" not in st.session_state:
-    st.session_state.last_filters = {"q": "", "page_size": 50, "sort_key": "Votos (desc)", "api_base": DEFAULT_API_BASE}
+    st.session_state.last_filters = {
+        "q": "",
+        "page_size": 50,
+        "sort_key": "Votos (desc)",
+        "partido": "",
+        "api_base": DEFAULT_API_BASE,
+    }
 
 
 # -----------------------------
@@ -91,43 +100,49 @@ def fetch_health(base_url: str) -> Dict[str, Any]:
 
 
 @st.cache_data(ttl=15)
-def fetch_candidates(base_url: str, q: str, limit: int, offset: int) -> Dict[str, Any]:
+def fetch_candidates(
+    base_url: str, q: str, limit: int, cursor: str = "", sort: str = "votos", partido: str = ""
+) -> Dict[str, Any]:
     base_url = _normalize_base_url(base_url)
-    return _get_json(
-        f"{base_url}/candidates",
-        params={"q": q or "", "limit": int(limit), "offset": int(offset)},
-        timeout=25.0,
-    )
+    params: Dict[str, Any] = {"q": q or "", "limit": int(limit), "sort": sort}
+    if partido:
+        params["partido"] = partido
+    if cursor:
+        params["cursor"] = cursor
+    return _get_json(f"{base_url}/candidates", params=params, timeout=25.0)
 
 
 @st.cache_data(ttl=60)
-def fetch_candidate_finance(base_url: str, candidate_id: int, top: int) -> Dict[str, Any]:
+def fetch_candidates_batch(base_url: str, ids: Tuple[int, ...], top: int) -> Dict[str, Any]:
+    """Finanças, votos por município e bens de vários candidatos em uma chamada."""
     base_url = _normalize_base_url(base_url)
     return _get_json(
-        f"{base_url}/candidates/{int(candidate_id)}/finance",
-        params={"top": int(top)},
+        f"{base_url}/candidates/batch",
+        params={
+            "ids": ",".join(str(int(i)) for i in ids),
+            "sections": "finance,votes_municipio,assets",
+            "top": int(top),
+            "limit": 20,
+            "assets_limit": 200,
+        },
         timeout=25.0,
     )
 
 
-@st.cache_data(ttl=120)
-def fetch_candidate_votes_mun(base_url: str, candidate_id: int, limit: int) -> Dict[str, Any]:
-    base_url = _normalize_base_url(base_url)
-    return _get_json(
-        f"{base_url}/candidates/{int(candidate_id)}/votes_municipio",
-        params={"limit": int(limit)},
-        timeout=25.0,
-    )
+def candidate_details(batch: Dict[str, Any], candidate_id: int) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Separa a resposta do lote em (finance, votes_mun, assets) no formato dos endpoints individuais."""
+    if "error" in batch:
+        return batch, batch, batch
+    item = next((i for i in batch.get("items", []) if i.get("id") == candidate_id), None) or {}
+    unavailable = batch.get("unavailable", []) or []
 
+    def section(name: str, wrap: bool) -> Dict[str, Any]:
+        value = item.get(name)
+        if name in unavailable or value is None:
+            return {"error": f"Sem dados de {name}"}
+        return {"items": value} if wrap else value
 
-@st.cache_data(ttl=120)
-def fetch_candidate_assets(base_url: str, candidate_id: int, limit: int, offset: int) -> Dict[str, Any]:
-    base_url = _normalize_base_url(base_url)
-    return _get_json(
-        f"{base_url}/candidates/{int(candidate_id)}/assets",
-        params={"limit": int(limit), "offset": int(offset)},
-        timeout=25.0,
-    )
+    return section("finance", wrap=False), section("votes_municipio", wrap=True), section("assets", wrap=True)
 
 
 # -----------------------------
@@ -155,32 +170,21 @@ def br_money(v: float) -> str:
     return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
-def sort_df(df: pd.DataFrame, sort_key: str) -> pd.DataFrame:
-    if df.empty:
-        return df
+# Rótulo -> parâmetro `sort` da API (ordenação feita no servidor, sobre todos os candidatos)
+SORT_OPTIONS = {
+    "Votos (desc)": "votos",
+    "Receitas (desc)": "receitas",
+    "Despesas (desc)": "despesas",
+    "Bens (desc)": "bens",
+    "Nome (asc)": "nome",
+}
 
-    mapping = {
-        "Votos (desc)": ("total_votos", False),
-        "Receitas (desc)": ("total_receitas", False),
-        "Despesas (desc)": ("total_despesas", False),
-        "Nome (asc)": ("nome_urna", True),
-    }
-    col, asc = mapping.get(sort_key, ("total_votos", False))
 
-    out = df.copy()
-    if col in out.columns and col != "nome_urna":
-        out[col] = pd.to_numeric(out[col], errors="coerce").fillna(0)
-    if "nome_urna" in out.columns and col != "nome_urna":
-        return out.sort_values(by=[col, "nome_urna"], ascending=[asc, True])
-    if col in out.columns:
-        return out.sort_values(by=[col], ascending=[asc])
-    return out
-
-
-def reset_page_if_filters_changed(api_base: str, q: str, page_size: int, sort_key: str) -> None:
-    current = {"api_base": api_base, "q": q, "page_size": page_size, "sort_key": sort_key}
+def reset_page_if_filters_changed(api_base: str, q: str, page_size: int, sort_key: str, partido: str) -> None:
+    current = {"api_base": api_base, "q": q, "page_size": page_size, "sort_key": sort_key, "partido": partido}
     if current != st.session_state.last_filters:
         st.session_state.page = 1
+        st.session_state.cursor = ""
         st.session_state.last_filters = current
 
 
@@ -199,9 +203,10 @@ if not st.session_state.presentation_mode:
         page_size = st.selectbox("Page size", options=[10, 25, 50, 100], index=2)
         sort_key = st.selectbox(
             "Ordenar por",
-            options=["Votos (desc)", "Receitas (desc)", "Despesas (desc)", "Nome (asc)"],
+            options=list(SORT_OPTIONS),
             index=0,
         )
+        partidos = st.text_input("Partidos (ex.: PT,PL)", value=st.session_state.last_filters.get("partido", ""))
         top_n = st.slider("Top (doadores/fornecedores)", min_value=5, max_value=30, value=10, step=5)
         show_debug = st.toggle("Mostrar diagnóstico", value=False)
 
@@ -217,11 +222,13 @@ else:
     q = st.session_state.last_filters.get("q", "silva")
     page_size = st.session_state.last_filters.get("page_size", 50)
     sort_key = st.session_state.last_filters.get("sort_key", "Votos (desc)")
+    partidos = st.session_state.last_filters.get("partido", "")
     top_n = 10
     show_debug = False
 
 api_base = _normalize_base_url(api_base)
-reset_page_if_filters_changed(api_base, q, int(page_size), sort_key)
+partidos = partidos.strip()
+reset_page_if_filters_changed(api_base, q, int(page_size), sort_key, partidos)
 
 
 # -----------------------------
@@ -274,9 +281,15 @@ st.divider()
 # Fetch list
 # -----------------------------
 page = int(st.session_state.page)
-offset = (page - 1) * int(page_size)
 
-resp = fetch_candidates(api_base, q=q, limit=int(page_size), offset=int(offset))
+resp = fetch_candidates(
+    api_base,
+    q=q,
+    limit=int(page_size),
+    cursor=st.session_state.cursor,
+    sort=SORT_OPTIONS.get(sort_key, "votos"),
+    partido=partidos,
+)
 if "error" in resp:
     st.error("Erro ao buscar candidatos")
     if show_debug:
@@ -295,25 +308,28 @@ for col in ["total_bens", "qtd_bens", "doadores_unicos", "fornecedores_unicos",
     if col not in df.columns:
         df[col] = 0
 
-df = sort_df(df, sort_key)
-
 
 # -----------------------------
 # Pagination (buttons)
 # -----------------------------
 nav1, nav2, nav3, nav4 = st.columns([1.2, 1.2, 2.5, 5.1])
 
-has_prev = page > 1
-has_next = len(items) == int(page_size)  # heurística
+# Paginação por cursor: a API informa se há próxima página (has_more)
+prev_cursor = resp.get("prev_cursor")
+next_cursor = resp.get("next_cursor")
+has_prev = page > 1 and bool(prev_cursor)
+has_next = bool(resp.get("has_more")) and bool(next_cursor)
 
 with nav1:
     if st.button("⬅️ Anterior", disabled=not has_prev, use_container_width=True):
         st.session_state.page = max(1, page - 1)
+        st.session_state.cursor = prev_cursor if st.session_state.page > 1 else ""
         st.rerun()
 
 with nav2:
     if st.button("Próxima ➡️", disabled=not has_next, use_container_width=True):
         st.session_state.page = page + 1
+        st.session_state.cursor = next_cursor
         st.rerun()
 
 with nav3:
@@ -387,9 +403,9 @@ with st.expander("Detalhes do candidato", expanded=False):
     selected_row = df[df["id"] == selected_id].head(1)
     row = selected_row.iloc[0].to_dict() if not selected_row.empty else {}
 
-    finance = fetch_candidate_finance(api_base, selected_id, top=int(top_n))
-    votes_mun = fetch_candidate_votes_mun(api_base, selected_id, limit=20)
-    assets = fetch_candidate_assets(api_base, selected_id, limit=200, offset=0)
+    # Um único request para todas as seções do candidato selecionado
+    batch = fetch_candidates_batch(api_base, (int(selected_id),), top=int(top_n))
+    finance, votes_mun, assets = candidate_details(batch, int(selected_id))
 
     tab1, tab2, tab3 = st.tabs(["Visão geral", "Finanças", "Votos/Bens"])
 
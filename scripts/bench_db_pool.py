@@ -0,0 +1,137 @@
+"""
+Benchmark: conexão por requisição (open_db) vs pool de cursores (get_pool).
+
+Simula carga concorrente com as mesmas queries dos handlers da API e
+imprime p50/p99 de latência para cada modo.
+
+Uso (da raiz do projeto):
+    python scripts/bench_db_pool.py                 # usa db/eleicoes.duckdb
+    python scripts/bench_db_pool.py --synthetic     # gera banco sintético temporário
+    python scripts/bench_db_pool.py --threads 16 --requests 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.app.config import CANDIDATE_TABLE, VOTES_AGG_TABLE, VOTES_MUN_TABLE  # noqa: E402
+from src.app.db import ConnectionPool  # noqa: E402
+
+
+def build_synthetic_db(path: Path, n_candidates: int = 5000) -> None:
+    con = duckdb.connect(str(path))
+    con.execute(f"""
+        CREATE TABLE {CANDIDATE_TABLE} AS
+        SELECT range AS id, range % 99999 AS numero,
+               'CANDIDATO ' || range AS nome_urna, 'NOME COMPLETO ' || range AS nome_completo,
+               'P' || (range % 30) AS partido, 'SP' AS uf, 'DEPUTADO FEDERAL' AS cargo, 'APTO' AS situacao
+        FROM range({n_candidates})
+    """)
+    con.execute(f"""
+        CREATE TABLE {VOTES_AGG_TABLE} AS
+        SELECT id AS candidate_id, (hash(id) % 100000)::BIGINT AS total_votos FROM {CANDIDATE_TABLE}
+    """)
+    con.execute(f"""
+        CREATE TABLE {VOTES_MUN_TABLE} AS
+        SELECT c.id AS candidate_id, 'MUNICIPIO ' || m.range AS municipio,
+               (hash(c.id, m.range) % 1000)::BIGINT AS votos_municipio
+        FROM {CANDIDATE_TABLE} c, range(40) m
+    """)
+    con.close()
+
+
+def run_request(con: duckdb.DuckDBPyConnection, candidate_id: int) -> None:
+    con.execute(
+        f"""
+        SELECT c.id, c.nome_urna, COALESCE(v.total_votos, 0) AS total_votos
+        FROM {CANDIDATE_TABLE} c
+        LEFT JOIN {VOTES_AGG_TABLE} v ON v.candidate_id = c.id
+        ORDER BY total_votos DESC, c.nome_urna
+        LIMIT 50
+        """
+    ).fetchall()
+    con.execute(
+        f"SELECT municipio, votos_municipio FROM {VOTES_MUN_TABLE} WHERE candidate_id = ? "
+        "ORDER BY votos_municipio DESC LIMIT 20",
+        [candidate_id],
+    ).fetchall()
+
+
+def bench(label: str, one_request, threads: int, requests: int) -> list[float]:
+    def worker(seed: int) -> list[float]:
+        timings = []
+        for i in range(requests):
+            t0 = time.perf_counter()
+            one_request((seed * 7919 + i) % 5000)
+            timings.append((time.perf_counter() - t0) * 1000)
+        return timings
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        results = list(ex.map(worker, range(threads)))
+    wall = time.perf_counter() - t0
+
+    timings = sorted(t for r in results for t in r)
+    p50 = statistics.median(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{label:<10} req={len(timings):>6}  p50={p50:8.2f} ms  p99={p99:8.2f} ms  rps={len(timings) / wall:8.1f}")
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=None, help="Arquivo DuckDB (padrão: config.DB_PATH)")
+    parser.add_argument("--synthetic", action="store_true", help="Gera banco sintético temporário")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Requisições por thread")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.synthetic:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = Path(tmp.name) / "bench.duckdb"
+        build_synthetic_db(db_path)
+    else:
+        from src.app.config import DB_PATH
+        from src.app.db import resolve_db_path
+
+        db_path = resolve_db_path(args.db or DB_PATH)
+        if not db_path.exists():
+            raise SystemExit(f"DB não encontrado: {db_path}. Use --synthetic ou rode os ETLs.")
+
+    print(f"[BENCH] db={db_path} threads={args.threads} requests/thread={args.requests}")
+
+    def open_per_request(candidate_id: int) -> None:
+        con = duckdb.connect(str(db_path), read_only=True)
+        try:
+            run_request(con, candidate_id)
+        finally:
+            con.close()
+
+    pool = ConnectionPool(db_path=db_path, size=args.threads)
+    pool.open()
+
+    def pooled(candidate_id: int) -> None:
+        with pool.cursor() as con:
+            run_request(con, candidate_id)
+
+    bench("open_db", open_per_request, args.threads, args.requests)
+    bench("pool", pooled, args.threads, args.requests)
+
+    pool.close()
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: extrair o ZIP do TSE e ler o CSV (fluxo antigo) vs ler em
+streaming direto do ZIP (`etl.tse_zip.zip_csv`), do CSV nacional e do CSV
+da UF (`pick_members`), e do cache Parquet (`etl.tse_parquet.stage_zip`):
+a conversão na primeira vez e a leitura nas seguintes.
+
+Os modos criam a mesma tabela (linhas da UF) num DuckDB em memória e
+imprimem tempo total e bytes gravados em disco (de /proc/self/io quando
+disponível; senão, o tamanho dos arquivos extraídos).
+
+Uso (da raiz do projeto):
+    python scripts/bench_zip_stream.py                                   # data/tse/votacao_candidato_munzona_2022.zip
+    python scripts/bench_zip_stream.py --zip data/tse/consulta_cand_2022.zip
+    python scripts/bench_zip_stream.py --synthetic --rows 2000000 --uf RJ
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.app.etl.tse_parquet import stage_zip  # noqa: E402
+from src.app.etl.tse_schema import VOTACAO_CANDIDATO_MUNZONA, FileSchema, schema_for  # noqa: E402
+from src.app.etl.tse_zip import pick_members, read_header, zip_csv  # noqa: E402
+
+HEADER = ["SQ_CANDIDATO", "NM_MUNICIPIO", "NR_ZONA", "SG_UF", "DS_CARGO", "QT_VOTOS_NOMINAIS"]
+UFS = ["SP", "RJ", "MG", "BA", "RS", "PR", "PE", "CE"]
+
+
+def build_synthetic_zip(path: Path, rows: int) -> None:
+    """ZIP em CP1252 parecido com o de votação: `*_BRASIL.csv` e um CSV por UF."""
+    header = (";".join(f'"{h}"' for h in HEADER) + "\r\n").encode("cp1252")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for member, ufs in [("votacao_BRASIL.csv", UFS)] + [(f"votacao_{uf}.csv", [uf]) for uf in UFS]:
+            with z.open(member, "w") as f:
+                f.write(header)
+                chunk = []
+                for i in range(rows):
+                    uf = UFS[i % len(UFS)]
+                    if uf not in ufs:
+                        continue
+                    chunk.append(f'"{i % 5000}";"SÃO JOSÉ {i % 645}";"{i % 400}";"{uf}";"DEPUTADO FEDERAL";"{i % 997}"\r\n')
+                    if len(chunk) == 10000:
+                        f.write("".join(chunk).encode("cp1252"))
+                        chunk = []
+                f.write("".join(chunk).encode("cp1252"))
+
+
+def disk_written() -> int | None:
+    """Bytes gravados em disco pelo processo até agora (Linux), ou None."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_extract(zip_path: Path, member: str, columns: list[str], uf: str, workdir: Path) -> int:
+    """Fluxo antigo: extrai o membro para o disco e lê com read_csv_auto."""
+    out = workdir / "extract"
+    with zipfile.ZipFile(zip_path) as z:
+        z.extract(member, out)
+    csv_path = (out / member).resolve().as_posix().replace("'", "''")
+    con = duckdb.connect()
+    select = ", ".join(columns)
+    for encoding in ("CP1252", "latin-1"):
+        # DuckDB sem a extensão encodings não conhece CP1252; latin-1 é o mais próximo
+        try:
+            con.execute(f"""
+                CREATE TABLE t AS SELECT {select}
+                FROM read_csv_auto('{csv_path}', delim=';', header=true, encoding='{encoding}')
+                WHERE SG_UF = '{uf}'
+            """)
+            break
+        except duckdb.Error:
+            continue
+    n = con.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    con.close()
+    (out / member).unlink()
+    return n
+
+
+def run_stream(zip_path: Path, members: list[str], columns: list[str], uf: str) -> int:
+    """Fluxo novo: stream dos membros do ZIP para o DuckDB."""
+    con = duckdb.connect()
+    with zip_csv(con, "src_csv", zip_path, members, columns):
+        con.execute(f"CREATE TABLE t AS SELECT {', '.join(columns)} FROM src_csv WHERE SG_UF = '{uf}'")
+    n = con.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    con.close()
+    return n
+
+
+def run_parquet(zip_path: Path, schema: FileSchema, columns: list[str], uf: str, cache_dir: Path) -> int:
+    """Cache Parquet: converte o que falta e lê só as colunas/UF usadas."""
+    staged = stage_zip(zip_path, schema, [uf], cache_dir)
+    con = duckdb.connect()
+    con.execute(f"CREATE TABLE t AS SELECT {', '.join(columns)} FROM {staged.sql} WHERE SG_UF = '{uf}'")
+    n = con.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    con.close()
+    return n
+
+
+def bench(label: str, fn, extracted: int) -> None:
+    before = disk_written()
+    t0 = time.perf_counter()
+    rows = fn()
+    wall = time.perf_counter() - t0
+    after = disk_written()
+    written = after - before if before is not None and after is not None else extracted
+    print(f"{label:<8} linhas={rows:>9}  tempo={wall:7.2f} s  disco={written / 1024 / 1024:9.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zip", type=Path, default=Path("data/tse/votacao_candidato_munzona_2022.zip"))
+    parser.add_argument("--synthetic", action="store_true", help="Gera ZIP sintético temporário")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas do ZIP sintético")
+    parser.add_argument("--uf", default="SP", help="UF filtrada")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        zip_path = args.zip
+        if args.synthetic:
+            zip_path = workdir / "bench.zip"
+            build_synthetic_zip(zip_path, args.rows)
+            schema = VOTACAO_CANDIDATO_MUNZONA
+        elif not zip_path.exists():
+            raise SystemExit(f"ZIP não encontrado: {zip_path}. Use --synthetic ou rode os ETLs.")
+        else:
+            schema = schema_for(zip_path)
+
+        uf = args.uf.upper()
+        member, = pick_members(zip_path)
+        uf_members = pick_members(zip_path, [uf])
+        header = read_header(zip_path, member)
+        if "SG_UF" not in header:
+            raise SystemExit(f"{member} não tem a coluna SG_UF.")
+        # Colunas lidas em todos os modos: as do benchmark que também estão no schema
+        columns = [c for c in header if c in HEADER and c in {col.name for col in schema.columns}] or ["SQ_CANDIDATO", "SG_UF"]
+        with zipfile.ZipFile(zip_path) as z:
+            uncompressed = z.getinfo(member).file_size
+        print(f"[BENCH] zip={zip_path} membro={member} ({uncompressed / 1024 / 1024:.1f} MB descomprimido)")
+
+        bench("extract", lambda: run_extract(zip_path, member, columns, uf, workdir), uncompressed)
+        bench("stream", lambda: run_stream(zip_path, [member], columns, uf), 0)
+        if uf_members != [member]:
+            bench("uf", lambda: run_stream(zip_path, uf_members, columns, uf), 0)
+        bench("convert", lambda: run_parquet(zip_path, schema, columns, uf, workdir / "parquet"), 0)
+        bench("parquet", lambda: run_parquet(zip_path, schema, columns, uf, workdir / "parquet"), 0)
+
+
+if __name__ == "__main__":
+    main()
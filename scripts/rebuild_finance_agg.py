@@ -1,24 +1,28 @@
+import sys
 from pathlib import Path
-import duckdb
 
-DB_PATH = Path("db/eleicoes.duckdb")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-CAND_TABLE = "candidates_sp_dep_fed_2022"
-DONATIONS_TABLE = "donations_sp_dep_fed_2022"
-EXPENSES_TABLE = "expenses_sp_dep_fed_2022"
-FINANCE_AGG_TABLE = "finance_agg_sp_dep_fed_2022"
+from src.app.datasets import dataset_db_path, default_dataset  # noqa: E402
+from src.app.db import resolve_db_path  # noqa: E402
+from src.app.etl.prepare import DatasetBuild  # noqa: E402
 
 
 def main():
-    if not DB_PATH.exists():
-        raise SystemExit(f"DB não encontrado: {DB_PATH}")
+    ds = default_dataset()
+    db_path = dataset_db_path(ds)
+    CAND_TABLE, DONATIONS_TABLE = ds.tables.candidate, ds.tables.donations
+    EXPENSES_TABLE, FINANCE_AGG_TABLE = ds.tables.expenses, ds.tables.finance_agg
+    if not resolve_db_path(db_path).exists():
+        raise SystemExit(f"DB não encontrado: {db_path}")
 
-    con = duckdb.connect(str(DB_PATH))
+    build = DatasetBuild(db_path, ds)
+    con = build.connect()
     tables = {t[0] for t in con.execute("SHOW TABLES").fetchall()}
 
     missing = [t for t in (CAND_TABLE, DONATIONS_TABLE, EXPENSES_TABLE) if t not in tables]
     if missing:
-        con.close()
+        build.discard(con)
         raise SystemExit(f"Faltando tabelas base: {missing}. Rode os ETLs antes.")
 
     con.execute(f"DROP TABLE IF EXISTS {FINANCE_AGG_TABLE}")
@@ -54,7 +58,8 @@ def main():
 
     print("[OK] finance_agg criado:",
           con.execute(f"SELECT COUNT(*), SUM(total_receitas), SUM(total_despesas) FROM {FINANCE_AGG_TABLE}").fetchall())
-    con.close()
+
+    build.publish(con)
 
 
 if __name__ == "__main__":
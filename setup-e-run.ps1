@@ -69,23 +69,12 @@ Write-Host "      ✅ Dependências instaladas" -ForegroundColor Green
 # 4. Carregar Dados (se não existir)
 # =============================================================================
 Write-Host "`n[4/6] ✓ Verificando dados..." -ForegroundColor Yellow
-if (-Not (Test-Path "db/eleicoes.duckdb")) {
+if (-Not (Test-Path "db/eleicoes.duckdb") -and -Not (Test-Path "db/eleicoes.current")) {
     Write-Host "      Baixando dados do TSE (pode levar 2-3 minutos)..." -ForegroundColor Cyan
     
-    python -m src.app.etl.load_candidates_2022_sp_dep_fed | Out-Null
-    if ($LASTEXITCODE -ne 0) { Write-Host "      ⚠️  Aviso ao carregar candidatos" -ForegroundColor Yellow }
-    
-    python -m src.app.etl.load_assets_2022_sp_dep_fed | Out-Null
-    if ($LASTEXITCODE -ne 0) { Write-Host "      ⚠️  Aviso ao carregar bens" -ForegroundColor Yellow }
-    
-    python -m src.app.etl.load_votes_2022_sp_dep_fed | Out-Null
-    if ($LASTEXITCODE -ne 0) { Write-Host "      ⚠️  Aviso ao carregar votos" -ForegroundColor Yellow }
-    
-    python -m src.app.etl.load_finance_2022_sp_dep_fed | Out-Null
-    if ($LASTEXITCODE -ne 0) { Write-Host "      ⚠️  Aviso ao carregar finanças" -ForegroundColor Yellow }
-    
-    python scripts/rebuild_finance_agg.py | Out-Null
-    if ($LASTEXITCODE -ne 0) { Write-Host "      ⚠️  Aviso ao agregar finanças" -ForegroundColor Yellow }
+    # Candidatos primeiro; bens, votos e finanças em paralelo
+    python -m src.app.etl.pipeline | Out-Null
+    if ($LASTEXITCODE -ne 0) { Write-Host "      ⚠️  Aviso ao carregar dados (veja python -m src.app.etl.pipeline)" -ForegroundColor Yellow }
     
     Write-Host "      ✅ Dados carregados (eleicoes.duckdb)" -ForegroundColor Green
 } else {
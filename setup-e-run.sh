@@ -38,14 +38,11 @@ echo "      ✅ Dependências instaladas"
 # 4. Carregar Dados (se não existir)
 # =============================================================================
 echo -e "\n[4/6] ✓ Verificando dados..."
-if [ ! -f "db/eleicoes.duckdb" ]; then
+if [ ! -f "db/eleicoes.duckdb" ] && [ ! -f "db/eleicoes.current" ]; then
     echo "      Baixando dados do TSE (pode levar 2-3 minutos)..."
     
-    python -m src.app.etl.load_candidates_2022_sp_dep_fed > /dev/null 2>&1 || echo "      ⚠️  Aviso ao carregar candidatos"
-    python -m src.app.etl.load_assets_2022_sp_dep_fed > /dev/null 2>&1 || echo "      ⚠️  Aviso ao carregar bens"
-    python -m src.app.etl.load_votes_2022_sp_dep_fed > /dev/null 2>&1 || echo "      ⚠️  Aviso ao carregar votos"
-    python -m src.app.etl.load_finance_2022_sp_dep_fed > /dev/null 2>&1 || echo "      ⚠️  Aviso ao carregar finanças"
-    python scripts/rebuild_finance_agg.py > /dev/null 2>&1 || echo "      ⚠️  Aviso ao agregar finanças"
+    # Candidatos primeiro; bens, votos e finanças em paralelo
+    python -m src.app.etl.pipeline > /dev/null 2>&1 || echo "      ⚠️  Aviso ao carregar dados (veja python -m src.app.etl.pipeline)"
     
     echo "      ✅ Dados carregados (eleicoes.duckdb)"
 else
@@ -0,0 +1,139 @@
+"""
+Cache de respostas da API versionado pelo arquivo do banco.
+
+Os dados só mudam quando um ETL reescreve o banco, então uma resposta
+fica válida enquanto `dataset_version()` for a mesma. A chave inclui a
+versão: depois de um ETL as entradas antigas simplesmente deixam de ser
+encontradas e saem pelo LRU.
+
+A mesma versão (mais o formato negociado) vira o ETag das respostas, o que
+permite responder 304 a GETs condicionais sem abrir cursor no banco.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Corpo e metadados de uma resposta 200 já serializada."""
+
+    body: bytes
+    media_type: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """
+    LRU de respostas limitado pelo total de bytes dos corpos.
+
+    Thread-safe; guarda contadores de hits, misses e evictions.
+
+    Exemplo:
+        cache = ResponseCache(max_bytes=64 * 1024 * 1024)
+        cached = cache.get(key)
+        if cached is None:
+            cache.put(key, CachedResponse(body, "application/json"))
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        """Resposta guardada para a chave (e marca como recém-usada), ou None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: CachedResponse) -> None:
+        """Guarda a resposta, removendo as menos usadas até caber em `max_bytes`."""
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Esvazia o cache (contadores são mantidos)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Entradas, bytes e contadores, para /health."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def etag_for(version: str, variant: str = "") -> str:
+    """
+    ETag (forte) de uma versão do banco.
+
+    `variant` distingue representações da mesma URL (ex.: o formato
+    negociado pelo Accept): JSON e Arrow da mesma versão têm ETags diferentes.
+    """
+    return f'"{version}-{variant}"' if variant else f'"{version}"'
+
+
+def vary_on(response: Any, header: str) -> Any:
+    """Acrescenta `header` ao Vary da resposta (sem repetir) e a devolve."""
+    existing = [v.strip().lower() for v in response.headers.get("vary", "").split(",")]
+    if header.lower() not in existing:
+        response.headers.add_vary_header(header)
+    return response
+
+
+def http_date(timestamp: float) -> str:
+    """Data no formato HTTP (Last-Modified)."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def not_modified(
+    if_none_match: str | None, if_modified_since: str | None, etag: str, mtime: float
+) -> bool:
+    """
+    True se o GET condicional pode ser respondido com 304.
+
+    If-None-Match tem precedência sobre If-Modified-Since (RFC 9110).
+    """
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
@@ -0,0 +1,265 @@
+"""
+Executor de queries da API com controle de admissão.
+
+Os handlers são `async` e não bloqueiam o event loop: cada query roda em
+threads dedicadas, separadas por classe de custo (`light`/`heavy`), para que
+as consultas caras não ocupem as threads das baratas.
+
+- Admissão: cada classe aceita no máximo `workers + max_queue` pedidos ao
+  mesmo tempo (rodando + na fila). Acima disso `run` levanta `Overloaded`
+  na hora, sem enfileirar (a API responde 503 com Retry-After).
+- Prazo: se a query não termina em `timeout` segundos, o cursor é
+  interrompido (`con.interrupt()`) e `run` levanta `QueryTimeout` (504).
+  O pedido continua contando na admissão até a thread de fato ser liberada.
+
+Exemplo:
+    def work(con):
+        return con.execute("SELECT 1").fetchone()
+
+    row = await get_executor().run(LIGHT, work)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+import duckdb
+
+from ..config import (
+    EXECUTOR_QUEUE_HEAVY,
+    EXECUTOR_QUEUE_LIGHT,
+    EXECUTOR_WORKERS_HEAVY,
+    EXECUTOR_WORKERS_LIGHT,
+    QUERY_TIMEOUT_HEAVY,
+    QUERY_TIMEOUT_LIGHT,
+)
+from ..datasets import using
+from ..db import get_pool
+
+T = TypeVar("T")
+
+LIGHT = "light"
+HEAVY = "heavy"
+
+
+class Overloaded(RuntimeError):
+    """Fila da classe de custo cheia: o pedido foi recusado sem executar."""
+
+
+class QueryTimeout(RuntimeError):
+    """A query passou do prazo e foi interrompida."""
+
+
+@dataclass(frozen=True)
+class CostClass:
+    """Threads, fila máxima e prazo (segundos) de uma classe de custo."""
+
+    name: str
+    workers: int
+    max_queue: int
+    timeout: float
+
+
+DEFAULT_CLASSES = (
+    CostClass(LIGHT, EXECUTOR_WORKERS_LIGHT, EXECUTOR_QUEUE_LIGHT, QUERY_TIMEOUT_LIGHT),
+    CostClass(HEAVY, EXECUTOR_WORKERS_HEAVY, EXECUTOR_QUEUE_HEAVY, QUERY_TIMEOUT_HEAVY),
+)
+
+
+class _Job:
+    """Uma chamada de `fn(con)` que pode ser interrompida de outra thread."""
+
+    def __init__(self, fn: Callable[[duckdb.DuckDBPyConnection], Any], lane: _Lane, dataset: Any = None) -> None:
+        self.fn = fn
+        self.lane = lane
+        self.dataset = dataset
+        self.cancelled = False
+        self._con: duckdb.DuckDBPyConnection | None = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> Any:
+        with get_pool().cursor(self.dataset) as con, using(self.dataset):
+            with self._lock:
+                if self.cancelled:
+                    raise QueryTimeout("Query cancelada antes de começar")
+                self._con = con
+            self.lane.started()
+            try:
+                return self.fn(con)
+            finally:
+                with self._lock:
+                    self._con = None
+                self.lane.finished()
+
+    def cancel(self) -> None:
+        """Marca como cancelada e interrompe a query em andamento, se houver."""
+        with self._lock:
+            self.cancelled = True
+            if self._con is not None:
+                self._con.interrupt()
+
+
+class _Lane:
+    """Threads e contadores de uma classe de custo."""
+
+    def __init__(self, cost: CostClass) -> None:
+        self.cost = cost
+        self.capacity = max(1, cost.workers) + max(0, cost.max_queue)
+        self.threads = ThreadPoolExecutor(max_workers=max(1, cost.workers), thread_name_prefix=f"query-{cost.name}")
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.running = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def admit(self) -> bool:
+        with self._lock:
+            if self.admitted >= self.capacity:
+                self.rejected += 1
+                return False
+            self.admitted += 1
+            return True
+
+    def release(self, *_: Any) -> None:
+        with self._lock:
+            self.admitted -= 1
+
+    def started(self) -> None:
+        with self._lock:
+            self.running += 1
+
+    def finished(self) -> None:
+        with self._lock:
+            self.running -= 1
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.cost.workers,
+                "max_queue": self.cost.max_queue,
+                "timeout": self.cost.timeout,
+                "running": self.running,
+                "queued": self.admitted - self.running,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+
+class QueryExecutor:
+    """
+    Threads de query por classe de custo, com fila limitada e prazo.
+
+    Cada job empresta um cursor do pool (`get_pool().cursor()`) pela duração
+    de `fn(con)`; por isso DB_POOL_SIZE deve cobrir a soma das threads.
+    """
+
+    def __init__(self, classes: tuple[CostClass, ...] = DEFAULT_CLASSES) -> None:
+        self._lanes = {cost.name: _Lane(cost) for cost in classes}
+
+    def _submit(
+        self, cost: str, fn: Callable[[duckdb.DuckDBPyConnection], T], dataset: Any
+    ) -> tuple[_Lane, _Job, Future]:
+        """Admite e agenda `fn` na classe `cost` (levanta Overloaded se cheia)."""
+        lane = self._lanes[cost]
+        if not lane.admit():
+            raise Overloaded(f"Fila '{cost}' cheia ({lane.capacity} pedidos)")
+
+        job = _Job(fn, lane, dataset)
+        try:
+            future = lane.threads.submit(job)
+        except RuntimeError:
+            lane.release()
+            raise
+        future.add_done_callback(lane.release)
+        return lane, job, future
+
+    async def run(
+        self,
+        cost: str,
+        fn: Callable[[duckdb.DuckDBPyConnection], T],
+        timeout: float | None = None,
+        dataset: Any = None,
+    ) -> T:
+        """
+        Executa `fn(con)` numa thread da classe `cost` e aguarda o resultado.
+
+        Args:
+            cost: Classe de custo (LIGHT ou HEAVY).
+            fn: Função que recebe o cursor e devolve o resultado.
+            timeout: Prazo em segundos (padrão: o da classe).
+            dataset: Conjunto consultado (`datasets.Dataset`); o cursor sai
+                com o arquivo dele anexado.
+
+        Raises:
+            Overloaded: Se a classe já tem `workers + max_queue` pedidos.
+            QueryTimeout: Se o prazo estourou (a query é interrompida).
+        """
+        lane, job, future = self._submit(cost, fn, dataset)
+        deadline = lane.cost.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), deadline)
+        except asyncio.TimeoutError:
+            job.cancel()
+            lane.timed_out()
+            raise QueryTimeout(f"Query '{cost}' passou de {deadline}s e foi interrompida") from None
+
+    def run_sync(
+        self,
+        cost: str,
+        fn: Callable[[duckdb.DuckDBPyConnection], T],
+        timeout: float | None = None,
+        dataset: Any = None,
+    ) -> T:
+        """
+        Como `run`, bloqueando a thread chamadora (para threads de fundo, fora
+        do event loop): mesma admissão, mesmo prazo e mesma interrupção.
+        """
+        lane, job, future = self._submit(cost, fn, dataset)
+        deadline = lane.cost.timeout if timeout is None else timeout
+        try:
+            return future.result(deadline)
+        except FutureTimeout:
+            job.cancel()
+            lane.timed_out()
+            raise QueryTimeout(f"Query '{cost}' passou de {deadline}s e foi interrompida") from None
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Estado de cada classe, para /health."""
+        return {name: lane.stats() for name, lane in self._lanes.items()}
+
+    def shutdown(self) -> None:
+        """Encerra as threads (pedidos na fila são descartados)."""
+        for lane in self._lanes.values():
+            lane.threads.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: QueryExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> QueryExecutor:
+    """Executor do processo atual, criado na primeira chamada."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = QueryExecutor()
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Encerra o executor do processo (usado no shutdown da API)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,181 @@
+"""
+Exportação em streaming de tabelas inteiras (CSV, NDJSON, Parquet).
+
+`stream_export` lê o resultado do DuckDB em record batches e codifica cada
+um assim que chega, então a memória fica em torno de um batch
+(EXPORT_BATCH_ROWS) independentemente do tamanho da tabela.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from ..config import EXPORT_BATCH_ROWS
+from ..datasets import Dataset
+from ..db import get_pool
+from .formats import fetch_arrow_reader
+
+# Nome público (rota) -> campo de `Tables` (a tabela depende do conjunto)
+EXPORT_TABLES = {
+    "candidates": "candidate",
+    "candidate_summary": "candidate_summary",
+    "assets": "assets",
+    "assets_agg": "assets_agg",
+    "votes_munzona": "votes_munzona",
+    "votes_agg": "votes_agg",
+    "votes_municipio": "votes_mun",
+    "donations": "donations",
+    "expenses": "expenses",
+    "finance_agg": "finance_agg",
+    "top_donors": "top_donors",
+    "top_suppliers": "top_suppliers",
+    "party_summary": "party_summary",
+    "municipios": "municipios",
+    "votes_zona": "votes_zona",
+}
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def quote_ident(name: str) -> str:
+    """Identificador SQL entre aspas duplas."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_export_query(
+    table: str,
+    table_columns: list[str],
+    columns: list[str],
+    candidate_ids: list[int],
+    partidos: list[str],
+    candidate_table: str,
+) -> tuple[str, list[Any]]:
+    """
+    SELECT da exportação com projeção e filtros.
+
+    O filtro por candidato usa `candidate_id` (ou `id` nas tabelas de
+    candidatos); o de partido usa a coluna `partido` se a tabela tiver,
+    senão os ids dos candidatos do partido (em `candidate_table`).
+
+    Raises:
+        ValueError: Coluna desconhecida, ou filtro que a tabela não suporta.
+    """
+    unknown = [c for c in columns if c not in table_columns]
+    if unknown:
+        raise ValueError(f"Colunas inexistentes em {table}: {unknown}")
+    select = ", ".join(quote_ident(c) for c in columns) if columns else "*"
+
+    id_column = "candidate_id" if "candidate_id" in table_columns else "id" if "id" in table_columns else None
+    conditions: list[str] = []
+    params: list[Any] = []
+    if candidate_ids:
+        if id_column is None:
+            raise ValueError(f"{table} não tem coluna de candidato para filtrar")
+        conditions.append(f"{id_column} IN (SELECT UNNEST(?::BIGINT[]))")
+        params.append(candidate_ids)
+    if partidos:
+        placeholders = ", ".join("?" for _ in partidos)
+        if "partido" in table_columns:
+            conditions.append(f"upper(partido) IN ({placeholders})")
+        elif id_column is not None:
+            conditions.append(
+                f"{id_column} IN (SELECT id FROM {candidate_table} WHERE upper(partido) IN ({placeholders}))"
+            )
+        else:
+            raise ValueError(f"{table} não tem coluna de candidato para filtrar")
+        params += partidos
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {select} FROM {table} {where}", params
+
+
+class _ChunkSink:
+    """Arquivo só de escrita que acumula bytes até `drain()` (para o ParquetWriter)."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _ndjson_lines(batch: pa.RecordBatch) -> bytes:
+    """Coluna de linhas JSON de um batch unida por '\\n' sem objetos Python por linha."""
+    lines = batch.column(0)
+    if len(lines) == 0:
+        return b""
+    joined = pc.binary_join(pa.ListArray.from_arrays(pa.array([0, len(lines)], pa.int32()), lines), "\n")
+    return joined[0].as_py().encode("utf-8") + b"\n"
+
+
+def stream_export(
+    sql: str, params: list[Any], fmt: str, batch_rows: int = EXPORT_BATCH_ROWS, dataset: Dataset | None = None
+) -> Iterator[bytes]:
+    """
+    Executa a query e gera o arquivo exportado pedaço a pedaço.
+
+    O primeiro item é sempre `b""`: consumi-lo reserva o cursor do pool e
+    executa a query, de modo que pool cheio ou erro de SQL aparecem antes
+    de a resposta começar. O cursor fica reservado enquanto o cliente lê e
+    é devolvido quando o gerador termina (ou é fechado por desconexão).
+    """
+    if fmt == "ndjson":
+        # O DuckDB já entrega cada linha como JSON
+        sql = f"SELECT CAST(to_json(t) AS VARCHAR) AS line FROM ({sql}) t"
+
+    with get_pool().cursor(dataset) as con:
+        reader = fetch_arrow_reader(con.execute(sql, params), batch_rows)
+        yield b""
+
+        if fmt == "ndjson":
+            for batch in reader:
+                yield _ndjson_lines(batch)
+        elif fmt == "csv":
+            header = True
+            for batch in reader:
+                sink = pa.BufferOutputStream()
+                pacsv.write_csv(batch, sink, write_options=pacsv.WriteOptions(include_header=header))
+                header = False
+                yield sink.getvalue().to_pybytes()
+            if header:
+                # Resultado vazio: só o cabeçalho
+                sink = pa.BufferOutputStream()
+                pacsv.write_csv(reader.schema.empty_table(), sink)
+                yield sink.getvalue().to_pybytes()
+        elif fmt == "parquet":
+            sink = _ChunkSink()
+            with pq.ParquetWriter(sink, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+                    yield sink.drain()
+            yield sink.drain()
+        else:
+            raise ValueError(f"Formato de exportação inválido: {fmt}")
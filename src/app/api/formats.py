@@ -0,0 +1,152 @@
+"""
+Formatos de saída da API: JSON, Arrow IPC e Parquet.
+
+Os handlers buscam o resultado do DuckDB como tabela Arrow e escolhem o
+formato por `?format=` ou pelo header Accept. Nenhum dos caminhos cria um
+objeto Python por linha:
+
+- arrow/parquet: a tabela Arrow é escrita direto no corpo da resposta;
+- json: o próprio DuckDB serializa a tabela (`to_json(list(t))`) e o
+  envelope (`has_more`, cursores...) é concatenado em volta.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+
+from .metrics import SERIALIZATION_LATENCY, Timer
+
+JSON = "json"
+ARROW = "arrow"
+PARQUET = "parquet"
+
+MEDIA_TYPES = {
+    JSON: "application/json",
+    ARROW: "application/vnd.apache.arrow.stream",
+    PARQUET: "application/vnd.apache.parquet",
+}
+
+# Media types aceitos no Accept, além dos de MEDIA_TYPES
+_ACCEPT_ALIASES = {
+    "application/vnd.apache.arrow.file": ARROW,
+    "application/x-parquet": PARQUET,
+}
+
+# Curingas do Accept: qualquer formato serve, e o padrão é JSON
+_ACCEPT_WILDCARDS = {"*/*": JSON, "application/*": JSON}
+
+
+def _quality(params: list[str]) -> float:
+    """Valor de `q=` dos parâmetros de um media type do Accept (padrão 1)."""
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate(fmt: str, accept: str | None) -> str:
+    """
+    Escolhe o formato da resposta.
+
+    `fmt` (parâmetro `format`) tem precedência; senão o formato de maior
+    `q` no Accept, com empate resolvido pela ordem do header (`*/*` e
+    `application/*` contam como JSON; `q=0` recusa o tipo). Sem nenhum
+    tipo conhecido, JSON.
+
+    Raises:
+        HTTPException: 400 se `fmt` não é um formato conhecido.
+    """
+    if fmt:
+        fmt = fmt.strip().lower()
+        if fmt not in MEDIA_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Formato inválido: '{fmt}'. Use: {', '.join(MEDIA_TYPES)}",
+            )
+        return fmt
+    by_media = {media: name for name, media in MEDIA_TYPES.items()} | _ACCEPT_ALIASES | _ACCEPT_WILDCARDS
+    best, best_q = JSON, 0.0
+    for part in (accept or "").split(","):
+        media, *params = part.split(";")
+        name = by_media.get(media.strip().lower())
+        q = _quality(params)
+        # Só troca com q estritamente maior: no empate vale o primeiro listado
+        if name is not None and q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def fetch_arrow(result: duckdb.DuckDBPyConnection) -> pa.Table:
+    """Resultado de `con.execute(...)` como tabela Arrow (`to_arrow_table` no DuckDB >= 1.4)."""
+    fetch = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+    return fetch()
+
+
+def fetch_arrow_reader(result: duckdb.DuckDBPyConnection, batch_rows: int) -> pa.RecordBatchReader:
+    """Resultado como leitor incremental de record batches (`to_arrow_reader` no DuckDB >= 1.4)."""
+    fetch = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+    return fetch(batch_rows)
+
+
+def table_json(con: duckdb.DuckDBPyConnection, table: pa.Table) -> str:
+    """
+    Tabela Arrow como array JSON de objetos, serializada pelo DuckDB.
+
+    A tabela é lida pela variável local (replacement scan do DuckDB), sem
+    criar view: as conexões do pool são read-only e o DuckDB 0.9 recusa
+    `from_arrow(...).query(...)` nelas.
+    """
+    _json_rows = table  # noqa: F841 (lida pelo nome na query)
+    with Timer(SERIALIZATION_LATENCY, JSON):
+        return con.execute(
+            "SELECT COALESCE(CAST(to_json(list(_json_rows)) AS VARCHAR), '[]') FROM _json_rows"
+        ).fetchone()[0]
+
+
+def json_response(raw: dict[str, str], fields: dict[str, Any] | None = None, headers: dict[str, str] | None = None) -> Response:
+    """
+    Resposta JSON montada a partir de pedaços já serializados.
+
+    Args:
+        raw: Chave -> JSON pronto (ex.: saída de `table_json`).
+        fields: Demais chaves, serializadas com json.dumps.
+    """
+    parts = [f"{json.dumps(k)}:{v}" for k, v in raw.items()]
+    parts += [f"{json.dumps(k)}:{json.dumps(v, ensure_ascii=False)}" for k, v in (fields or {}).items()]
+    return Response(content="{" + ",".join(parts) + "}", media_type=MEDIA_TYPES[JSON], headers=headers)
+
+
+def meta_headers(meta: dict[str, Any]) -> dict[str, str]:
+    """Metadados de uma resposta tabular como headers `X-...` (None é omitido)."""
+    headers = {}
+    for key, value in meta.items():
+        if value is None:
+            continue
+        name = "X-" + "-".join(part.capitalize() for part in key.split("_"))
+        headers[name] = json.dumps(value) if isinstance(value, bool) else str(value)
+    return headers
+
+
+def table_response(table: pa.Table, fmt: str, headers: dict[str, str] | None = None) -> Response:
+    """Tabela Arrow como stream Arrow IPC ou arquivo Parquet."""
+    if fmt not in (ARROW, PARQUET):
+        raise ValueError(f"Formato binário inválido: {fmt}")
+    sink = pa.BufferOutputStream()
+    with Timer(SERIALIZATION_LATENCY, fmt):
+        if fmt == ARROW:
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            pq.write_table(table, sink)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -3,10 +3,26 @@ FastAPI Backend para Eleições Dashboard.
 
 Endpoints:
   GET /health - Status da API e banco
+  GET /metrics - Métricas no formato Prometheus
+  GET /datasets - Conjuntos (ano, UF, cargo) disponíveis
   GET /candidates - Lista candidatos com busca
+  GET /candidates/batch - Perfil, bens, votos e finanças de vários candidatos
   GET /candidates/{id}/assets - Bens de um candidato
   GET /candidates/{id}/votes_municipio - Votos por município
+  GET /candidates/{id}/votes_zona - Votos por zona eleitoral
   GET /candidates/{id}/finance - Receitas/despesas detalhadas
+  GET /partidos - Totais por partido
+  GET /partidos/{sigla} - Totais, quebras e candidatos de um partido
+  GET /municipios - Municípios com total de votos e mais votado
+  GET /municipios/{cd}/candidatos - Ranking de candidatos no município
+  GET /municipios/{cd}/zonas - Zonas eleitorais do município
+  GET /export/{tabela} - Tabela inteira em CSV/NDJSON/Parquet (streaming)
+
+Conjuntos de dados:
+  Os endpoints de dados aceitam `ano`, `uf` e `cargo` (padrão: ANO, UF e
+  cargo do config) e respondem 404 se o conjunto não existe.
+
+    curl "http://localhost:8000/candidates?uf=MG&cargo=dep_est&ano=2022"
 
 Autenticação:
   Se ELEICOES_API_KEY está definida, /candidates requer token.
@@ -18,35 +34,82 @@ Autenticação:
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import Any
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
 
-from fastapi import FastAPI, Header, HTTPException, status
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-from ..auth import check_api_key
-from ..config import (
-    ASSETS_AGG_TABLE,
-    ASSETS_TABLE,
-    CANDIDATE_TABLE,
-    DB_PATH,
-    DONATIONS_TABLE,
-    EXPENSES_TABLE,
-    FINANCE_AGG_TABLE,
-    VOTES_AGG_TABLE,
-    VOTES_MUN_TABLE,
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.dependencies.models import Dependant
+from fastapi.dependencies.utils import request_params_to_args
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute, Match
+
+from ..auth import check_admin_key, check_api_key
+from ..config import BATCH_MAX_IDS, CANDIDATE_SUMMARY_TABLE, CANDIDATES_MAX_LIMIT, FINANCE_TOP_N, RESPONSE_CACHE_MB
+from ..datasets import Dataset, DatasetNotFound, Tables, get_registry
+from ..db import (
+    PoolExhausted,
+    SchemaCatalog,
+    close_pool,
+    dataset_mtime,
+    get_catalog,
+    get_pool,
 )
-from ..db import ensure_indexes, get_tables, open_db
+from ..search import get_search_index
+from ..etl.derived import PARTY_BREAKDOWNS, RANKED_SORTS
+from . import formats, metrics, profiling, queries
+from .export import EXPORT_MEDIA_TYPES, EXPORT_TABLES, build_export_query, stream_export
+from .formats import fetch_arrow
+from .executor import HEAVY, LIGHT, Overloaded, QueryTimeout, get_executor, shutdown_executor
+from .cache import CachedResponse, ResponseCache, etag_for, http_date, not_modified, vary_on
+from .pagination import SortKey, cursor_context, decode_cursor, encode_cursor, key_columns, keyset_predicate, order_by, row_key
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Abre o pool read-only no startup e fecha no shutdown.
+
+    O startup nunca escreve no banco (índices e tabelas derivadas vêm do ETL
+    ou de `python -m src.app.etl.prepare`), então vários workers e o MCP
+    podem abrir o mesmo arquivo ao mesmo tempo.
+    """
+    logger.info(f"[STARTUP] Conectando ao banco (read-only): {get_pool().active_path}")
+    try:
+        get_pool().open()
+        logger.info(f"[STARTUP] Pool read-only aberto (size={get_pool().size})")
+        if not get_catalog().has(CANDIDATE_SUMMARY_TABLE):
+            logger.warning("[STARTUP] Tabelas derivadas ausentes: rode `python -m src.app.etl.prepare`")
+        index = get_search_index()
+        logger.info(f"[STARTUP] Índice de busca: {len(index) if index else 0} candidatos")
+    except Exception as e:
+        logger.error(f"[STARTUP ERROR] Pool: {e}")
+
+    yield
+
+    # O log de lentas usa o executor para os EXPLAINs pendentes: fecha antes dele
+    profiling.close_slow_log()
+    shutdown_executor()
+    close_pool()
+    logger.info("[SHUTDOWN] Executor e pool de conexões fechados")
+
+
 app = FastAPI(
     title="Eleições Dashboard API",
     version="1.0.0",
     description="API para análise de dados eleitorais brasileiros (TSE)",
+    lifespan=lifespan,
 )
 
 # CORS: permite requisições do Streamlit
@@ -59,21 +122,207 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-def startup_event() -> None:
-    """Executado ao iniciar a API."""
-    logger.info(f"[STARTUP] Conectando ao banco: {DB_PATH}")
+@app.exception_handler(PoolExhausted)
+def pool_exhausted_handler(request: Request, exc: PoolExhausted) -> JSONResponse:
+    """Pool sem cursores livres: pede para o cliente tentar de novo."""
+    logger.warning(f"[DB] {exc} ({request.url.path})")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servidor ocupado, tente novamente"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(Overloaded)
+def overloaded_handler(request: Request, exc: Overloaded) -> JSONResponse:
+    """Fila do executor cheia: recusa na hora em vez de enfileirar sem limite."""
+    logger.warning(f"[EXECUTOR] {exc} ({request.url.path})")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servidor ocupado, tente novamente"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(QueryTimeout)
+def query_timeout_handler(request: Request, exc: QueryTimeout) -> JSONResponse:
+    """Query interrompida por passar do prazo da classe de custo."""
+    logger.warning(f"[EXECUTOR] {exc} ({request.url.path})")
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Consulta excedeu o tempo limite"},
+    )
+
+
+# Respostas GET destes caminhos vão para o cache versionado (ETag = versão do banco)
+CACHED_PATHS = ("/candidates", "/partidos", "/municipios")
+# Caminhos que exigem token (checado antes de responder 304)
+PROTECTED_PATHS = ("/candidates", "/candidates/batch")
+
+_response_cache = ResponseCache(max_bytes=RESPONSE_CACHE_MB * 1024 * 1024)
+
+
+def get_response_cache() -> ResponseCache:
+    """Cache de respostas do worker."""
+    return _response_cache
+
+
+def _match_route(scope: dict[str, Any]) -> tuple[BaseRoute | None, dict[str, Any]]:
+    """Rota do app que atende o scope e seus path params (None se nenhuma casa)."""
+    for route in app.router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return route, child_scope.get("path_params", {})
+    return None, {}
+
+
+def _query_fields(dependant: Dependant) -> list[Any]:
+    """Query params do handler e das dependências dele (ex.: `dataset_param`)."""
+    fields = list(dependant.query_params)
+    for sub in dependant.dependencies:
+        fields.extend(_query_fields(sub))
+    return fields
+
+
+def _params_valid(request: Request) -> bool:
+    """
+    Path e query params passam na validação da rota.
+
+    O cache responde antes do roteador: sem isso `?limit=-3` com um ETag
+    válido receberia 304 (ou um HIT) em vez do 422 do handler.
+    """
+    route, path_params = _match_route(request.scope)
+    if not isinstance(route, APIRoute):
+        return False
+    _, path_errors = request_params_to_args(route.dependant.path_params, path_params)
+    _, query_errors = request_params_to_args(_query_fields(route.dependant), request.query_params)
+    return not path_errors and not query_errors
+
+
+def _dataset_state(ano: str | None, uf: str | None, cargo: str | None) -> tuple[Dataset, str | None, float]:
+    """Conjunto pedido, versão e mtime dos arquivos dele (lê ponteiros e pode consultar o catálogo)."""
+    registry = get_registry()
+    ds = registry.resolve(ano, uf, cargo)
+    mtime = max(dataset_mtime(path) or 0.0 for path in (get_pool().active_path, ds.file) if path is not None)
+    return ds, registry.version(ds), mtime
+
+
+@app.middleware("http")
+async def versioned_response_cache(request: Request, call_next: Any) -> Response:
+    """
+    Cache de respostas e GETs condicionais amarrados à versão do banco.
+
+    Só responde sozinho depois que path e query params passam na validação
+    da rota; requests inválidos vão direto para o handler (404/422).
+
+    - If-None-Match/If-Modified-Since batendo com a versão atual: 304 sem
+      consultar o banco.
+    - Mesma rota + query + formato negociado + Authorization na mesma
+      versão: corpo servido do LRU (X-Cache: HIT).
+    - Senão chama o handler e guarda a resposta se for 200.
+
+    O formato depende do Accept: as respostas levam `Vary: Accept` e o
+    formato entra no ETag, para um cache intermediário ou um GET condicional
+    não trocar JSON por Arrow/Parquet.
+
+    A versão é a do conjunto pedido (`ano`/`uf`/`cargo`): publicar o
+    arquivo de um conjunto só invalida as respostas dele.
+    """
+    path = request.url.path
+    if request.method != "GET" or not path.startswith(CACHED_PATHS) or "profile" in request.query_params:
+        return await call_next(request)
+
+    if not _params_valid(request):
+        return vary_on(await call_next(request), "Accept")  # handler devolve o 404/422
+
+    registry = get_registry()
+    params = request.query_params
     try:
-        con = open_db(read_only=False)
-        ensure_indexes(con)
-        con.close()
-        logger.info("[STARTUP] Índices verificados/criados")
+        fmt = formats.negotiate(params.get("format", ""), request.headers.get("accept"))
+        # Catálogo, ponteiros e stat dos arquivos: fora do event loop
+        ds, version, mtime = await asyncio.to_thread(
+            _dataset_state, params.get("ano"), params.get("uf"), params.get("cargo")
+        )
+    except (DatasetNotFound, ValueError, HTTPException):
+        return vary_on(await call_next(request), "Accept")  # handler devolve o 400/404/422
+    except PoolExhausted as e:
+        return vary_on(pool_exhausted_handler(request, e), "Accept")
     except Exception as e:
-        logger.error(f"[STARTUP ERROR] {e}")
+        # Catálogo ilegível, banco trocado no meio da leitura...: mesmo 503 dos handlers de sobrecarga
+        logger.error(f"[CACHE] Versão do conjunto: {e}", exc_info=True)
+        return vary_on(
+            JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Banco de dados indisponível, tente novamente"},
+                headers={"Retry-After": "1"},
+            ),
+            "Accept",
+        )
+    if version is None:
+        return vary_on(await call_next(request), "Accept")
+    validators = {"ETag": etag_for(version, fmt), "Last-Modified": http_date(mtime)}
+
+    if not_modified(
+        request.headers.get("if-none-match"), request.headers.get("if-modified-since"), validators["ETag"], mtime
+    ):
+        try:
+            if path in PROTECTED_PATHS:
+                check_api_key(request.headers.get("authorization"))
+            return vary_on(Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators), "Accept")
+        except HTTPException:
+            return vary_on(await call_next(request), "Accept")  # handler devolve o 401/403
+
+    cache = get_response_cache()
+    key = (
+        path,
+        tuple(sorted(request.query_params.multi_items())),
+        fmt,
+        request.headers.get("authorization", ""),
+        version,
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return vary_on(Response(content=cached.body, headers={**cached.headers, **validators, "X-Cache": "HIT"}), "Accept")
+
+    response = vary_on(await call_next(request), "Accept")
+    if response.status_code != status.HTTP_200_OK:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    # Não guarda se um ETL trocou o banco (ou publicou outra versão) enquanto o handler rodava
+    if await asyncio.to_thread(registry.version, ds) == version:
+        cache.put(key, CachedResponse(body=body, media_type=headers.get("content-type", ""), headers=headers))
+    return Response(content=body, headers={**headers, **validators, "X-Cache": "MISS"})
+
+
+def _route_template(scope: dict[str, Any]) -> str:
+    """
+    Template da rota do request (`/candidates/{candidate_id}/assets`).
+
+    HITs e 304 do cache respondem antes do roteador, sem `route` no scope:
+    nesse caso casa o caminho com as rotas do app.
+    """
+    route = scope.get("route") or _match_route(scope)[0]
+    return getattr(route, "path", "(sem rota)")
+
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next: Any) -> Response:
+    """Latência por rota (template, não o caminho) e status, incluindo hits do cache."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    metrics.REQUEST_LATENCY.observe(
+        time.perf_counter() - start,
+        request.method,
+        _route_template(request.scope),
+        str(response.status_code),
+    )
+    return response
 
 
 @app.get("/health")
-def health() -> dict[str, Any]:
+async def health() -> dict[str, Any]:
     """
     Status da API e banco de dados.
     
@@ -82,31 +331,254 @@ def health() -> dict[str, Any]:
             "status": "ok",
             "db": "/path/to/db",
             "db_exists": true,
+            "pool": {"open": true, "size": 8, "in_use": 0, "ok": true},
+            "cache": {"entries": 10, "hits": 42, "misses": 10, ...},
+            "executor": {"light": {"running": 1, "queued": 0, ...}, "heavy": {...}},
             "version": "1.0.0"
         }
     """
+    pool = get_pool()
+    db_path = pool.active_path
+    db_exists = db_path.exists()
     return {
         "status": "ok",
-        "db": str(DB_PATH),
-        "db_exists": DB_PATH.exists(),
+        "db": str(db_path),
+        "db_exists": db_exists,
+        # health() espera por um cursor: fora do event loop
+        "pool": await asyncio.to_thread(pool.health) if db_exists else {"open": pool.is_open, "size": pool.size, "in_use": pool.in_use},
+        "cache": get_response_cache().stats(),
+        "executor": get_executor().stats(),
         "version": "1.0.0",
     }
 
 
+def _resolve_dataset(ano: int | None, uf: str | None, cargo: str | None) -> Dataset:
+    """Resolve o conjunto e atualiza o catálogo dele, para o handler só ler o que já está em memória."""
+    registry = get_registry()
+    ds = registry.resolve(ano, uf, cargo)
+    registry.catalog(ds).refresh()
+    return ds
+
+
+async def dataset_param(
+    ano: int | None = Query(None, description="Ano da eleição (padrão: ANO do config)"),
+    uf: str | None = Query(None, description="UF, ex.: SP (padrão: UF do config)"),
+    cargo: str | None = Query(None, description="Cargo, ex.: dep_fed, dep_est (padrão: cargo do config)"),
+) -> Dataset:
+    """
+    Conjunto (ano, uf, cargo) pedido nos parâmetros da query.
+
+    Resolver e recarregar o catálogo pode ler o banco (cursor do pool), então
+    roda numa thread e não segura o event loop.
+    """
+    try:
+        return await asyncio.to_thread(_resolve_dataset, ano, uf, cargo)
+    except DatasetNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@app.get("/datasets")
+async def list_datasets() -> dict[str, Any]:
+    """
+    Conjuntos (ano, UF, cargo) que a API pode servir.
+
+    Returns:
+        {
+            "default": {"ano": 2022, "uf": "SP", "cargo": "dep_fed", ...},
+            "items": [{"ano": 2022, "uf": "MG", "cargo": "dep_est",
+                       "descricao": "Deputado Estadual", "arquivo": "2022_mg_dep_est.duckdb"}]
+        }
+        `arquivo` é null para conjuntos no banco principal.
+    """
+    registry = get_registry()
+    # O catálogo pode precisar de um cursor: fora do event loop
+    available = await asyncio.to_thread(registry.available) if get_pool().active_path.exists() else []
+    return {"default": registry.default.describe(), "items": [ds.describe() for ds in available]}
+
+
+def _check_profile(profile: bool, fmt: str, authorization: str | None) -> None:
+    """`profile=1` exige token de administrador e resposta JSON."""
+    if not profile:
+        return
+    check_admin_key(authorization)
+    if fmt != formats.JSON:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="profile=1 só está disponível em JSON")
+
+
+@app.get("/metrics")
+def prometheus_metrics() -> Response:
+    """
+    Métricas no formato texto do Prometheus.
+
+    - `eleicoes_http_request_duration_seconds`: latência por rota/status
+    - `eleicoes_query_duration_seconds` e `eleicoes_query_rows_total`: por query nomeada
+    - `eleicoes_serialization_duration_seconds`: por formato (json/arrow/parquet)
+    - pool, executor e cache de respostas, lidos na hora da coleta
+    """
+    pool = get_pool()
+    lanes = get_executor().stats()
+    cache = get_response_cache().stats()
+    lookups = cache["hits"] + cache["misses"]
+    extra = [
+        *metrics.snapshot("eleicoes_db_pool_size", "Cursores do pool.", {(): pool.size}),
+        *metrics.snapshot("eleicoes_db_pool_in_use", "Cursores emprestados agora.", {(): pool.in_use}),
+        *metrics.snapshot(
+            "eleicoes_executor_running", "Queries rodando por classe.",
+            {(("class", c),): s["running"] for c, s in lanes.items()},
+        ),
+        *metrics.snapshot(
+            "eleicoes_executor_queued", "Pedidos na fila por classe.",
+            {(("class", c),): s["queued"] for c, s in lanes.items()},
+        ),
+        *metrics.snapshot(
+            "eleicoes_executor_rejected_total", "Pedidos recusados (fila cheia) por classe.",
+            {(("class", c),): s["rejected"] for c, s in lanes.items()}, kind="counter",
+        ),
+        *metrics.snapshot(
+            "eleicoes_executor_timeouts_total", "Queries interrompidas por prazo por classe.",
+            {(("class", c),): s["timeouts"] for c, s in lanes.items()}, kind="counter",
+        ),
+        *metrics.snapshot("eleicoes_response_cache_bytes", "Bytes no cache de respostas.", {(): cache["bytes"]}),
+        *metrics.snapshot(
+            "eleicoes_response_cache_lookups_total", "Consultas ao cache de respostas por resultado.",
+            {(("result", "hit"),): cache["hits"], (("result", "miss"),): cache["misses"]}, kind="counter",
+        ),
+        *metrics.snapshot(
+            "eleicoes_response_cache_hit_ratio", "Hits / consultas ao cache desde o início do worker.",
+            {(): cache["hits"] / lookups if lookups else 0.0},
+        ),
+    ]
+    return Response(content=metrics.render(extra), media_type=metrics.CONTENT_TYPE)
+
+
+# Campos aceitos em `sort` (expressões sem NULL, exigência do keyset)
+SORT_FIELDS = {
+    "votos": "s.total_votos",
+    "receitas": "s.total_receitas",
+    "despesas": "s.total_despesas",
+    "bens": "s.total_bens",
+    "nome": "s.nome_urna",
+    "partido": "COALESCE(s.partido, '')",
+}
+
+
+def _parse_sort(sort: str) -> tuple[str, list[SortKey]]:
+    """
+    Converte o parâmetro `sort` em chaves de ordenação.
+
+    Um único campo com ranking pré-computado (rank_* no resumo) vira uma
+    chave inteira única; combinações usam as colunas e desempatam por id.
+
+    Returns:
+        (nome canônico da ordenação, chaves)
+
+    Raises:
+        ValueError: Se algum campo ou direção é inválido.
+    """
+    specs: list[tuple[str, bool]] = []
+    for part in [p.strip().lower() for p in sort.split(",") if p.strip()] or ["votos"]:
+        field, _, direction = part.partition(":")
+        if field not in SORT_FIELDS or direction not in ("", "asc", "desc"):
+            raise ValueError(f"Ordenação inválida: '{part}'. Campos: {', '.join(SORT_FIELDS)}")
+        natural_desc = RANKED_SORTS[field][1] if field in RANKED_SORTS else False
+        specs.append((field, natural_desc if not direction else direction == "desc"))
+
+    name = ",".join(f"{field}:{'desc' if desc else 'asc'}" for field, desc in specs)
+    if len(specs) == 1 and specs[0][0] in RANKED_SORTS:
+        field, desc = specs[0]
+        return name, [SortKey(f"s.rank_{field}", desc != RANKED_SORTS[field][1])]
+    return name, [SortKey(SORT_FIELDS[field], desc) for field, desc in specs] + [SortKey("s.id", False)]
+
+
+def _table_key(keys: list[SortKey], table: Any, index: int) -> list[Any]:
+    """Valores da chave de ordenação da linha `index` de uma tabela Arrow."""
+    return row_key(keys, list(table.slice(index, 1).to_pylist()[0].values()))
+
+
+def _candidate_filters(
+    partido: str,
+    situacao: str,
+    genero: str,
+    min_votos: int | None,
+    max_votos: int | None,
+    min_receitas: float | None,
+    max_receitas: float | None,
+    min_bens: float | None,
+    max_bens: float | None,
+) -> tuple[list[str], list[Any]]:
+    """Condições SQL (sobre o resumo `s`) para os filtros de /candidates."""
+    conditions: list[str] = []
+    params: list[Any] = []
+
+    siglas = [p.strip().upper() for p in partido.split(",") if p.strip()]
+    if siglas:
+        conditions.append(f"upper(s.partido) IN ({', '.join('?' for _ in siglas)})")
+        params += siglas
+    for column, value in (("situacao", situacao), ("genero", genero)):
+        if value.strip():
+            conditions.append(f"upper(s.{column}) = ?")
+            params.append(value.strip().upper())
+    for column, low, high in (
+        ("total_votos", min_votos, max_votos),
+        ("total_receitas", min_receitas, max_receitas),
+        ("total_bens", min_bens, max_bens),
+    ):
+        if low is not None:
+            conditions.append(f"s.{column} >= ?")
+            params.append(low)
+        if high is not None:
+            conditions.append(f"s.{column} <= ?")
+            params.append(high)
+    return conditions, params
+
+
 @app.get("/candidates")
-def list_candidates(
+async def list_candidates(
     q: str = "",
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=CANDIDATES_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    cursor: str = "",
+    sort: str = "votos",
+    partido: str = "",
+    situacao: str = "",
+    genero: str = "",
+    min_votos: int | None = None,
+    max_votos: int | None = None,
+    min_receitas: float | None = None,
+    max_receitas: float | None = None,
+    min_bens: float | None = None,
+    max_bens: float | None = None,
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
     authorization: str | None = Header(None),
-) -> dict[str, Any]:
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
     """
     Lista candidatos com filtro de busca.
     
     Args:
-        q: Texto para buscar (busca em nome_urna e nome_completo).
-        limit: Número de resultados (padrão 50).
-        offset: Deslocamento para paginação (padrão 0).
+        q: Texto para buscar em nome_urna e nome_completo. Ignora acentos e
+            caixa; sem correspondência exata suficiente, inclui nomes
+            parecidos (ranqueados por `score`).
+        limit: Número de resultados (padrão 50, de 1 a CANDIDATES_MAX_LIMIT).
+        offset: Deslocamento para paginação (padrão 0, >= 0). Ignorado com `cursor`.
+        cursor: Token `next_cursor`/`prev_cursor` de uma resposta anterior
+            (paginação por keyset; mesmos `q`/`sort` da requisição original).
+        sort: Campos separados por vírgula entre votos, receitas, despesas,
+            bens, nome e partido, com `:asc`/`:desc` opcional (ex.:
+            `receitas`, `partido,votos:desc`). Padrão: votos. Com `q`, o
+            score da busca vem antes.
+        partido: Siglas separadas por vírgula (ex.: `PT,PL`).
+        situacao: Situação da candidatura (ex.: `APTO`).
+        genero: Gênero declarado (ex.: `FEMININO`).
+        min_votos, max_votos, min_receitas, max_receitas, min_bens, max_bens:
+            Faixas (inclusivas) de votos, receitas e bens.
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+            Em Arrow/Parquet o corpo é só a tabela de itens e `has_more`,
+            cursores e flags vão nos headers `X-Has-More`, `X-Next-Cursor`...
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
         authorization: Token Bearer (se API_KEY está definida).
     
     Returns:
@@ -119,6 +591,9 @@ def list_candidates(
                     ...
                 }
             ],
+            "has_more": true,
+            "next_cursor": "eyJvIjoi...",
+            "prev_cursor": null,
             "assets_enabled": true,
             "votes_enabled": true,
             "finance_enabled": true
@@ -134,94 +609,127 @@ def list_candidates(
         raise
 
     try:
-        if not DB_PATH.exists():
-            logger.error(f"[DB] Banco não encontrado: {DB_PATH}")
+        db_path = get_pool().active_path
+        if not db_path.exists():
+            logger.error(f"[DB] Banco não encontrado: {db_path}")
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Banco de dados não encontrado em {DB_PATH}",
+                detail=f"Banco de dados não encontrado em {db_path}",
             )
 
-        con = open_db(read_only=True)
-        tables = get_tables(con)
-
         # Verifica quais tabelas estão disponíveis
-        assets_enabled = ASSETS_AGG_TABLE in tables
-        votes_enabled = VOTES_AGG_TABLE in tables
-        finance_enabled = FINANCE_AGG_TABLE in tables
+        catalog = get_registry().catalog(ds)
+        flags = catalog.flags(ds.tables)
+        assets_enabled = flags["assets_enabled"]
+        votes_enabled = flags["votes_enabled"]
+        finance_enabled = flags["finance_enabled"]
 
-        q_norm = q.strip().lower()
+        if not catalog.has(ds.tables.candidate_summary):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Tabela {ds.tables.candidate_summary} não existe. Execute os ETLs.",
+            )
+
+        columns = """
+                s.id, s.numero, s.nome_urna, s.nome_completo, s.partido, s.uf, s.cargo, s.situacao,
+                s.total_bens, s.qtd_bens, s.total_votos,
+                s.total_receitas, s.total_despesas, s.doadores_unicos, s.fornecedores_unicos"""
+        fmt = formats.negotiate(output_format, accept)
+        _check_profile(profile, fmt, authorization)
+        try:
+            order_name, keys = _parse_sort(sort)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        cte, join, extra = "", "", ""
+        if q.strip():
+            # Ids e scores da busca entram como parâmetros da CTE (ver `work`)
+            cte = "WITH m AS (SELECT UNNEST(?::BIGINT[]) AS id, UNNEST(?::DOUBLE[]) AS score)"
+            join, extra = "JOIN m ON m.id = s.id", ", m.score"
+            keys.insert(0, SortKey("m.score", True))
+            order_name = "score," + order_name
+
+        conditions, where_params = _candidate_filters(
+            partido, situacao, genero, min_votos, max_votos, min_receitas, max_receitas, min_bens, max_bens
+        )
 
+        # O cursor só vale para a mesma ordenação, busca e filtros
+        cursor_order = cursor_context(
+            order_name, q.strip(), partido, situacao, genero,
+            min_votos, max_votos, min_receitas, max_receitas, min_bens, max_bens,
+        )
+        direction = "next"
+        if cursor:
+            try:
+                cur = decode_cursor(cursor, cursor_order, len(keys))
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            predicate, predicate_params = keyset_predicate(keys, cur.values, cur.direction)
+            conditions.append(predicate)
+            where_params += predicate_params
+            direction = cur.direction
+            offset = 0
+        where = " AND ".join(conditions) or "TRUE"
+
+        # Busca limit + 1 linhas para saber se existe próxima página
         sql = f"""
-            SELECT
-                c.id, c.numero, c.nome_urna, c.nome_completo, c.partido, c.uf, c.cargo, c.situacao,
-                COALESCE(a.total_bens, 0) AS total_bens,
-                COALESCE(a.qtd_bens, 0)   AS qtd_bens,
-                COALESCE(v.total_votos, 0) AS total_votos,
-                COALESCE(f.total_receitas, 0) AS total_receitas,
-                COALESCE(f.total_despesas, 0) AS total_despesas,
-                COALESCE(f.doadores_unicos, 0) AS doadores_unicos,
-                COALESCE(f.fornecedores_unicos, 0) AS fornecedores_unicos
-            FROM {CANDIDATE_TABLE} c
-            LEFT JOIN {ASSETS_AGG_TABLE} a ON a.candidate_id = c.id
-            LEFT JOIN {VOTES_AGG_TABLE} v ON v.candidate_id = c.id
-            LEFT JOIN {FINANCE_AGG_TABLE} f ON f.candidate_id = c.id
-            WHERE (? = '' OR lower(c.nome_urna) LIKE '%' || ? || '%'
-                        OR lower(c.nome_completo) LIKE '%' || ? || '%')
-            ORDER BY total_votos DESC, c.nome_urna
+            {cte}
+            SELECT {columns}{extra}, {key_columns(keys)}
+            FROM {ds.tables.candidate_summary} s
+            {join}
+            WHERE {where}
+            ORDER BY {order_by(keys, reverse=direction == "prev")}
             LIMIT ? OFFSET ?
         """
+        params = where_params + [limit + 1, offset]
 
-        # Fallbacks para tabelas faltantes
-        if not assets_enabled:
-            sql = sql.replace(
-                f"LEFT JOIN {ASSETS_AGG_TABLE} a",
-                "LEFT JOIN (SELECT NULL::BIGINT AS candidate_id, 0::DOUBLE AS total_bens, 0::BIGINT AS qtd_bens LIMIT 0) a",
-            )
-        if not votes_enabled:
-            sql = sql.replace(
-                f"LEFT JOIN {VOTES_AGG_TABLE} v",
-                "LEFT JOIN (SELECT NULL::BIGINT AS candidate_id, 0::BIGINT AS total_votos LIMIT 0) v",
-            )
-        if not finance_enabled:
-            sql = sql.replace(
-                f"LEFT JOIN {FINANCE_AGG_TABLE} f",
-                "LEFT JOIN (SELECT NULL::BIGINT AS candidate_id, 0::DOUBLE AS total_receitas, 0::DOUBLE AS total_despesas, 0::BIGINT AS doadores_unicos, 0::BIGINT AS fornecedores_unicos LIMIT 0) f",
+        def work(con: Any) -> Response:
+            search_params: list[Any] = []
+            if q.strip():
+                # Busca por nome via índice de trigramas (sem acento, tolera erro de digitação)
+                index = get_search_index(ds)
+                matches = index.search(q) if index is not None else []
+                search_params = [[m[0] for m in matches], [m[1] for m in matches]]
+            with metrics.QueryTimer("candidates", con, (sql, search_params + params)) as timer:
+                table = fetch_arrow(con.execute(sql, search_params + params))
+                timer.rows = table.num_rows
+
+            extra_row = table.num_rows > limit
+            table = table.slice(0, limit)
+            if direction == "prev":
+                table = table.take(list(range(table.num_rows - 1, -1, -1)))
+                has_more, has_prev = True, extra_row
+            else:
+                has_more, has_prev = extra_row, bool(cursor) or offset > 0
+
+            n = table.num_rows
+            next_cursor = encode_cursor(cursor_order, _table_key(keys, table, n - 1), "next") if n and has_more else None
+            prev_cursor = encode_cursor(cursor_order, _table_key(keys, table, 0), "prev") if n and has_prev else None
+
+            # Colunas de item: tudo menos as chaves de ordenação anexadas ao fim
+            items = table.select(table.column_names[: table.num_columns - len(keys)])
+
+            logger.info(
+                f"[API] /candidates: q='{q}', sort={order_name}, limit={limit}, offset={offset}, "
+                f"cursor={bool(cursor)}, format={fmt}, found={n}"
             )
 
-        rows = con.execute(sql, [q_norm, q_norm, q_norm, limit, offset]).fetchall()
-        con.close()
-
-        items = [
-            {
-                "id": r[0],
-                "numero": r[1],
-                "nome_urna": r[2],
-                "nome_completo": r[3],
-                "partido": r[4],
-                "uf": r[5],
-                "cargo": r[6],
-                "situacao": r[7],
-                "total_bens": float(r[8]),
-                "qtd_bens": int(r[9]),
-                "total_votos": int(r[10]),
-                "total_receitas": float(r[11]),
-                "total_despesas": float(r[12]),
-                "doadores_unicos": int(r[13]),
-                "fornecedores_unicos": int(r[14]),
+            page = {
+                "has_more": has_more,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+                "assets_enabled": assets_enabled,
+                "votes_enabled": votes_enabled,
+                "finance_enabled": finance_enabled,
             }
-            for r in rows
-        ]
+            if fmt != formats.JSON:
+                # Metadados da página vão em headers (o corpo é só a tabela)
+                return formats.table_response(items, fmt, headers=formats.meta_headers(page))
+            return formats.json_response({"items": formats.table_json(con, items)}, page | profiling.profile_field())
 
-        logger.info(f"[API] /candidates: q='{q}', limit={limit}, offset={offset}, found={len(items)}")
+        return await get_executor().run(LIGHT, profiling.profiled(work, profile), dataset=ds)
 
-        return {
-            "items": items,
-            "assets_enabled": assets_enabled,
-            "votes_enabled": votes_enabled,
-            "finance_enabled": finance_enabled,
-        }
-
-    except HTTPException:
+    except (HTTPException, PoolExhausted, Overloaded, QueryTimeout):
         raise
     except Exception as e:
         logger.error(f"[API ERROR] /candidates: {e}", exc_info=True)
@@ -231,12 +739,214 @@ def list_candidates(
         )
 
 
+def _finance_top_queries(
+    catalog: SchemaCatalog, tables: Tables, ids: list[int], top: int
+) -> dict[str, queries.Query]:
+    """
+    Queries de top doadores e fornecedores ("top_doadores"/"top_fornecedores").
+
+    Usa as tabelas pré-ranqueadas pelo ETL quando existem e `top` cabe em
+    FINANCE_TOP_N; senão agrega os lançamentos na hora. Seções cuja tabela
+    de lançamentos não existe ficam de fora.
+    """
+    out: dict[str, queries.Query] = {}
+    for key, prefix in (("top_doadores", "doador"), ("top_fornecedores", "fornecedor")):
+        source, ranked_table = queries.counterparty_tables(tables, prefix)
+        if catalog.has(source):
+            ranked = top <= FINANCE_TOP_N and catalog.has(ranked_table)
+            out[key] = queries.top_counterparties_query(tables, prefix, ids, top, ranked=ranked)
+    return out
+
+
+BATCH_SECTIONS = ("profile", "finance", "votes_municipio", "assets")
+
+
+@app.get("/candidates/batch")
+async def candidates_batch(
+    ids: str,
+    sections: str = ",".join(BATCH_SECTIONS),
+    top: int = Query(15, ge=1, le=CANDIDATES_MAX_LIMIT),
+    limit: int = Query(20, ge=1, le=CANDIDATES_MAX_LIMIT),
+    assets_limit: int = Query(200, ge=1, le=CANDIDATES_MAX_LIMIT),
+    profile_queries: bool = Query(False, alias="profile"),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> dict[str, Any]:
+    """
+    Detalhes de vários candidatos em uma chamada.
+
+    Cada seção é uma única query para todos os ids (em vez de uma chamada
+    por candidato e por seção), usando o mesmo cursor do pool.
+
+    Args:
+        ids: Ids separados por vírgula (máx. BATCH_MAX_IDS).
+        sections: Seções separadas por vírgula entre profile, finance,
+            votes_municipio e assets (padrão: todas).
+        top: Top doadores/fornecedores por candidato (seção finance).
+        limit: Municípios por candidato (seção votes_municipio).
+        assets_limit: Bens por candidato (seção assets).
+            Os três limites vão de 1 a CANDIDATES_MAX_LIMIT.
+        profile_queries: `profile=1` inclui o EXPLAIN ANALYZE de cada query
+            na chave `profile` da resposta (só admin).
+        authorization: Token Bearer (se API_KEY está definida).
+
+    Returns:
+        {
+            "items": [{"id": 1, "profile": {...}, "finance": {...},
+                       "votes_municipio": [...], "assets": [...]}],
+            "missing": [ids sem linha no resumo],
+            "unavailable": [seções cuja tabela não existe]
+        }
+        `finance` é null para candidatos sem dados de finanças.
+    """
+    try:
+        check_api_key(authorization)
+        _check_profile(profile_queries, formats.JSON, authorization)
+
+        try:
+            id_list = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids deve ser uma lista de inteiros")
+        wanted = [s.strip() for s in sections.split(",") if s.strip()]
+        invalid = [s for s in wanted if s not in BATCH_SECTIONS]
+        if invalid or not wanted:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Seções inválidas: {invalid}. Use: {', '.join(BATCH_SECTIONS)}",
+            )
+        if not id_list or len(id_list) > BATCH_MAX_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Informe entre 1 e {BATCH_MAX_IDS} ids",
+            )
+
+        if not get_pool().active_path.exists():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Banco de dados não encontrado",
+            )
+
+        catalog = get_registry().catalog(ds)
+        required = {
+            "profile": ds.tables.candidate_summary,
+            "finance": ds.tables.finance_agg,
+            "votes_municipio": ds.tables.votes_mun,
+            "assets": ds.tables.assets,
+        }
+        unavailable = [s for s in wanted if not catalog.has(required[s])]
+        enabled = [s for s in wanted if s not in unavailable]
+
+        def work(con: Any) -> tuple[dict[str, dict[int, Any]], dict[int, dict[str, Any]], dict[str, Any]]:
+            results: dict[str, dict[int, Any]] = {}
+            profiles: dict[int, dict[str, Any]] = {}
+            if catalog.has(ds.tables.candidate_summary):
+                profiles = queries.fetch_profiles(con, ds.tables, id_list)
+            if "finance" in enabled:
+                summaries = queries.fetch_finance_summary(con, ds.tables, id_list)
+                tops = {
+                    key: queries.fetch_grouped(con, query, id_list, key)
+                    for key, query in _finance_top_queries(catalog, ds.tables, id_list, top).items()
+                }
+                results["finance"] = {
+                    i: {
+                        "summary": summaries[i],
+                        "top_doadores": tops.get("top_doadores", {}).get(i, []),
+                        "top_fornecedores": tops.get("top_fornecedores", {}).get(i, []),
+                    }
+                    for i in summaries
+                }
+            if "votes_municipio" in enabled:
+                results["votes_municipio"] = queries.fetch_votes_municipio(con, ds.tables, id_list, limit)
+            if "assets" in enabled:
+                results["assets"] = queries.fetch_assets(con, ds.tables, id_list, assets_limit)
+            return results, profiles, profiling.profile_field()
+
+        results, profiles, plans = await get_executor().run(HEAVY, profiling.profiled(work, profile_queries), dataset=ds)
+        if "profile" in enabled:
+            results["profile"] = profiles
+
+        # Sem o resumo não há como saber quais ids existem: devolve todos
+        found = [i for i in id_list if i in profiles] if catalog.has(ds.tables.candidate_summary) else id_list
+        items = [{"id": i, **{s: results[s].get(i) for s in enabled}} for i in found]
+        missing = [i for i in id_list if i not in found]
+
+        logger.info(f"[API] /candidates/batch: ids={len(id_list)}, sections={enabled}, found={len(items)}")
+
+        return {"items": items, "missing": missing, "unavailable": unavailable} | plans
+
+    except (HTTPException, PoolExhausted, Overloaded, QueryTimeout):
+        raise
+    except Exception as e:
+        logger.error(f"[API ERROR] /candidates/batch: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar candidatos em lote: {str(e)[:100]}",
+        )
+
+
+def _items_response(con: Any, items: Any, fmt: str) -> Response:
+    """`{"items": [...]}` em JSON, ou a tabela de itens em Arrow/Parquet."""
+    if fmt == formats.JSON:
+        return formats.json_response({"items": formats.table_json(con, items)}, profiling.profile_field())
+    return formats.table_response(items, fmt)
+
+
+async def _serve_derived(
+    ds: Dataset,
+    table: str,
+    work: Callable[[Any, str], Response],
+    *,
+    route: str,
+    error: str,
+    hint: str = "Execute os ETLs.",
+    output_format: str = "",
+    accept: str | None = None,
+    profile: bool = False,
+    authorization: str | None = None,
+) -> Response:
+    """
+    Roda um endpoint servido por uma tabela derivada (partidos, municípios).
+
+    Negocia o formato, checa `profile`, exige o banco e a tabela (404 se o
+    ETL ainda não a criou, como nos detalhes do candidato) e executa
+    `work(con, fmt)` na faixa LIGHT. Erros inesperados viram 500 com `error`.
+    """
+    try:
+        fmt = formats.negotiate(output_format, accept)
+        _check_profile(profile, fmt, authorization)
+        if not get_pool().active_path.exists():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Banco de dados não encontrado",
+            )
+        if not get_registry().catalog(ds).has(table):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Tabela {table} não existe. {hint}",
+            )
+        return await get_executor().run(LIGHT, profiling.profiled(lambda con: work(con, fmt), profile), dataset=ds)
+
+    except (HTTPException, PoolExhausted, Overloaded, QueryTimeout):
+        raise
+    except Exception as e:
+        logger.error(f"[API ERROR] {route}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{error}: {str(e)[:100]}",
+        )
+
+
 @app.get("/candidates/{candidate_id}/assets")
-def candidate_assets(
+async def candidate_assets(
     candidate_id: int,
     limit: int = 200,
     offset: int = 0,
-) -> dict[str, Any]:
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
     """
     Bens declarados por um candidato.
     
@@ -244,45 +954,38 @@ def candidate_assets(
         candidate_id: ID do candidato.
         limit: Tamanho da página.
         offset: Deslocamento para paginação.
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
     
     Returns:
         {"items": [{"tipo": "...", "descricao": "...", "valor": 123.45}]}
+        (em Arrow/Parquet, só a tabela de itens)
     """
     try:
-        if not DB_PATH.exists():
+        fmt = formats.negotiate(output_format, accept)
+        _check_profile(profile, fmt, authorization)
+        if not get_pool().active_path.exists():
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Banco de dados não encontrado",
             )
 
-        con = open_db(read_only=True)
-        tables = get_tables(con)
-
-        if ASSETS_TABLE not in tables:
-            con.close()
+        catalog = get_registry().catalog(ds)
+        if not catalog.has(ds.tables.assets):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Tabela {ASSETS_TABLE} não existe. Execute ETL de bens.",
+                detail=f"Tabela {ds.tables.assets} não existe. Execute ETL de bens.",
             )
 
-        rows = con.execute(
-            f"""
-            SELECT tipo, descricao, valor
-            FROM {ASSETS_TABLE}
-            WHERE candidate_id = ?
-            ORDER BY valor DESC NULLS LAST
-            LIMIT ? OFFSET ?
-            """,
-            [candidate_id, limit, offset],
-        ).fetchall()
-        con.close()
-
-        items = [{"tipo": str(r[0]) if r[0] else "", "descricao": str(r[1]) if r[1] else "", "valor": float(r[2]) if r[2] else 0.0} for r in rows]
-        logger.info(f"[API] /candidates/{candidate_id}/assets: found={len(items)}")
+        def work(con: Any) -> Response:
+            items = queries.fetch_table(con, queries.assets_query(ds.tables, [candidate_id], limit, offset), "assets")
+            logger.info(f"[API] /candidates/{candidate_id}/assets: format={fmt}, found={items.num_rows}")
+            return _items_response(con, items, fmt)
 
-        return {"items": items}
+        return await get_executor().run(LIGHT, profiling.profiled(work, profile), dataset=ds)
 
-    except HTTPException:
+    except (HTTPException, PoolExhausted, Overloaded, QueryTimeout):
         raise
     except Exception as e:
         logger.error(f"[API ERROR] /candidates/{candidate_id}/assets: {e}", exc_info=True)
@@ -293,55 +996,53 @@ def candidate_assets(
 
 
 @app.get("/candidates/{candidate_id}/votes_municipio")
-def candidate_votes_municipio(
+async def candidate_votes_municipio(
     candidate_id: int,
     limit: int = 20,
-) -> dict[str, Any]:
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
     """
     Votos por município de um candidato.
     
     Args:
         candidate_id: ID do candidato.
         limit: Número máximo de municípios (padrão 20).
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
     
     Returns:
         {"items": [{"municipio": "São Paulo", "votos": 5000}]}
+        (em Arrow/Parquet, só a tabela de itens)
     """
     try:
-        if not DB_PATH.exists():
+        fmt = formats.negotiate(output_format, accept)
+        _check_profile(profile, fmt, authorization)
+        if not get_pool().active_path.exists():
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Banco de dados não encontrado",
             )
 
-        con = open_db(read_only=True)
-        tables = get_tables(con)
-
-        if VOTES_MUN_TABLE not in tables:
-            con.close()
+        catalog = get_registry().catalog(ds)
+        if not catalog.has(ds.tables.votes_mun):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Tabela {VOTES_MUN_TABLE} não existe. Execute ETL de votos.",
+                detail=f"Tabela {ds.tables.votes_mun} não existe. Execute ETL de votos.",
             )
 
-        rows = con.execute(
-            f"""
-            SELECT municipio, votos_municipio
-            FROM {VOTES_MUN_TABLE}
-            WHERE candidate_id = ?
-            ORDER BY votos_municipio DESC
-            LIMIT ?
-            """,
-            [candidate_id, limit],
-        ).fetchall()
-        con.close()
-
-        items = [{"municipio": str(r[0]) if r[0] else "", "votos": int(r[1]) if r[1] else 0} for r in rows]
-        logger.info(f"[API] /candidates/{candidate_id}/votes_municipio: found={len(items)}")
+        def work(con: Any) -> Response:
+            items = queries.fetch_table(con, queries.votes_municipio_query(ds.tables, [candidate_id], limit), "votes_municipio")
+            logger.info(f"[API] /candidates/{candidate_id}/votes_municipio: format={fmt}, found={items.num_rows}")
+            return _items_response(con, items, fmt)
 
-        return {"items": items}
+        return await get_executor().run(LIGHT, profiling.profiled(work, profile), dataset=ds)
 
-    except HTTPException:
+    except (HTTPException, PoolExhausted, Overloaded, QueryTimeout):
         raise
     except Exception as e:
         logger.error(f"[API ERROR] /candidates/{candidate_id}/votes_municipio: {e}", exc_info=True)
@@ -351,17 +1052,92 @@ def candidate_votes_municipio(
         )
 
 
+@app.get("/candidates/{candidate_id}/votes_zona")
+async def candidate_votes_zona(
+    candidate_id: int,
+    limit: int = 50,
+    cd_municipio: int | None = None,
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
+    """
+    Votos por zona eleitoral de um candidato, mais votadas primeiro.
+
+    Lê a tabela bruta por zona (ordenada por candidato no ETL, então só
+    poucos row groups são lidos) e os totais de cada zona.
+
+    Args:
+        candidate_id: ID do candidato.
+        limit: Número máximo de zonas (padrão 50).
+        cd_municipio: Restringe a um município.
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
+
+    Returns:
+        {"items": [{"cd_municipio": 71072, "municipio": "SÃO PAULO", "zona": 1,
+                    "votos": 800, "pct_zona": 0.03, "pct_candidato": 0.01}]}
+        `pct_zona`: fatia do candidato nos votos da zona; `pct_candidato`:
+        fatia da zona nos votos do candidato (no município, se filtrado).
+    """
+    try:
+        fmt = formats.negotiate(output_format, accept)
+        _check_profile(profile, fmt, authorization)
+        if not get_pool().active_path.exists():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Banco de dados não encontrado",
+            )
+
+        if not get_registry().catalog(ds).has(ds.tables.votes_zona):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Tabela {ds.tables.votes_zona} não existe. Execute ETL de votos.",
+            )
+
+        def work(con: Any) -> Response:
+            query = queries.votes_zona_query(ds.tables, [candidate_id], limit, cd_municipio)
+            items = queries.fetch_table(con, query, "votes_zona")
+            logger.info(f"[API] /candidates/{candidate_id}/votes_zona: format={fmt}, found={items.num_rows}")
+            return _items_response(con, items, fmt)
+
+        return await get_executor().run(LIGHT, profiling.profiled(work, profile), dataset=ds)
+
+    except (HTTPException, PoolExhausted, Overloaded, QueryTimeout):
+        raise
+    except Exception as e:
+        logger.error(f"[API ERROR] /candidates/{candidate_id}/votes_zona: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar votos por zona: {str(e)[:100]}",
+        )
+
+
 @app.get("/candidates/{candidate_id}/finance")
-def candidate_finance(
+async def candidate_finance(
     candidate_id: int,
     top: int = 15,
-) -> dict[str, Any]:
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
     """
     Receitas, despesas e top doadores/fornecedores de um candidato.
     
     Args:
         candidate_id: ID do candidato.
         top: Número de top doadores/fornecedores (padrão 15).
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+            Em Arrow/Parquet o corpo é uma tabela (papel, nome, doc, total)
+            com doadores e fornecedores, e o resumo vai nos headers
+            `X-Total-Receitas`, `X-Total-Despesas`...
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
     
     Returns:
         {
@@ -377,95 +1153,382 @@ def candidate_finance(
         }
     """
     try:
-        if not DB_PATH.exists():
+        fmt = formats.negotiate(output_format, accept)
+        _check_profile(profile, fmt, authorization)
+        if not get_pool().active_path.exists():
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Banco de dados não encontrado",
             )
 
-        con = open_db(read_only=True)
-        tables = get_tables(con)
-
-        if FINANCE_AGG_TABLE not in tables:
-            con.close()
+        catalog = get_registry().catalog(ds)
+        if not catalog.has(ds.tables.finance_agg):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Tabela {FINANCE_AGG_TABLE} não existe. Execute ETL/agg de finanças.",
+                detail=f"Tabela {ds.tables.finance_agg} não existe. Execute ETL/agg de finanças.",
             )
 
-        summary = con.execute(
-            f"""
-            SELECT total_receitas, total_despesas, doadores_unicos, fornecedores_unicos
-            FROM {FINANCE_AGG_TABLE}
-            WHERE candidate_id = ?
-            """,
-            [candidate_id],
-        ).fetchone()
-
-        if not summary:
-            con.close()
+        def work(con: Any) -> Response:
+            summary = queries.fetch_finance_summary(con, ds.tables, [candidate_id]).get(candidate_id)
+            if not summary:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Candidato {candidate_id} não encontrado em dados de finanças",
+                )
+
+            tops = {
+                key: queries.fetch_table(con, query, key)
+                for key, query in _finance_top_queries(catalog, ds.tables, [candidate_id], top).items()
+            }
+            logger.info(
+                f"[API] /candidates/{candidate_id}/finance: format={fmt}, "
+                + ", ".join(f"{key}={t.num_rows}" for key, t in tops.items())
+            )
+
+            if fmt != formats.JSON:
+                papel = {"top_doadores": "doador", "top_fornecedores": "fornecedor"}
+                parts = [t.add_column(0, "papel", pa.array([papel[key]] * t.num_rows, pa.string())) for key, t in tops.items()]
+                table = pa.concat_tables(parts) if parts else queries.EMPTY_COUNTERPARTIES
+                return formats.table_response(table, fmt, headers=formats.meta_headers(summary))
+
+            # Envelope serializado como os demais campos; só as tabelas entram já prontas
+            envelope = {"candidate_id": candidate_id, "summary": summary}
+            raw = {key: json.dumps(value, ensure_ascii=False) for key, value in envelope.items()}
+            raw |= {key: formats.table_json(con, tops[key]) if key in tops else "[]" for key in ("top_doadores", "top_fornecedores")}
+            return formats.json_response(raw, profiling.profile_field())
+
+        return await get_executor().run(HEAVY, profiling.profiled(work, profile), dataset=ds)
+
+    except (HTTPException, PoolExhausted, Overloaded, QueryTimeout):
+        raise
+    except Exception as e:
+        logger.error(f"[API ERROR] /candidates/{candidate_id}/finance: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar finanças: {str(e)[:100]}",
+        )
+
+
+@app.get("/partidos")
+async def list_parties(
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
+    """
+    Totais por partido, mais votados primeiro.
+
+    Lidos do cubo `party_summary` gerado pelo ETL (uma linha por partido),
+    sem varrer as tabelas de candidatos, votos ou finanças.
+
+    Args:
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
+
+    Returns:
+        {"items": [{"rank_votos": 1, "partido": "PL", "candidatos": 90,
+                    "eleitos": 17, "total_votos": 5000000, "pct_votos": 0.21,
+                    "total_receitas": ..., "total_despesas": ..., "total_bens": ...}]}
+        `eleitos` é null se o arquivo de candidatos não traz o resultado.
+    """
+
+    def work(con: Any, fmt: str) -> Response:
+        items = queries.fetch_table(con, queries.parties_query(ds.tables), "partidos")
+        logger.info(f"[API] /partidos: format={fmt}, found={items.num_rows}")
+        return _items_response(con, items, fmt)
+
+    return await _serve_derived(
+        ds, ds.tables.party_summary, work, route="/partidos", error="Erro ao listar partidos",
+        output_format=output_format, accept=accept, profile=profile, authorization=authorization,
+    )
+
+
+@app.get("/partidos/{sigla}")
+async def party_detail(
+    sigla: str,
+    limit: int = Query(20, ge=1, le=CANDIDATES_MAX_LIMIT),
+    profile: bool = False,
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
+    """
+    Totais de um partido com quebras por gênero e situação e seus candidatos.
+
+    Args:
+        sigla: Sigla do partido (sem diferenciar maiúsculas).
+        limit: Candidatos mais votados devolvidos (padrão 20, máx. CANDIDATES_MAX_LIMIT).
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só admin).
+
+    Returns:
+        {
+            "partido": {"rank_votos": 1, "partido": "PL", "candidatos": 90, ...},
+            "genero": [{"valor": "FEMININO", "candidatos": 30, "pct_votos": 0.2, ...}],
+            "situacao": [{"valor": "APTO", ...}],
+            "candidatos": [{"id": 123, "nome_urna": "...", "total_votos": 1500, ...}]
+        }
+        Nas quebras, `pct_votos` é a fatia dos votos do partido.
+    """
+
+    def work(con: Any, fmt: str) -> Response:
+        rows = queries.fetch_table(con, queries.party_query(ds.tables, sigla), "partido")
+        if rows.num_rows == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Candidato {candidate_id} não encontrado em dados de finanças",
+                detail=f"Partido {sigla} não encontrado",
             )
+        dimensao = rows.column("dimensao")
+        total = rows.filter(pc.equal(dimensao, "total")).drop_columns(["dimensao", "valor"]).to_pylist()[0]
+        breakdowns = {
+            name: formats.table_json(
+                con, rows.filter(pc.equal(dimensao, name)).drop_columns(["dimensao", "partido", "rank_votos"])
+            )
+            for name in PARTY_BREAKDOWNS
+        }
+        candidatos = queries.fetch_table(con, queries.party_candidates_query(ds.tables, sigla, limit), "partido_candidatos")
+        logger.info(f"[API] /partidos/{sigla}: candidatos={candidatos.num_rows}")
+        return formats.json_response(
+            {"partido": json.dumps(total, ensure_ascii=False)}
+            | breakdowns
+            | {"candidatos": formats.table_json(con, candidatos)},
+            profiling.profile_field(),
+        )
 
-        top_donors = []
-        if DONATIONS_TABLE in tables:
-            rows = con.execute(
-                f"""
-                SELECT
-                    COALESCE(NULLIF(TRIM(CAST(doador_nome AS VARCHAR)), ''), '(sem nome)') AS nome,
-                    COALESCE(TRIM(CAST(doador_doc AS VARCHAR)), '') AS doc,
-                    SUM(COALESCE(valor,0)) AS total
-                FROM {DONATIONS_TABLE}
-                WHERE candidate_id = ?
-                GROUP BY 1,2
-                ORDER BY total DESC
-                LIMIT ?
-                """,
-                [candidate_id, top],
-            ).fetchall()
-            top_donors = [{"nome": str(r[0]) if r[0] else "", "doc": str(r[1]) if r[1] else "", "total": float(r[2]) if r[2] else 0.0} for r in rows]
-
-        top_suppliers = []
-        if EXPENSES_TABLE in tables:
-            rows = con.execute(
-                f"""
-                SELECT
-                    COALESCE(NULLIF(TRIM(CAST(fornecedor_nome AS VARCHAR)), ''), '(sem nome)') AS nome,
-                    COALESCE(TRIM(CAST(fornecedor_doc AS VARCHAR)), '') AS doc,
-                    SUM(COALESCE(valor,0)) AS total
-                FROM {EXPENSES_TABLE}
-                WHERE candidate_id = ?
-                GROUP BY 1,2
-                ORDER BY total DESC
-                LIMIT ?
-                """,
-                [candidate_id, top],
-            ).fetchall()
-            top_suppliers = [{"nome": str(r[0]) if r[0] else "", "doc": str(r[1]) if r[1] else "", "total": float(r[2]) if r[2] else 0.0} for r in rows]
-
-        con.close()
-
-        logger.info(f"[API] /candidates/{candidate_id}/finance: donors={len(top_donors)}, suppliers={len(top_suppliers)}")
-
-        return {
-            "candidate_id": candidate_id,
-            "summary": {
-                "total_receitas": float(summary[0]) if summary[0] else 0.0,
-                "total_despesas": float(summary[1]) if summary[1] else 0.0,
-                "doadores_unicos": int(summary[2]) if summary[2] else 0,
-                "fornecedores_unicos": int(summary[3]) if summary[3] else 0,
-            },
-            "top_doadores": top_donors,
-            "top_fornecedores": top_suppliers,
+    return await _serve_derived(
+        ds, ds.tables.party_summary, work, route=f"/partidos/{sigla}", error="Erro ao buscar partido",
+        output_format=formats.JSON, profile=profile, authorization=authorization,
+    )
+
+
+@app.get("/municipios")
+async def list_municipios(
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
+    """
+    Todos os municípios com total de votos e candidato mais votado (visão de mapa).
+
+    Args:
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
+
+    Returns:
+        {"items": [{"cd_municipio": 71072, "municipio": "SÃO PAULO",
+                    "total_votos": 5000000, "candidatos": 1200,
+                    "lider_id": 123, "lider_nome": "...", "lider_partido": "PL",
+                    "lider_pct_votos": 0.12}]}
+    """
+
+    def work(con: Any, fmt: str) -> Response:
+        items = queries.fetch_table(con, queries.municipios_query(ds.tables), "municipios")
+        logger.info(f"[API] /municipios: format={fmt}, found={items.num_rows}")
+        return _items_response(con, items, fmt)
+
+    return await _serve_derived(
+        ds, ds.tables.municipios, work, route="/municipios", error="Erro ao listar municípios",
+        hint="Execute ETL de votos.",
+        output_format=output_format, accept=accept, profile=profile, authorization=authorization,
+    )
+
+
+@app.get("/municipios/{cd_municipio}/candidatos")
+async def municipio_candidates(
+    cd_municipio: int,
+    limit: int = Query(50, ge=1, le=CANDIDATES_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
+    """
+    Candidatos mais votados em um município, com fatia dos votos.
+
+    Lê a cópia dos votos ordenada por município, então só os row groups do
+    município são lidos.
+
+    Args:
+        cd_municipio: Código TSE do município.
+        limit: Tamanho da página (padrão 50, máx. CANDIDATES_MAX_LIMIT).
+        offset: Deslocamento (pelo rank de votos).
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+            Em Arrow/Parquet os dados do município e `has_more` vão nos
+            headers `X-Municipio`, `X-Has-More`...
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
+
+    Returns:
+        {
+            "municipio": {"cd_municipio": 71072, "municipio": "SÃO PAULO", ...},
+            "items": [{"rank": 1, "id": 123, "nome_urna": "...", "partido": "PL",
+                       "votos": 600000, "pct_votos": 0.12}],
+            "has_more": true
         }
+    """
+
+    def work(con: Any, fmt: str) -> Response:
+        found = queries.fetch_table(con, queries.municipio_query(ds.tables, cd_municipio), "municipio")
+        if found.num_rows == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Município {cd_municipio} não encontrado",
+            )
+        municipio = found.to_pylist()[0]
+        # limit + 1 para saber se existe próxima página
+        table = queries.fetch_table(
+            con, queries.municipio_candidates_query(ds.tables, cd_municipio, limit + 1, offset), "municipio_candidatos"
+        )
+        has_more = table.num_rows > limit
+        items = table.slice(0, limit)
+        logger.info(f"[API] /municipios/{cd_municipio}/candidatos: format={fmt}, found={items.num_rows}")
+
+        if fmt != formats.JSON:
+            meta = {"has_more": has_more, "cd_municipio": cd_municipio, "municipio": municipio["municipio"]}
+            return formats.table_response(items, fmt, headers=formats.meta_headers(meta))
+        return formats.json_response(
+            {"municipio": json.dumps(municipio, ensure_ascii=False), "items": formats.table_json(con, items)},
+            {"has_more": has_more} | profiling.profile_field(),
+        )
 
-    except HTTPException:
+    return await _serve_derived(
+        ds, ds.tables.municipios, work, route=f"/municipios/{cd_municipio}/candidatos",
+        error="Erro ao buscar candidatos do município", hint="Execute ETL de votos.",
+        output_format=output_format, accept=accept, profile=profile, authorization=authorization,
+    )
+
+
+@app.get("/municipios/{cd_municipio}/zonas")
+async def municipio_zonas(
+    cd_municipio: int,
+    output_format: str = Query("", alias="format"),
+    profile: bool = False,
+    accept: str | None = Header(None),
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> Response:
+    """
+    Zonas eleitorais de um município com total de votos e mais votado.
+
+    Args:
+        cd_municipio: Código TSE do município.
+        output_format: `format=json|arrow|parquet` (ou via header Accept).
+        profile: Inclui em `profile` o EXPLAIN ANALYZE de cada query (só
+            admin, só JSON).
+
+    Returns:
+        {"items": [{"zona": 1, "total_votos": 90000, "candidatos": 800,
+                    "lider_id": 123, "lider_nome": "...", "lider_partido": "PL",
+                    "lider_pct_votos": 0.08}]}
+    """
+
+    def work(con: Any, fmt: str) -> Response:
+        items = queries.fetch_table(con, queries.municipio_zonas_query(ds.tables, cd_municipio), "municipio_zonas")
+        if items.num_rows == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Município {cd_municipio} não encontrado",
+            )
+        logger.info(f"[API] /municipios/{cd_municipio}/zonas: format={fmt}, found={items.num_rows}")
+        return _items_response(con, items, fmt)
+
+    return await _serve_derived(
+        ds, ds.tables.votes_zona, work, route=f"/municipios/{cd_municipio}/zonas",
+        error="Erro ao buscar zonas do município", hint="Execute ETL de votos.",
+        output_format=output_format, accept=accept, profile=profile, authorization=authorization,
+    )
+
+
+@app.get("/export/{dataset}")
+def export_table(
+    dataset: str,
+    output_format: str = Query("csv", alias="format"),
+    columns: str = "",
+    candidate_id: str = "",
+    partido: str = "",
+    authorization: str | None = Header(None),
+    ds: Dataset = Depends(dataset_param),
+) -> StreamingResponse:
+    """
+    Exporta uma tabela inteira em streaming.
+
+    As linhas são lidas do DuckDB em record batches e escritas na resposta
+    conforme chegam; a memória não cresce com o tamanho da tabela.
+
+    Args:
+        dataset: Uma das chaves de EXPORT_TABLES (candidates, donations,
+            expenses, votes_munzona, ...).
+        output_format: `format=csv|ndjson|parquet` (padrão csv).
+        columns: Colunas separadas por vírgula (padrão: todas).
+        candidate_id: Ids separados por vírgula.
+        partido: Siglas separadas por vírgula.
+        authorization: Token Bearer (se API_KEY está definida).
+
+    Returns:
+        Arquivo `<dataset>.<formato>` como anexo (tabela do conjunto
+        `ano`/`uf`/`cargo`).
+    """
+    check_api_key(authorization)
+
+    if dataset not in EXPORT_TABLES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tabela de exportação desconhecida: '{dataset}'. Use: {', '.join(EXPORT_TABLES)}",
+        )
+    fmt = output_format.strip().lower()
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato inválido: '{fmt}'. Use: {', '.join(EXPORT_MEDIA_TYPES)}",
+        )
+    if not get_pool().active_path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados não encontrado",
+        )
+
+    table = getattr(ds.tables, EXPORT_TABLES[dataset])
+    catalog = get_registry().catalog(ds)
+    if not catalog.has(table):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tabela {table} não existe. Execute os ETLs.",
+        )
+
+    try:
+        ids = [int(i) for i in candidate_id.split(",") if i.strip()]
+        sql, params = build_export_query(
+            table,
+            catalog.columns(table),
+            [c.strip() for c in columns.split(",") if c.strip()],
+            ids,
+            [p.strip().upper() for p in partido.split(",") if p.strip()],
+            ds.tables.candidate,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    stream = stream_export(sql, params, fmt, dataset=ds)
+    try:
+        next(stream)  # reserva o cursor e executa a query antes de responder
+    except PoolExhausted:
         raise
     except Exception as e:
-        logger.error(f"[API ERROR] /candidates/{candidate_id}/finance: {e}", exc_info=True)
+        logger.error(f"[API ERROR] /export/{dataset}: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao buscar finanças: {str(e)[:100]}",
+            detail=f"Erro ao exportar: {str(e)[:100]}",
         )
+
+    logger.info(f"[API] /export/{dataset}: format={fmt}, columns={columns or '*'}, filtros={bool(params)}")
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{fmt}"'},
+    )
@@ -0,0 +1,239 @@
+"""
+Métricas da API no formato texto do Prometheus (`GET /metrics`).
+
+Contadores e histogramas com buckets fixos, baratos o bastante para ficarem
+sempre ligados: cada thread incrementa a própria lista de valores (sem lock
+no caminho quente) e o `/metrics` soma as listas de todas as threads na
+hora da coleta. Pool, executor e cache não têm caminho quente: seus números
+são lidos dos `stats()` existentes durante a coleta (`snapshot`).
+
+Exemplo:
+    with QueryTimer("assets") as t:
+        table = fetch_arrow(con.execute(sql, params))
+        t.rows = table.num_rows
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Iterable
+
+from .profiling import after_query
+
+# Limites (segundos) dos buckets de latência
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Shards:
+    """Vetor de valores com uma cópia por thread; `total()` soma as cópias."""
+
+    def __init__(self, width: int) -> None:
+        self.width = width
+        self._local = threading.local()
+        self._all: list[list[float]] = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> list[float]:
+        values = getattr(self._local, "values", None)
+        if values is None:
+            # Só na primeira escrita de cada thread
+            values = [0.0] * self.width
+            self._local.values = values
+            with self._lock:
+                self._all.append(values)
+        return values
+
+    def total(self) -> list[float]:
+        with self._lock:
+            shards = list(self._all)
+        return [sum(column) for column in zip(*shards)] if shards else [0.0] * self.width
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    escaped = [v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values]
+    parts = [f'{n}="{v}"' for n, v in zip(names, escaped)] + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Family:
+    """Métrica com rótulos: uma série (`_Shards`) por combinação de valores."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series: dict[tuple[str, ...], _Shards] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _width(self) -> int:
+        raise NotImplementedError
+
+    def _values(self, labels: tuple[str, ...]) -> list[float]:
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _Shards(self._width()))
+        return series.mine()
+
+    def _samples(self, labels: tuple[str, ...], total: list[float]) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, shards in series:
+            lines.extend(self._samples(labels, shards.total()))
+        return lines
+
+
+class Counter(_Family):
+    """Contador monotônico."""
+
+    kind = "counter"
+
+    def _width(self) -> int:
+        return 1
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values(labels)[0] += amount
+
+    def _samples(self, labels: tuple[str, ...], total: list[float]) -> Iterable[str]:
+        yield f"{self.name}{_labels(self.labels, labels)} {_number(total[0])}"
+
+
+class Histogram(_Family):
+    """Histograma com buckets fixos (contagens por bucket + soma)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        self.buckets = buckets
+        super().__init__(name, help, labels)
+
+    def _width(self) -> int:
+        # Um contador por bucket, um para +Inf e a soma no fim
+        return len(self.buckets) + 2
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._values(labels)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def _samples(self, labels: tuple[str, ...], total: list[float]) -> Iterable[str]:
+        cumulative = 0.0
+        for bound, count in zip((*self.buckets, float("inf")), total[:-1]):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {_number(cumulative)}"
+        yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(total[-1])}"
+        yield f"{self.name}_count{_labels(self.labels, labels)} {_number(cumulative)}"
+
+
+REGISTRY: list[_Family] = []
+
+REQUEST_LATENCY = Histogram(
+    "eleicoes_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota (até o primeiro byte em respostas streaming).",
+    ("method", "route", "status"),
+)
+QUERY_LATENCY = Histogram(
+    "eleicoes_query_duration_seconds",
+    "Tempo de execução + fetch de cada query nomeada no DuckDB.",
+    ("query",),
+)
+QUERY_ROWS = Counter(
+    "eleicoes_query_rows_total",
+    "Linhas devolvidas pelo DuckDB por query nomeada.",
+    ("query",),
+)
+SERIALIZATION_LATENCY = Histogram(
+    "eleicoes_serialization_duration_seconds",
+    "Tempo de serialização da resposta por formato.",
+    ("format",),
+)
+
+
+class Timer:
+    """Observa a duração do bloco `with` em um histograma."""
+
+    __slots__ = ("histogram", "labels", "_start")
+
+    def __init__(self, histogram: Histogram, *labels: str) -> None:
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> Timer:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self._start, *self.labels)
+
+
+class QueryTimer:
+    """
+    Duração e linhas de uma query nomeada (preencha `rows` dentro do bloco).
+
+    Com `con` e `query` (sql, params), a query também passa pelo profiling:
+    log de queries lentas e planos de `?profile=1` (ver `profiling`).
+    """
+
+    __slots__ = ("name", "rows", "con", "query", "_start")
+
+    def __init__(self, name: str, con: Any = None, query: tuple[str, list[Any]] | None = None) -> None:
+        self.name = name
+        self.rows = 0
+        self.con = con
+        self.query = query
+
+    def __enter__(self) -> QueryTimer:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self._start
+        QUERY_LATENCY.observe(elapsed, self.name)
+        QUERY_ROWS.inc(self.rows, self.name)
+        if exc_type is None and self.con is not None and self.query is not None:
+            after_query(self.name, elapsed, self.con, *self.query)
+
+
+def snapshot(
+    name: str, help: str, samples: dict[tuple[tuple[str, str], ...], float], kind: str = "gauge"
+) -> list[str]:
+    """
+    Linhas de uma métrica lida na hora da coleta.
+
+    Args:
+        samples: Rótulos (pares nome/valor) -> valor.
+        kind: "gauge" ou "counter" (contadores mantidos por outro componente).
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples.items():
+        names = tuple(k for k, _ in labels)
+        values = tuple(v for _, v in labels)
+        lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+    return lines
+
+
+def render(extra: Iterable[str] = ()) -> str:
+    """Todas as métricas registradas, mais as linhas de `snapshot` em `extra`."""
+    lines: list[str] = []
+    for family in REGISTRY:
+        lines.extend(family.render())
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,108 @@
+"""
+Paginação por keyset (cursor) para endpoints de listagem.
+
+O cursor é um token opaco (base64 de JSON) com os valores das colunas de
+ordenação da linha de referência. A próxima página é pedida com
+`WHERE (chave) > (valores)` na ordem da listagem, em vez de OFFSET, então
+páginas profundas custam o mesmo que a primeira.
+
+O campo de ordenação do cursor carrega também um resumo da busca e dos
+filtros (`cursor_context`), então um cursor só vale para a mesma consulta.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """Uma coluna da ordenação: expressão SQL e direção."""
+
+    expr: str
+    desc: bool
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Cursor decodificado: ordenação de origem, valores da chave e direção."""
+
+    order: str
+    values: list[Any]
+    direction: str  # "next" (linhas depois) ou "prev" (linhas antes)
+
+
+def cursor_context(order: str, *params: Any) -> str:
+    """
+    Ordenação mais um hash curto da busca e dos filtros ativos.
+
+    Usado como `order` em `encode_cursor`/`decode_cursor`: um cursor gerado
+    para `?q=silva` não é aceito por `?q=maria` nem por outro filtro.
+    """
+    raw = json.dumps(list(params), separators=(",", ":"), default=str)
+    return f"{order}|{hashlib.sha1(raw.encode()).hexdigest()[:12]}"
+
+
+def encode_cursor(order: str, values: Sequence[Any], direction: str) -> str:
+    """Serializa o cursor em token base64 url-safe (sem padding)."""
+    raw = json.dumps({"o": order, "k": list(values), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, order: str, n_keys: int) -> Cursor:
+    """
+    Decodifica e valida um cursor.
+
+    Raises:
+        ValueError: Se o token é inválido ou foi gerado para outra ordenação.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        cursor = Cursor(order=data["o"], values=list(data["k"]), direction=data["d"])
+    except Exception as e:
+        raise ValueError("Cursor inválido") from e
+    if cursor.order != order or len(cursor.values) != n_keys or cursor.direction not in ("next", "prev"):
+        raise ValueError("Cursor não corresponde à ordenação/busca atual")
+    return cursor
+
+
+def keyset_predicate(keys: Sequence[SortKey], values: Sequence[Any], direction: str) -> tuple[str, list[Any]]:
+    """
+    Predicado lexicográfico "linha vem depois (ou antes) da chave".
+
+    Exemplo para (total_votos DESC, nome_urna ASC, id ASC) e direção "next":
+        total_votos < ?
+        OR (total_votos = ? AND nome_urna > ?)
+        OR (total_votos = ? AND nome_urna = ? AND id > ?)
+
+    Returns:
+        (sql, params)
+    """
+    clauses = []
+    params: list[Any] = []
+    for i, key in enumerate(keys):
+        greater = key.desc if direction == "prev" else not key.desc
+        parts = [f"{k.expr} = ?" for k in keys[:i]] + [f"{key.expr} {'>' if greater else '<'} ?"]
+        params.extend(values[: i + 1])
+        clauses.append("(" + " AND ".join(parts) + ")")
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def order_by(keys: Sequence[SortKey], reverse: bool = False) -> str:
+    """Cláusula ORDER BY para as chaves (invertida para navegar para trás)."""
+    return ", ".join(f"{k.expr} {'DESC' if k.desc != reverse else 'ASC'}" for k in keys)
+
+
+def key_columns(keys: Sequence[SortKey]) -> str:
+    """Expressões da chave para anexar ao fim do SELECT (lidas por `row_key`)."""
+    return ", ".join(f"{k.expr} AS _k{i}" for i, k in enumerate(keys))
+
+
+def row_key(keys: Sequence[SortKey], row: Sequence[Any]) -> list[Any]:
+    """Valores da chave de ordenação de uma linha (últimas colunas do SELECT)."""
+    return list(row[len(row) - len(keys) :])
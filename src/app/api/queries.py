@@ -0,0 +1,323 @@
+"""
+Consultas de detalhe por candidato, em lote.
+
+Cada seção é uma query que recebe uma lista de ids e resolve todos de uma
+vez (`candidate_id IN (...)` e top-N por janela). As funções `*_query`
+devolvem `(sql, params)` com colunas já no formato da resposta (NULLs
+tratados no SQL); a primeira coluna é sempre `candidate_id`.
+
+- `fetch_table` entrega o resultado como tabela Arrow (endpoints de um
+  candidato, que respondem em JSON/Arrow/Parquet);
+- `fetch_*` agrupam por candidato em dicionários (`/candidates/batch`).
+
+As consultas de partido (`party_*`) e de município (`municipio*`) leem as
+tabelas derivadas `party_summary`, `municipios` e `votes_by_municipio`.
+
+Os `fetch_*` recebem o nome da query, usado nas métricas (tempo e linhas
+por query em `/metrics`).
+
+As funções recebem as tabelas do conjunto consultado (`Tables`, ver
+`datasets.py`) e assumem que elas existem; quem chama consulta o catálogo.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import duckdb
+import pyarrow as pa
+
+from ..datasets import Tables
+from ..etl.derived import counterparty_keys
+from .formats import fetch_arrow
+from .metrics import QueryTimer
+
+# Filtro por lista de ids (lista passada como um único parâmetro)
+IDS_FILTER = "candidate_id IN (SELECT UNNEST(?::BIGINT[]))"
+
+Query = tuple[str, list[Any]]
+
+# Tabela vazia de contrapartes (papel, nome, doc, total) para respostas Arrow/Parquet
+EMPTY_COUNTERPARTIES = pa.table(
+    {
+        "papel": pa.array([], pa.string()),
+        "nome": pa.array([], pa.string()),
+        "doc": pa.array([], pa.string()),
+        "total": pa.array([], pa.float64()),
+    }
+)
+
+
+def profiles_query(t: Tables, ids: Sequence[int]) -> Query:
+    """Linha do resumo (candidate_summary) de cada candidato."""
+    sql = f"""
+        SELECT id AS candidate_id, id, numero, nome_urna, nome_completo, partido, uf, cargo, situacao,
+               total_bens, qtd_bens, total_votos,
+               total_receitas, total_despesas, doadores_unicos, fornecedores_unicos
+        FROM {t.candidate_summary}
+        WHERE id IN (SELECT UNNEST(?::BIGINT[]))
+    """
+    return sql, [list(ids)]
+
+
+def assets_query(t: Tables, ids: Sequence[int], limit: int, offset: int = 0) -> Query:
+    """Bens de cada candidato, maiores valores primeiro (página limit/offset por candidato)."""
+    sql = f"""
+        SELECT candidate_id, tipo, descricao, valor
+        FROM (
+            SELECT
+                candidate_id,
+                COALESCE(CAST(tipo AS VARCHAR), '') AS tipo,
+                COALESCE(CAST(descricao AS VARCHAR), '') AS descricao,
+                COALESCE(CAST(valor AS DOUBLE), 0) AS valor,
+                ROW_NUMBER() OVER (PARTITION BY candidate_id ORDER BY valor DESC NULLS LAST) AS rn
+            FROM {t.assets}
+            WHERE {IDS_FILTER}
+        )
+        WHERE rn > ? AND rn <= ?
+        ORDER BY candidate_id, rn
+    """
+    return sql, [list(ids), offset, offset + limit]
+
+
+def votes_municipio_query(t: Tables, ids: Sequence[int], limit: int) -> Query:
+    """Top `limit` municípios por votos de cada candidato."""
+    sql = f"""
+        SELECT
+            candidate_id,
+            COALESCE(CAST(municipio AS VARCHAR), '') AS municipio,
+            CAST(COALESCE(votos_municipio, 0) AS BIGINT) AS votos
+        FROM {t.votes_mun}
+        WHERE {IDS_FILTER}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY candidate_id ORDER BY votos_municipio DESC) <= ?
+        ORDER BY candidate_id, votos_municipio DESC
+    """
+    return sql, [list(ids), limit]
+
+
+def finance_summary_query(t: Tables, ids: Sequence[int]) -> Query:
+    """Totais de finanças dos candidatos presentes no agregado."""
+    sql = f"""
+        SELECT
+            candidate_id,
+            CAST(COALESCE(total_receitas, 0) AS DOUBLE) AS total_receitas,
+            CAST(COALESCE(total_despesas, 0) AS DOUBLE) AS total_despesas,
+            CAST(COALESCE(doadores_unicos, 0) AS BIGINT) AS doadores_unicos,
+            CAST(COALESCE(fornecedores_unicos, 0) AS BIGINT) AS fornecedores_unicos
+        FROM {t.finance_agg}
+        WHERE {IDS_FILTER}
+    """
+    return sql, [list(ids)]
+
+
+def counterparty_tables(t: Tables, prefix: str) -> tuple[str, str]:
+    """Lançamentos e tabela pré-ranqueada de doadores (`"doador"`) ou fornecedores."""
+    if prefix == "doador":
+        return t.donations, t.top_donors
+    return t.expenses, t.top_suppliers
+
+
+def top_counterparties_query(t: Tables, prefix: str, ids: Sequence[int], top: int, ranked: bool = False) -> Query:
+    """
+    Top `top` doadores (`prefix="doador"`) ou fornecedores (`"fornecedor"`) por valor.
+
+    Com `ranked=True` recorta a tabela pré-ranqueada pelo ETL (exige
+    `top <= FINANCE_TOP_N`); senão agrega os lançamentos na hora. Os dois
+    caminhos dão o mesmo resultado.
+    """
+    source, ranked_table = counterparty_tables(t, prefix)
+    if ranked:
+        sql = f"""
+            SELECT candidate_id, nome, doc, CAST(total AS DOUBLE) AS total
+            FROM {ranked_table}
+            WHERE {IDS_FILTER} AND rank <= ?
+            ORDER BY candidate_id, rank
+        """
+    else:
+        nome, doc = counterparty_keys(prefix)
+        sql = f"""
+            SELECT candidate_id, nome, doc, total
+            FROM (
+                SELECT candidate_id, {nome} AS nome, {doc} AS doc, CAST(SUM(COALESCE(valor,0)) AS DOUBLE) AS total
+                FROM {source}
+                WHERE {IDS_FILTER}
+                GROUP BY 1,2,3
+            )
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY candidate_id ORDER BY total DESC, doc, nome) <= ?
+            ORDER BY candidate_id, total DESC, doc, nome
+        """
+    return sql, [list(ids), top]
+
+
+PARTY_COLUMNS = """
+    partido, candidatos, eleitos, total_votos, pct_votos,
+    total_receitas, total_despesas, total_bens
+"""
+
+
+def parties_query(t: Tables) -> Query:
+    """Totais de todos os partidos, mais votados primeiro."""
+    sql = f"""
+        SELECT rank_votos, {PARTY_COLUMNS}
+        FROM {t.party_summary}
+        WHERE dimensao = 'total'
+        ORDER BY rank_votos
+    """
+    return sql, []
+
+
+def party_query(t: Tables, sigla: str) -> Query:
+    """Linhas do cubo de um partido: total e quebras (`dimensao`, `valor`)."""
+    sql = f"""
+        SELECT dimensao, valor, rank_votos, {PARTY_COLUMNS}
+        FROM {t.party_summary}
+        WHERE upper(partido) = upper(?)
+        ORDER BY dimensao <> 'total', dimensao, total_votos DESC, valor
+    """
+    return sql, [sigla]
+
+
+def party_candidates_query(t: Tables, sigla: str, limit: int) -> Query:
+    """Candidatos mais votados de um partido (resumo)."""
+    sql = f"""
+        SELECT id, numero, nome_urna, situacao, eleito, total_votos, total_receitas, total_despesas, total_bens
+        FROM {t.candidate_summary}
+        WHERE upper(partido) = upper(?)
+        ORDER BY rank_votos
+        LIMIT ?
+    """
+    return sql, [sigla, limit]
+
+
+MUNICIPIO_COLUMNS = """
+    cd_municipio, municipio, total_votos, candidatos,
+    lider_id, lider_nome, lider_partido, lider_pct_votos
+"""
+
+
+def municipios_query(t: Tables) -> Query:
+    """Todos os municípios com total de votos e candidato mais votado."""
+    sql = f"SELECT {MUNICIPIO_COLUMNS} FROM {t.municipios} ORDER BY cd_municipio"
+    return sql, []
+
+
+def municipio_query(t: Tables, cd_municipio: int) -> Query:
+    """Linha de um município."""
+    sql = f"SELECT {MUNICIPIO_COLUMNS} FROM {t.municipios} WHERE cd_municipio = ?"
+    return sql, [cd_municipio]
+
+
+def municipio_candidates_query(t: Tables, cd_municipio: int, limit: int, offset: int = 0) -> Query:
+    """Candidatos de um município por rank de votos (página limit/offset pelo rank)."""
+    sql = f"""
+        SELECT rank, candidate_id AS id, nome_urna, partido, votos, pct_votos
+        FROM {t.municipio_votes}
+        WHERE cd_municipio = ? AND rank > ? AND rank <= ?
+        ORDER BY rank
+    """
+    return sql, [cd_municipio, offset, offset + limit]
+
+
+def votes_zona_query(t: Tables, ids: Sequence[int], limit: int, cd_municipio: int | None = None) -> Query:
+    """
+    Top `limit` zonas eleitorais por votos de cada candidato.
+
+    `pct_zona` é a fatia do candidato nos votos da zona e `pct_candidato`,
+    a fatia da zona nos votos do candidato (no município, se `cd_municipio`).
+    """
+    municipio_filter = "AND v.cd_municipio = ?" if cd_municipio is not None else ""
+    sql = f"""
+        WITH v AS (
+            SELECT candidate_id, cd_municipio, zona, SUM(COALESCE(votos, 0)) AS votos
+            FROM {t.votes_munzona} v
+            WHERE {IDS_FILTER} {municipio_filter}
+            GROUP BY 1, 2, 3
+        )
+        SELECT
+            v.candidate_id,
+            v.cd_municipio,
+            z.municipio,
+            v.zona,
+            CAST(v.votos AS BIGINT) AS votos,
+            COALESCE(v.votos / NULLIF(z.total_votos, 0), 0) AS pct_zona,
+            COALESCE(v.votos / NULLIF(SUM(v.votos) OVER (PARTITION BY v.candidate_id), 0), 0) AS pct_candidato
+        FROM v
+        JOIN {t.votes_zona} z ON z.cd_municipio = v.cd_municipio AND z.zona = v.zona
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY v.candidate_id ORDER BY v.votos DESC, v.cd_municipio, v.zona) <= ?
+        ORDER BY v.candidate_id, v.votos DESC, v.cd_municipio, v.zona
+    """
+    params: list[Any] = [list(ids)] + ([cd_municipio] if cd_municipio is not None else []) + [limit]
+    return sql, params
+
+
+def municipio_zonas_query(t: Tables, cd_municipio: int) -> Query:
+    """Zonas de um município com total de votos e mais votado."""
+    sql = f"""
+        SELECT zona, total_votos, candidatos, lider_id, lider_nome, lider_partido, lider_pct_votos
+        FROM {t.votes_zona}
+        WHERE cd_municipio = ?
+        ORDER BY zona
+    """
+    return sql, [cd_municipio]
+
+
+def fetch_table(con: duckdb.DuckDBPyConnection, query: Query, name: str) -> pa.Table:
+    """Resultado da query como tabela Arrow, sem a coluna `candidate_id` (se houver)."""
+    with QueryTimer(name, con, query) as timer:
+        table = fetch_arrow(con.execute(*query))
+        timer.rows = table.num_rows
+    if "candidate_id" in table.column_names:
+        table = table.drop_columns(["candidate_id"])
+    return table
+
+
+def _rows(con: duckdb.DuckDBPyConnection, query: Query, name: str) -> tuple[list[str], list[tuple]]:
+    with QueryTimer(name, con, query) as timer:
+        cur = con.execute(*query)
+        rows = cur.fetchall()
+        timer.rows = len(rows)
+    return [d[0] for d in cur.description], rows
+
+
+def fetch_grouped(
+    con: duckdb.DuckDBPyConnection, query: Query, ids: Sequence[int], name: str
+) -> dict[int, list[dict[str, Any]]]:
+    """Linhas agrupadas por candidato (lista vazia para ids sem linhas)."""
+    columns, rows = _rows(con, query, name)
+    out: dict[int, list[dict[str, Any]]] = {int(i): [] for i in ids}
+    for r in rows:
+        out[int(r[0])].append(dict(zip(columns[1:], r[1:])))
+    return out
+
+
+def fetch_one_per_id(con: duckdb.DuckDBPyConnection, query: Query, name: str) -> dict[int, dict[str, Any]]:
+    """Uma linha por candidato encontrado."""
+    columns, rows = _rows(con, query, name)
+    return {int(r[0]): dict(zip(columns[1:], r[1:])) for r in rows}
+
+
+def fetch_profiles(con: duckdb.DuckDBPyConnection, t: Tables, ids: Sequence[int]) -> dict[int, dict[str, Any]]:
+    """Perfil (linha do resumo) por candidato."""
+    return fetch_one_per_id(con, profiles_query(t, ids), "profiles")
+
+
+def fetch_assets(
+    con: duckdb.DuckDBPyConnection, t: Tables, ids: Sequence[int], limit: int, offset: int = 0
+) -> dict[int, list[dict[str, Any]]]:
+    """Bens por candidato (ver `assets_query`)."""
+    return fetch_grouped(con, assets_query(t, ids, limit, offset), ids, "assets")
+
+
+def fetch_votes_municipio(
+    con: duckdb.DuckDBPyConnection, t: Tables, ids: Sequence[int], limit: int
+) -> dict[int, list[dict[str, Any]]]:
+    """Votos por município por candidato (ver `votes_municipio_query`)."""
+    return fetch_grouped(con, votes_municipio_query(t, ids, limit), ids, "votes_municipio")
+
+
+def fetch_finance_summary(
+    con: duckdb.DuckDBPyConnection, t: Tables, ids: Sequence[int]
+) -> dict[int, dict[str, Any]]:
+    """Totais de finanças por candidato presente no agregado."""
+    return fetch_one_per_id(con, finance_summary_query(t, ids), "finance_summary")
+
@@ -3,13 +3,16 @@ Autenticação e autorização para FastAPI.
 
 Se API_KEY está vazia, endpoints são públicos.
 Caso contrário, requer header Authorization: Bearer <API_KEY>.
+
+Recursos de diagnóstico (ex.: `?profile=1`) exigem Bearer <ADMIN_API_KEY>
+e ficam desligados se ADMIN_API_KEY está vazia.
 """
 
 from __future__ import annotations
 
 from fastapi import Header, HTTPException, status
 
-from .config import API_KEY
+from .config import ADMIN_API_KEY, API_KEY
 
 
 def check_api_key(authorization: str | None = Header(None)) -> None:
@@ -26,6 +29,37 @@ def check_api_key(authorization: str | None = Header(None)) -> None:
         # API pública: sem autenticação necessária
         return
     
+    token = _bearer_token(authorization)
+    # O token de administrador também dá acesso aos endpoints protegidos
+    if token != API_KEY and not (ADMIN_API_KEY and token == ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token inválido",
+        )
+
+
+def check_admin_key(authorization: str | None = Header(None)) -> None:
+    """
+    Valida o token de administrador.
+
+    Raises:
+        HTTPException: 403 se ADMIN_API_KEY não está definida ou o token
+            não confere; 401 se o header está ausente ou malformado.
+    """
+    if not ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Recurso de administrador desabilitado (defina ELEICOES_ADMIN_KEY)",
+        )
+    if _bearer_token(authorization) != ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token de administrador inválido",
+        )
+
+
+def _bearer_token(authorization: str | None) -> str:
+    """Token do header `Authorization: Bearer <token>`."""
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,10 +72,4 @@ def check_api_key(authorization: str | None = Header(None)) -> None:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Formato inválido. Use: Authorization: Bearer <token>",
         )
-    
-    token = parts[1]
-    if token != API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Token inválido",
-        )
+    return parts[1]
@@ -29,6 +29,20 @@ UF = os.getenv("ELEICOES_UF", "SP")  # São Paulo
 CARGO_LIKE = os.getenv("ELEICOES_CARGO", "DEPUTADO FEDERAL")
 ANO = 2022
 
+"""
+Cargos servidos pela API: código usado nos nomes de tabela e nos parâmetros
+(`?cargo=dep_est`) -> prefixo de DS_CARGO nos arquivos do TSE.
+"""
+CARGOS = {
+    "dep_fed": "DEPUTADO FEDERAL",
+    "dep_est": "DEPUTADO ESTADUAL",
+    "dep_dist": "DEPUTADO DISTRITAL",
+    "senador": "SENADOR",
+    "governador": "GOVERNADOR",
+    "presidente": "PRESIDENTE",
+}
+CARGO = next((k for k, v in CARGOS.items() if v == CARGO_LIKE.upper()), "dep_fed")
+
 # ===== Autenticação (CUSTOMIZÁVEL) =====
 """
 Se vazio, API é pública. Defina uma chave para proteger endpoints.
@@ -36,6 +50,12 @@ Exemplo: ELEICOES_API_KEY="seu-secreto-aqui"
 """
 API_KEY = os.getenv("ELEICOES_API_KEY", "")
 
+"""
+Chave de administrador para recursos de diagnóstico (ex.: `?profile=1`).
+Se vazia, esses recursos ficam desligados.
+"""
+ADMIN_API_KEY = os.getenv("ELEICOES_ADMIN_KEY", "")
+
 # ===== URLs externas =====
 """
 URL base para download de dados do TSE.
@@ -49,18 +69,59 @@ TTL (time-to-live) para cache no Streamlit (segundos).
 STREAMLIT_CACHE_TTL_SHORT = 15  # queries de busca (mutáveis)
 STREAMLIT_CACHE_TTL_LONG = 120   # dados agregados (estáticos)
 
+"""
+Similaridade mínima (fração de trigramas em comum) para a busca aproximada
+de nomes em /candidates e no MCP. Substrings exatas sempre entram; a busca
+aproximada só roda quando há menos de SEARCH_FUZZY_BELOW resultados exatos.
+"""
+SEARCH_MIN_SIMILARITY = 0.6
+SEARCH_FUZZY_BELOW = 50
+
+"""
+Índices de busca mantidos em memória por worker (um por conjunto de dados,
+poucos MB cada), independente de quantos bancos ficam anexados.
+"""
+SEARCH_INDEX_MAX = int(os.getenv("ELEICOES_SEARCH_INDEX_MAX", "32"))
+
+"""
+Máximo de itens por página em /candidates (`limit`).
+"""
+CANDIDATES_MAX_LIMIT = 1000
+
+"""
+Máximo de ids por chamada de /candidates/batch.
+"""
+BATCH_MAX_IDS = 200
+
 # ===== Tabelas DuckDB (CUSTOMIZÁVEIS) =====
 """
-Nomes das tabelas no banco. Se trocar UF/CARGO, ajuste aqui.
+Nomes das tabelas no banco: `<prefixo>_<uf>_<cargo>_<ano>` (ver `table_name`).
+Estes são os do conjunto padrão (UF/CARGO/ANO); os demais conjuntos de dados
+servidos pela API usam o mesmo padrão (ver `src/app/datasets.py`).
 """
-CANDIDATE_TABLE = f"candidates_{UF.lower()}_dep_fed_{ANO}"
-ASSETS_AGG_TABLE = f"assets_agg_{UF.lower()}_dep_fed_{ANO}"
-ASSETS_TABLE = f"assets_{UF.lower()}_dep_fed_{ANO}"
-VOTES_AGG_TABLE = f"votes_agg_{UF.lower()}_dep_fed_{ANO}"
-VOTES_MUN_TABLE = f"votes_municipio_agg_{UF.lower()}_dep_fed_{ANO}"
-DONATIONS_TABLE = f"donations_{UF.lower()}_dep_fed_{ANO}"
-EXPENSES_TABLE = f"expenses_{UF.lower()}_dep_fed_{ANO}"
-FINANCE_AGG_TABLE = f"finance_agg_{UF.lower()}_dep_fed_{ANO}"
+
+
+def table_name(prefix: str, uf: str = UF, cargo: str = CARGO, ano: int = ANO) -> str:
+    """Nome da tabela `prefix` do conjunto (ano, uf, cargo)."""
+    return f"{prefix}_{uf.lower()}_{cargo}_{ano}"
+
+
+CANDIDATE_TABLE = table_name("candidates")
+ASSETS_AGG_TABLE = table_name("assets_agg")
+ASSETS_TABLE = table_name("assets")
+VOTES_AGG_TABLE = table_name("votes_agg")
+VOTES_MUN_TABLE = table_name("votes_municipio_agg")
+VOTES_MUNZONA_TABLE = table_name("votes_munzona")
+DONATIONS_TABLE = table_name("donations")
+EXPENSES_TABLE = table_name("expenses")
+FINANCE_AGG_TABLE = table_name("finance_agg")
+CANDIDATE_SUMMARY_TABLE = table_name("candidate_summary")
+TOP_DONORS_TABLE = table_name("top_donors")
+TOP_SUPPLIERS_TABLE = table_name("top_suppliers")
+PARTY_SUMMARY_TABLE = table_name("party_summary")
+MUNICIPIOS_TABLE = table_name("municipios")
+MUNICIPIO_VOTES_TABLE = table_name("votes_by_municipio")
+VOTES_ZONA_TABLE = table_name("votes_zona")
 
 
 def get_env_bool(key: str, default: bool = False) -> bool:
@@ -79,3 +140,105 @@ def get_env_int(key: str, default: int) -> int:
         return int(os.getenv(key, str(default)))
     except ValueError:
         return default
+
+
+# ===== Pool de conexões (CUSTOMIZÁVEL) =====
+"""
+Pool de cursores read-only usado pela API e pelo servidor MCP.
+Cada worker mantém um único handle do banco e entrega um cursor por requisição.
+"""
+DB_POOL_SIZE = get_env_int("ELEICOES_DB_POOL_SIZE", 8)
+DB_POOL_TIMEOUT = get_env_int("ELEICOES_DB_POOL_TIMEOUT", 10)  # segundos aguardando cursor livre
+
+
+# ===== Versões do banco (CUSTOMIZÁVEL) =====
+"""
+Os ETLs gravam cada atualização num arquivo novo (`eleicoes.<data>.duckdb`)
+e publicam trocando o ponteiro `eleicoes.current`. A API confere o ponteiro
+a cada DB_SWAP_CHECK segundos e troca de arquivo sem reiniciar.
+"""
+DB_SWAP_CHECK = get_env_int("ELEICOES_DB_SWAP_CHECK", 1)  # segundos entre leituras do ponteiro
+DB_KEEP_VERSIONS = get_env_int("ELEICOES_DB_KEEP_VERSIONS", 3)  # versões mantidas em disco
+
+
+# ===== Orquestrador dos ETLs (CUSTOMIZÁVEL) =====
+"""
+`python -m src.app.etl.pipeline` roda os estágios independentes em paralelo,
+cada um num banco de staging em ETL_STAGING_DIR, e junta tudo numa versão.
+"""
+ETL_WORKERS = get_env_int("ELEICOES_ETL_WORKERS", 3)  # estágios simultâneos
+ETL_STAGING_DIR = Path(os.getenv("ELEICOES_ETL_STAGING_DIR", str(BASE_DIR / "db" / "staging")))
+
+"""
+Cada arquivo baixado do TSE é convertido uma vez em Parquet tipado
+(particionado por UF e cargo) em PARQUET_CACHE_DIR/<arquivo>/<sha256>-<schema>/;
+os ETLs leem dali. Um arquivo novo (outro hash) ou um schema alterado em
+`etl/tse_schema.py` gera outra conversão. De cada arquivo ficam as
+PARQUET_CACHE_KEEP pastas usadas mais recentemente; as outras são apagadas.
+"""
+PARQUET_CACHE_DIR = Path(os.getenv("ELEICOES_PARQUET_CACHE_DIR", str(BASE_DIR / "data" / "parquet")))
+PARQUET_CACHE_KEEP = get_env_int("ELEICOES_PARQUET_CACHE_KEEP", 3)
+
+
+# ===== Conjuntos de dados (CUSTOMIZÁVEL) =====
+"""
+Além do conjunto padrão (UF/CARGO/ANO), a API serve qualquer (ano, uf, cargo)
+cujas tabelas estejam no banco principal ou num arquivo próprio em
+DATASETS_DIR (`<ano>_<uf>_<cargo>.duckdb`, com versões como o principal).
+Os arquivos são anexados (ATTACH) sob demanda; acima de DATASETS_MAX_ATTACHED
+por worker, o menos usado recentemente é desanexado.
+"""
+DATASETS_DIR = Path(os.getenv("ELEICOES_DATASETS_DIR", str(BASE_DIR / "db" / "datasets")))
+DATASETS_MAX_ATTACHED = get_env_int("ELEICOES_DATASETS_MAX_ATTACHED", 8)
+
+
+# ===== Finanças (CUSTOMIZÁVEL) =====
+"""
+Quantos doadores/fornecedores por candidato são pré-ranqueados pelo ETL.
+`/finance?top=N` com N acima disso cai na agregação sob demanda.
+"""
+FINANCE_TOP_N = get_env_int("ELEICOES_FINANCE_TOP_N", 50)
+
+
+# ===== Cache de respostas (CUSTOMIZÁVEL) =====
+"""
+Cache LRU em memória das respostas GET da API, invalidado quando o arquivo
+do banco muda (ETL). Limite em MB por worker; 0 desliga o cache.
+"""
+RESPONSE_CACHE_MB = get_env_int("ELEICOES_CACHE_MB", 64)
+
+
+# ===== Exportação (CUSTOMIZÁVEL) =====
+"""
+Linhas por record batch lido do DuckDB em /export. Cada batch é escrito na
+resposta assim que chega, então a memória do worker fica em ~1 batch.
+"""
+EXPORT_BATCH_ROWS = get_env_int("ELEICOES_EXPORT_BATCH_ROWS", 50_000)
+
+
+# ===== Executor de queries (CUSTOMIZÁVEL) =====
+"""
+Threads dedicadas às queries da API, separadas por classe de custo: consultas
+leves (listagem, bens, votos) não ficam presas atrás das pesadas (finanças,
+lote). Além de `*_QUEUE` pedidos aguardando, a API responde 503 na hora; uma
+query que passa de `QUERY_TIMEOUT_*` segundos é interrompida (504).
+DB_POOL_SIZE deve ser >= EXECUTOR_WORKERS_LIGHT + EXECUTOR_WORKERS_HEAVY.
+"""
+EXECUTOR_WORKERS_LIGHT = get_env_int("ELEICOES_EXECUTOR_WORKERS_LIGHT", 4)
+EXECUTOR_WORKERS_HEAVY = get_env_int("ELEICOES_EXECUTOR_WORKERS_HEAVY", 2)
+EXECUTOR_QUEUE_LIGHT = get_env_int("ELEICOES_EXECUTOR_QUEUE_LIGHT", 64)
+EXECUTOR_QUEUE_HEAVY = get_env_int("ELEICOES_EXECUTOR_QUEUE_HEAVY", 16)
+QUERY_TIMEOUT_LIGHT = get_env_int("ELEICOES_QUERY_TIMEOUT_LIGHT", 5)
+QUERY_TIMEOUT_HEAVY = get_env_int("ELEICOES_QUERY_TIMEOUT_HEAVY", 20)
+
+
+# ===== Log de queries lentas (CUSTOMIZÁVEL) =====
+"""
+Queries da API acima de SLOW_QUERY_MS (0 desliga) são re-executadas com
+EXPLAIN ANALYZE em segundo plano e gravadas, com plano, tempos e parâmetros,
+em um log JSON (uma linha por query) rotacionado por tamanho.
+"""
+SLOW_QUERY_MS = get_env_int("ELEICOES_SLOW_QUERY_MS", 500)
+SLOW_QUERY_LOG = Path(os.getenv("ELEICOES_SLOW_QUERY_LOG", str(BASE_DIR / "logs" / "slow_queries.jsonl")))
+SLOW_QUERY_LOG_MB = get_env_int("ELEICOES_SLOW_QUERY_LOG_MB", 10)
+SLOW_QUERY_LOG_BACKUPS = get_env_int("ELEICOES_SLOW_QUERY_LOG_BACKUPS", 5)
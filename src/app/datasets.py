@@ -0,0 +1,258 @@
+"""
+Conjuntos de dados (ano, uf, cargo) servidos pela API.
+
+Todo conjunto tem as mesmas tabelas (`candidates_*`, `candidate_summary_*`,
+...) com o sufixo `<uf>_<cargo>_<ano>` (`config.table_name`). Elas ficam no
+banco principal ou num arquivo próprio em DATASETS_DIR
+(`2022_mg_dep_est.duckdb`), que o pool anexa ao handle do banco (ATTACH
+READ_ONLY) na primeira consulta e desanexa por LRU: a memória acompanha os
+conjuntos em uso, não a quantidade de arquivos (ver `ConnectionPool.cursor`).
+
+Exemplo:
+    ds = get_registry().resolve(ano=2022, uf="MG", cargo="dep_est")
+    ds.tables.candidate_summary  # 'ds_2022_mg_dep_est.candidate_summary_mg_dep_est_2022'
+    with get_pool().cursor(ds) as con:
+        con.execute(f"SELECT COUNT(*) FROM {ds.tables.candidate_summary}")
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Iterator
+
+from . import config
+from .config import CARGOS, DATASETS_DIR, DB_PATH, table_name
+from .db import SchemaCatalog, dataset_version, get_catalog, get_pool, resolve_db_path
+
+# Campo de `Tables` -> prefixo do nome da tabela
+TABLE_PREFIXES = {
+    "candidate": "candidates",
+    "assets": "assets",
+    "assets_agg": "assets_agg",
+    "votes_munzona": "votes_munzona",
+    "votes_agg": "votes_agg",
+    "votes_mun": "votes_municipio_agg",
+    "donations": "donations",
+    "expenses": "expenses",
+    "finance_agg": "finance_agg",
+    "candidate_summary": "candidate_summary",
+    "top_donors": "top_donors",
+    "top_suppliers": "top_suppliers",
+    "party_summary": "party_summary",
+    "municipios": "municipios",
+    "municipio_votes": "votes_by_municipio",
+    "votes_zona": "votes_zona",
+}
+
+_FILE_NAME = re.compile(r"^(\d{4})_([a-z]{2})_([a-z_]+)$")
+_CANDIDATE_TABLE = re.compile(r"^candidates_([a-z]{2})_([a-z_]+)_(\d{4})$")
+
+# Conjunto da consulta em execução (usado pelo log de queries lentas)
+_current: ContextVar[Dataset | None] = ContextVar("eleicoes_dataset", default=None)
+
+
+class DatasetNotFound(LookupError):
+    """Nenhum banco tem as tabelas do (ano, uf, cargo) pedido."""
+
+
+@dataclass(frozen=True)
+class Tables:
+    """Nomes (qualificados, se o conjunto está num arquivo anexado) das tabelas de um conjunto."""
+
+    candidate: str
+    assets: str
+    assets_agg: str
+    votes_munzona: str
+    votes_agg: str
+    votes_mun: str
+    donations: str
+    expenses: str
+    finance_agg: str
+    candidate_summary: str
+    top_donors: str
+    top_suppliers: str
+    party_summary: str
+    municipios: str
+    municipio_votes: str
+    votes_zona: str
+
+    @classmethod
+    def of(cls, ano: int, uf: str, cargo: str, database: str | None = None) -> Tables:
+        qualify = f"{database}." if database else ""
+        return cls(**{f.name: qualify + table_name(TABLE_PREFIXES[f.name], uf, cargo, ano) for f in fields(cls)})
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+    Um conjunto (ano, uf, cargo).
+
+    `path` é o arquivo próprio do conjunto (lógico: a versão publicada vem do
+    ponteiro, como no banco principal); None quando as tabelas estão no
+    banco principal.
+    """
+
+    ano: int
+    uf: str
+    cargo: str
+    path: Path | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.ano}/{self.uf}/{self.cargo}"
+
+    @property
+    def cargo_like(self) -> str:
+        """Prefixo de DS_CARGO nos arquivos do TSE (ex.: 'DEPUTADO FEDERAL')."""
+        return CARGOS[self.cargo]
+
+    @property
+    def alias(self) -> str | None:
+        """Nome do banco anexado (ATTACH ... AS alias), ou None no banco principal."""
+        return f"ds_{self.ano}_{self.uf}_{self.cargo}" if self.path is not None else None
+
+    @property
+    def file(self) -> Path | None:
+        """Arquivo da versão publicada do conjunto."""
+        return resolve_db_path(self.path) if self.path is not None else None
+
+    @cached_property
+    def tables(self) -> Tables:
+        return Tables.of(self.ano, self.uf, self.cargo, self.alias)
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "ano": self.ano,
+            "uf": self.uf.upper(),
+            "cargo": self.cargo,
+            "descricao": self.cargo_like,
+            "arquivo": self.file.name if self.file is not None else None,
+        }
+
+
+def default_dataset() -> Dataset:
+    """Conjunto padrão: ELEICOES_UF/ELEICOES_CARGO e ANO do config."""
+    return Dataset(config.ANO, config.UF.lower(), config.CARGO)
+
+
+def dataset_db_path(dataset: Dataset, db_path: Path = DB_PATH, datasets_dir: Path = DATASETS_DIR) -> Path:
+    """
+    Banco (lógico, ver `resolve_db_path`) onde os ETLs gravam o conjunto: o
+    principal para o conjunto padrão, senão `datasets_dir/<ano>_<uf>_<cargo>.duckdb`,
+    que é onde `DatasetRegistry` procura.
+    """
+    if dataset.key == default_dataset().key:
+        return Path(db_path)
+    return Path(datasets_dir) / f"{dataset.ano}_{dataset.uf}_{dataset.cargo}.duckdb"
+
+
+def current_dataset() -> Dataset | None:
+    """Conjunto da consulta em execução nesta thread (ver `using`)."""
+    return _current.get()
+
+
+@contextmanager
+def using(dataset: Dataset | None) -> Iterator[None]:
+    """Marca o conjunto da consulta em execução durante o bloco `with`."""
+    token = _current.set(dataset)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class DatasetRegistry:
+    """
+    Resolve (ano, uf, cargo) para o banco onde as tabelas estão.
+
+    Ordem: banco principal (se tem `candidates_<uf>_<cargo>_<ano>`, e
+    sempre para o conjunto padrão), depois `DATASETS_DIR/<ano>_<uf>_<cargo>.duckdb`.
+    """
+
+    def __init__(self, datasets_dir: Path = DATASETS_DIR) -> None:
+        self.datasets_dir = Path(datasets_dir)
+        self.default = default_dataset()
+        self._catalogs: dict[str, SchemaCatalog] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, ano: int | None = None, uf: str | None = None, cargo: str | None = None) -> Dataset:
+        """
+        Conjunto pedido (parâmetros ausentes assumem o padrão).
+
+        Raises:
+            DatasetNotFound: Cargo/UF inválidos ou conjunto sem banco.
+        """
+        ano = self.default.ano if ano is None else int(ano)
+        uf = (uf or self.default.uf).strip().lower()
+        cargo = (cargo or self.default.cargo).strip().lower()
+        if cargo not in CARGOS:
+            raise DatasetNotFound(f"Cargo desconhecido: '{cargo}'. Use: {', '.join(CARGOS)}")
+        if len(uf) != 2 or not uf.isalpha():
+            raise DatasetNotFound(f"UF inválida: '{uf.upper()}'")
+
+        main = Dataset(ano, uf, cargo)
+        if main == self.default or get_catalog().has(main.tables.candidate):
+            return main
+        path = self.datasets_dir / f"{ano}_{uf}_{cargo}.duckdb"
+        if resolve_db_path(path).exists():
+            return Dataset(ano, uf, cargo, path)
+        raise DatasetNotFound(f"Conjunto {ano}/{uf.upper()}/{cargo} não encontrado")
+
+    def catalog(self, dataset: Dataset) -> SchemaCatalog:
+        """Catálogo de schema do banco onde o conjunto está."""
+        if dataset.alias is None:
+            return get_catalog()
+        catalog = self._catalogs.get(dataset.alias)
+        if catalog is None:
+            with self._lock:
+                catalog = self._catalogs.setdefault(dataset.alias, SchemaCatalog(dataset=dataset))
+        return catalog
+
+    def version(self, dataset: Dataset) -> str | None:
+        """Versão dos dados do conjunto (chave de cache/ETag)."""
+        main = dataset_version(get_pool().active_path)
+        if dataset.alias is None or main is None:
+            return main
+        own = dataset_version(dataset.file)
+        return f"{main}.{own}" if own is not None else None
+
+    def available(self) -> list[Dataset]:
+        """Conjuntos com tabelas no banco principal e arquivos em DATASETS_DIR."""
+        found: dict[str, Dataset] = {}
+        for name in get_catalog().tables:
+            m = _CANDIDATE_TABLE.match(name)
+            if m and m.group(2) in CARGOS:
+                ds = Dataset(int(m.group(3)), m.group(1), m.group(2))
+                found[ds.key] = ds
+        if self.datasets_dir.is_dir():
+            for path in sorted(self.datasets_dir.glob("*.duckdb")):
+                m = _FILE_NAME.match(path.stem)
+                if m and m.group(3) in CARGOS:
+                    ds = Dataset(int(m.group(1)), m.group(2), m.group(3), path)
+                    found.setdefault(ds.key, ds)
+            for pointer in sorted(self.datasets_dir.glob("*.current")):
+                m = _FILE_NAME.match(pointer.stem)
+                if m and m.group(3) in CARGOS:
+                    ds = Dataset(int(m.group(1)), m.group(2), m.group(3), pointer.with_suffix(".duckdb"))
+                    found.setdefault(ds.key, ds)
+        return sorted(found.values(), key=lambda d: (-d.ano, d.uf, d.cargo))
+
+
+_registry: DatasetRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DatasetRegistry:
+    """Registro de conjuntos do processo atual."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DatasetRegistry()
+    return _registry
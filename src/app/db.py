@@ -4,16 +4,54 @@ Utilitários para gerenciar conexão e índices no DuckDB.
 
 from __future__ import annotations
 
-from typing import Any
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
 
 import duckdb
 
-from .config import DB_PATH
+from .config import (
+    ASSETS_AGG_TABLE,
+    DATASETS_MAX_ATTACHED,
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_SWAP_CHECK,
+    FINANCE_AGG_TABLE,
+    VOTES_AGG_TABLE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def pointer_path(db_path: Path = DB_PATH) -> Path:
+    """Arquivo ponteiro da versão publicada (`db/eleicoes.current`)."""
+    return db_path.with_suffix(".current")
+
+
+def resolve_db_path(db_path: Path = DB_PATH) -> Path:
+    """
+    Arquivo do banco em uso: a versão apontada por `eleicoes.current`.
+
+    Sem ponteiro (bancos anteriores às versões), devolve o próprio `db_path`.
+    O ponteiro guarda só o nome do arquivo, relativo à pasta do banco.
+    """
+    db_path = Path(db_path)
+    try:
+        name = pointer_path(db_path).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return db_path
+    return db_path.parent / name if name else db_path
 
 
 def open_db(read_only: bool = True) -> duckdb.DuckDBPyConnection:
     """
-    Abre conexão com DuckDB.
+    Abre conexão com DuckDB (na versão publicada).
     
     Args:
         read_only: Se True, abre em modo read-only (mais rápido).
@@ -21,7 +59,389 @@ def open_db(read_only: bool = True) -> duckdb.DuckDBPyConnection:
     Returns:
         Conexão DuckDB.
     """
-    return duckdb.connect(str(DB_PATH), read_only=read_only)
+    return duckdb.connect(str(resolve_db_path(DB_PATH)), read_only=read_only)
+
+
+class PoolExhausted(RuntimeError):
+    """Nenhum cursor livre dentro do tempo limite do pool."""
+
+
+class _Attached:
+    """Arquivo de conjunto anexado a um handle e quantos cursores o usam."""
+
+    __slots__ = ("path", "users")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.users = 0
+
+
+class _Handle:
+    """Handle read-only de uma versão do banco e quantos cursores o usam."""
+
+    __slots__ = ("path", "con", "users", "attached")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.con = duckdb.connect(str(path), read_only=True)
+        self.users = 0
+        # alias -> arquivo anexado, do menos para o mais usado recentemente
+        self.attached: OrderedDict[str, _Attached] = OrderedDict()
+
+
+class ConnectionPool:
+    """
+    Pool read-only de cursores DuckDB (um por worker).
+
+    Mantém um único handle do banco aberto durante a vida do processo e
+    entrega um cursor por requisição via `cursor()`. O número de cursores
+    simultâneos é limitado por `size`; quem passar do limite espera até
+    `timeout` segundos e então recebe `PoolExhausted`.
+
+    Troca de versão: a cada `swap_check` segundos o pool relê o ponteiro
+    (`resolve_db_path`). Se um ETL publicou outro arquivo, os próximos
+    cursores saem de um handle novo; o antigo fica "drenando" e é fechado
+    quando o último cursor emprestado dele volta. Nenhuma requisição falha
+    nem precisa de restart.
+
+    Conjuntos em arquivo próprio (`cursor(dataset)`, ver `datasets.py`) são
+    anexados ao handle (ATTACH READ_ONLY) no primeiro uso. Acima de
+    `max_attached` o menos usado recentemente, sem cursores, é desanexado.
+
+    Exemplo:
+        pool = ConnectionPool()
+        with pool.cursor() as con:
+            con.execute("SELECT 1").fetchone()
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DB_PATH,
+        size: int = DB_POOL_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+        swap_check: float = DB_SWAP_CHECK,
+        max_attached: int = DATASETS_MAX_ATTACHED,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.swap_check = swap_check
+        self.swaps = 0
+        self.max_attached = max(1, int(max_attached))
+        self.evictions = 0
+        self._handle: _Handle | None = None
+        self._draining: list[_Handle] = []
+        self._resolved: Path | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._in_use = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._handle is not None
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def draining(self) -> int:
+        """Handles de versões antigas esperando os cursores emprestados voltarem."""
+        return len(self._draining)
+
+    @property
+    def active_path(self) -> Path:
+        """Arquivo da versão publicada (relê o ponteiro no máximo a cada `swap_check`)."""
+        now = time.monotonic()
+        if self._resolved is None or now - self._checked_at >= self.swap_check:
+            self._resolved = resolve_db_path(self.db_path)
+            self._checked_at = now
+        return self._resolved
+
+    def _current(self) -> _Handle:
+        """Handle da versão publicada, trocando de arquivo se preciso (com `_lock`)."""
+        path = self.active_path
+        handle = self._handle
+        if handle is not None and handle.path == path:
+            return handle
+        if not path.exists():
+            if handle is not None:
+                return handle  # ponteiro para arquivo sumido: segue na versão atual
+            raise FileNotFoundError(f"Banco não encontrado: {path}")
+        try:
+            new = _Handle(path)
+        except duckdb.Error as e:
+            if handle is None:
+                raise
+            logger.warning(f"[DB] Não pude abrir {path.name}, mantendo {handle.path.name}: {e}")
+            return handle
+        if handle is not None:
+            self.swaps += 1
+            logger.info(f"[DB] Nova versão publicada: {handle.path.name} -> {path.name}")
+            self._retire(handle)
+        self._handle = new
+        return new
+
+    def _retire(self, handle: _Handle) -> None:
+        if handle.users == 0:
+            handle.con.close()
+        else:
+            self._draining.append(handle)
+
+    def _attach(self, handle: _Handle, dataset: Any) -> _Attached:
+        """Anexa o arquivo do conjunto ao handle, se preciso, e o marca em uso (com `_lock`)."""
+        alias, path = dataset.alias, dataset.file
+        entry = handle.attached.get(alias)
+        if entry is not None and entry.path != path and entry.users == 0:
+            # Nova versão publicada do conjunto: reanexa
+            handle.con.execute(f"DETACH {alias}")
+            del handle.attached[alias]
+            entry = None
+        if entry is None:
+            if not path.exists():
+                raise FileNotFoundError(f"Banco do conjunto não encontrado: {path}")
+            for old in [a for a, e in handle.attached.items() if e.users == 0]:
+                if len(handle.attached) < self.max_attached:
+                    break
+                handle.con.execute(f"DETACH {old}")
+                del handle.attached[old]
+                self.evictions += 1
+            sql_path = path.as_posix().replace("'", "''")
+            handle.con.execute(f"ATTACH '{sql_path}' AS {alias} (READ_ONLY)")
+            entry = handle.attached[alias] = _Attached(path)
+        handle.attached.move_to_end(alias)
+        entry.users += 1
+        return entry
+
+    def open(self) -> duckdb.DuckDBPyConnection:
+        """
+        Abre o handle do banco (idempotente).
+
+        Raises:
+            FileNotFoundError: Se o arquivo do banco não existe.
+        """
+        with self._lock:
+            return self._current().con
+
+    @contextmanager
+    def cursor(self, dataset: Any = None) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Empresta um cursor do pool e o fecha ao final do bloco.
+
+        Args:
+            dataset: Conjunto (`datasets.Dataset`) cujo arquivo deve estar
+                anexado enquanto o cursor é usado (None: só o banco principal).
+
+        Raises:
+            PoolExhausted: Se nenhum cursor ficar livre dentro de `timeout`.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(f"Pool de conexões esgotado ({self.size} cursores em uso)")
+        try:
+            with self._lock:
+                handle = self._current()
+                attached = self._attach(handle, dataset) if dataset is not None and dataset.alias else None
+                handle.users += 1
+                self._in_use += 1
+            try:
+                cur = handle.con.cursor()
+                try:
+                    yield cur
+                finally:
+                    cur.close()
+            finally:
+                with self._lock:
+                    handle.users -= 1
+                    self._in_use -= 1
+                    if attached is not None:
+                        attached.users -= 1
+                    if handle.users == 0 and handle in self._draining:
+                        self._draining.remove(handle)
+                        handle.con.close()
+        finally:
+            self._slots.release()
+
+    def health(self) -> dict[str, Any]:
+        """
+        Verifica se o banco responde (SELECT 1) e devolve o estado do pool.
+        """
+        status: dict[str, Any] = {"open": self.is_open, "size": self.size, "in_use": self._in_use}
+        try:
+            with self.cursor() as con:
+                con.execute("SELECT 1").fetchone()
+            status["ok"] = True
+        except Exception as e:
+            status["ok"] = False
+            status["error"] = str(e)[:200]
+        if self._handle is not None:
+            status.update(file=self._handle.path.name, swaps=self.swaps, draining=self.draining)
+            status.update(attached=list(self._handle.attached), evictions=self.evictions)
+        return status
+
+    def close(self) -> None:
+        """Fecha o handle do banco (e os que estavam drenando). Um próximo `cursor()` reabre."""
+        with self._lock:
+            for handle in [*self._draining, *([self._handle] if self._handle else [])]:
+                handle.con.close()
+            self._draining = []
+            self._handle = None
+            self._resolved = None
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Retorna o pool do processo atual, criando-o na primeira chamada.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def close_pool() -> None:
+    """Fecha o pool do processo (usado no shutdown da API)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def dataset_version(db_path: Path = DB_PATH) -> str | None:
+    """
+    Carimbo de versão do arquivo do banco (inode + mtime + tamanho).
+
+    Muda sempre que um ETL reescreve o arquivo ou publica outra versão
+    (passe `ConnectionPool.active_path`); barato o bastante para ser
+    consultado a cada requisição (um `stat`).
+
+    Returns:
+        String opaca, ou None se o arquivo não existe.
+    """
+    try:
+        st = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def dataset_mtime(db_path: Path = DB_PATH) -> float | None:
+    """Horário (epoch) da última escrita do arquivo do banco, ou None se não existe."""
+    try:
+        return os.stat(db_path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class SchemaCatalog:
+    """
+    Catálogo em memória de tabelas e colunas do banco.
+
+    Carrega `information_schema.columns` uma vez e só recarrega quando
+    `dataset_version()` muda, trocando o `SHOW TABLES` por requisição por
+    um lookup em dicionário.
+
+    Com `dataset` (conjunto num arquivo anexado, ver `datasets.py`), lista
+    as tabelas daquele arquivo, com nomes qualificados (`alias.tabela`), e
+    segue a versão do arquivo do conjunto.
+
+    Exemplo:
+        catalog = get_catalog()
+        if catalog.has(ASSETS_TABLE):
+            ...
+    """
+
+    def __init__(self, pool: ConnectionPool | None = None, dataset: Any = None) -> None:
+        self._pool = pool
+        self._dataset = dataset
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._tables: dict[str, list[str]] = {}
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return self._pool or get_pool()
+
+    @property
+    def version(self) -> str | None:
+        self.refresh()
+        return self._version
+
+    @property
+    def tables(self) -> dict[str, list[str]]:
+        self.refresh()
+        return self._tables
+
+    def refresh(self, force: bool = False) -> None:
+        """Recarrega os metadados se o arquivo do banco mudou (ou se `force`)."""
+        ds = self._dataset
+        current = dataset_version(ds.file if ds is not None else self.pool.active_path)
+        if not force and current == self._version:
+            return
+        with self._lock:
+            if not force and current == self._version:
+                return
+            tables: dict[str, list[str]] = {}
+            if current is not None:
+                database, prefix = ("?", f"{ds.alias}.") if ds is not None else ("current_database()", "")
+                with self.pool.cursor(ds) as con:
+                    rows = con.execute(
+                        f"""
+                        SELECT table_name, column_name
+                        FROM information_schema.columns
+                        WHERE table_catalog = {database} AND table_schema = 'main'
+                        ORDER BY table_name, ordinal_position
+                        """,
+                        [ds.alias] if ds is not None else [],
+                    ).fetchall()
+                for table_name, column_name in rows:
+                    tables.setdefault(prefix + table_name, []).append(column_name)
+            self._tables = tables
+            self._version = current
+
+    def has(self, table: str) -> bool:
+        """True se a tabela existe no banco."""
+        return table in self.tables
+
+    def columns(self, table: str) -> list[str]:
+        """Colunas da tabela na ordem do banco (lista vazia se não existe)."""
+        return self.tables.get(table, [])
+
+    def flags(self, names: Any = None) -> dict[str, bool]:
+        """
+        Flags de disponibilidade devolvidas por /candidates.
+
+        Args:
+            names: `Tables` do conjunto (padrão: tabelas do config).
+        """
+        tables = self.tables
+        return {
+            "assets_enabled": (names.assets_agg if names else ASSETS_AGG_TABLE) in tables,
+            "votes_enabled": (names.votes_agg if names else VOTES_AGG_TABLE) in tables,
+            "finance_enabled": (names.finance_agg if names else FINANCE_AGG_TABLE) in tables,
+        }
+
+
+_catalog: SchemaCatalog | None = None
+
+
+def get_catalog() -> SchemaCatalog:
+    """
+    Retorna o catálogo de schema do processo atual.
+    """
+    global _catalog
+    if _catalog is None:
+        with _pool_lock:
+            if _catalog is None:
+                _catalog = SchemaCatalog()
+    return _catalog
 
 
 def get_tables(con: duckdb.DuckDBPyConnection) -> set[str]:
@@ -67,33 +487,26 @@ def create_indexes(con: duckdb.DuckDBPyConnection, tables_config: dict[str, list
                 print(f"[WARN] Não pude criar index {index_name}: {e}")
 
 
-def ensure_indexes(con: duckdb.DuckDBPyConnection) -> None:
+def ensure_indexes(con: duckdb.DuckDBPyConnection, tables: Any = None) -> None:
     """
     Garante que todos os índices importantes existem.
     
     Args:
         con: Conexão DuckDB (não read-only).
+        tables: `datasets.Tables` do conjunto (padrão: `default_dataset()`).
     """
-    from .config import (
-        ASSETS_AGG_TABLE,
-        ASSETS_TABLE,
-        CANDIDATE_TABLE,
-        DONATIONS_TABLE,
-        EXPENSES_TABLE,
-        FINANCE_AGG_TABLE,
-        VOTES_AGG_TABLE,
-        VOTES_MUN_TABLE,
-    )
-    
+    from .datasets import default_dataset
+
+    t = tables or default_dataset().tables
     tables_config = {
-        CANDIDATE_TABLE: ["id", "nome_urna", "partido"],
-        ASSETS_TABLE: ["candidate_id"],
-        ASSETS_AGG_TABLE: ["candidate_id"],
-        VOTES_AGG_TABLE: ["candidate_id"],
-        VOTES_MUN_TABLE: ["candidate_id"],
-        DONATIONS_TABLE: ["candidate_id"],
-        EXPENSES_TABLE: ["candidate_id"],
-        FINANCE_AGG_TABLE: ["candidate_id"],
+        t.candidate: ["id", "nome_urna", "partido"],
+        t.assets: ["candidate_id"],
+        t.assets_agg: ["candidate_id"],
+        t.votes_agg: ["candidate_id"],
+        t.votes_mun: ["candidate_id"],
+        t.donations: ["candidate_id"],
+        t.expenses: ["candidate_id"],
+        t.finance_agg: ["candidate_id"],
+        t.municipio_votes: ["cd_municipio"],
     }
-    
     create_indexes(con, tables_config)
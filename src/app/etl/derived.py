@@ -0,0 +1,415 @@
+"""
+Tabelas derivadas construídas a partir das tabelas carregadas pelos ETLs.
+
+Cada loader chama `refresh_derived(con)` ao final, então as tabelas
+derivadas (e os índices) ficam em dia com qualquer agregado que tenha mudado.
+A API só abre o banco em modo read-only e não cria nada no startup.
+"""
+
+from __future__ import annotations
+
+import duckdb
+
+from ..config import FINANCE_TOP_N
+from ..datasets import Tables, default_dataset
+from ..db import ensure_indexes
+
+
+# Ordenações pré-computadas no resumo: nome -> (coluna, desc).
+# Cada uma vira uma coluna rank_<nome> (ROW_NUMBER desempatado por nome_urna, id),
+# então ordenar por qualquer uma custa o mesmo que a ordenação padrão por votos.
+RANKED_SORTS: dict[str, tuple[str, bool]] = {
+    "votos": ("total_votos", True),
+    "receitas": ("total_receitas", True),
+    "despesas": ("total_despesas", True),
+    "bens": ("total_bens", True),
+    "nome": ("nome_urna", False),
+}
+
+
+# Contrapartes de finanças: prefixo das colunas -> (campos de `Tables`: lançamentos, ranqueada)
+COUNTERPARTIES: dict[str, tuple[str, str]] = {
+    "doador": ("donations", "top_donors"),
+    "fornecedor": ("expenses", "top_suppliers"),
+}
+
+
+def counterparty_keys(prefix: str) -> tuple[str, str]:
+    """
+    Expressões SQL normalizadas de nome e documento de doador/fornecedor.
+
+    Nome em maiúsculas com espaços colapsados ('(sem nome)' se vazio) e
+    documento só com dígitos, para que variações de digitação do mesmo
+    CPF/CNPJ agrupem juntas.
+
+    Returns:
+        (expressão do nome, expressão do doc)
+    """
+    nome = (
+        f"COALESCE(NULLIF(upper(trim(regexp_replace(CAST({prefix}_nome AS VARCHAR), '\\s+', ' ', 'g'))), ''), "
+        "'(sem nome)')"
+    )
+    doc = f"COALESCE(regexp_replace(CAST({prefix}_doc AS VARCHAR), '[^0-9]', '', 'g'), '')"
+    return nome, doc
+
+
+def _tables(con: duckdb.DuckDBPyConnection) -> set[str]:
+    return {t[0] for t in con.execute("SHOW TABLES").fetchall()}
+
+
+def _columns(con: duckdb.DuckDBPyConnection, table: str) -> set[str]:
+    rows = con.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = ?", [table]
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+def build_candidate_summary(con: duckdb.DuckDBPyConnection, tables: Tables | None = None) -> int:
+    """
+    (Re)cria a tabela desnormalizada com uma linha por candidato.
+
+    Junta candidatos com os agregados de bens, votos e finanças que
+    existirem (os ausentes viram zero) e grava ordenada por total_votos,
+    de modo que a listagem padrão de /candidates é um scan com LIMIT.
+    Inclui uma coluna rank_* para cada ordenação de RANKED_SORTS.
+
+    Returns:
+        Número de linhas da tabela (0 se não há tabela de candidatos).
+    """
+    t = tables or default_dataset().tables
+    existing = _tables(con)
+    if t.candidate not in existing:
+        print(f"[SKIP] {t.candidate_summary}: tabela {t.candidate} não existe")
+        return 0
+
+    assets_src = (
+        t.assets_agg
+        if t.assets_agg in existing
+        else "(SELECT NULL::BIGINT AS candidate_id, 0::DOUBLE AS total_bens, 0::BIGINT AS qtd_bens LIMIT 0)"
+    )
+    votes_src = (
+        t.votes_agg
+        if t.votes_agg in existing
+        else "(SELECT NULL::BIGINT AS candidate_id, 0::BIGINT AS total_votos LIMIT 0)"
+    )
+    finance_src = (
+        t.finance_agg
+        if t.finance_agg in existing
+        else "(SELECT NULL::BIGINT AS candidate_id, 0::DOUBLE AS total_receitas, 0::DOUBLE AS total_despesas, "
+        "0::BIGINT AS doadores_unicos, 0::BIGINT AS fornecedores_unicos LIMIT 0)"
+    )
+
+    candidate_columns = _columns(con, t.candidate)
+    genero_expr = "c.genero" if "genero" in candidate_columns else "NULL::VARCHAR"
+    # NULL quando o arquivo de candidatos não traz o resultado da eleição
+    eleito_expr = (
+        "upper(c.situacao_turno) LIKE 'ELEITO%'" if "situacao_turno" in candidate_columns else "NULL::BOOLEAN"
+    )
+    ranks = ",\n            ".join(
+        f"ROW_NUMBER() OVER (ORDER BY {col} {'DESC' if desc else 'ASC'}, nome_urna, id) AS rank_{name}"
+        for name, (col, desc) in RANKED_SORTS.items()
+    )
+
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {t.candidate_summary} AS
+        WITH base AS (
+            SELECT
+                c.id,
+                c.numero,
+                COALESCE(c.nome_urna, '') AS nome_urna,
+                c.nome_completo,
+                c.partido,
+                c.uf,
+                c.cargo,
+                c.situacao,
+                {genero_expr} AS genero,
+                {eleito_expr} AS eleito,
+                CAST(COALESCE(a.total_bens, 0) AS DOUBLE) AS total_bens,
+                CAST(COALESCE(a.qtd_bens, 0) AS BIGINT) AS qtd_bens,
+                CAST(COALESCE(v.total_votos, 0) AS BIGINT) AS total_votos,
+                CAST(COALESCE(f.total_receitas, 0) AS DOUBLE) AS total_receitas,
+                CAST(COALESCE(f.total_despesas, 0) AS DOUBLE) AS total_despesas,
+                CAST(COALESCE(f.doadores_unicos, 0) AS BIGINT) AS doadores_unicos,
+                CAST(COALESCE(f.fornecedores_unicos, 0) AS BIGINT) AS fornecedores_unicos
+            FROM {t.candidate} c
+            LEFT JOIN {assets_src} a ON a.candidate_id = c.id
+            LEFT JOIN {votes_src} v ON v.candidate_id = c.id
+            LEFT JOIN {finance_src} f ON f.candidate_id = c.id
+        )
+        SELECT
+            *,
+            {ranks}
+        FROM base
+        ORDER BY rank_votos
+        """
+    )
+    total = con.execute(f"SELECT COUNT(*) FROM {t.candidate_summary}").fetchone()[0]
+    print(f"[DB] {t.candidate_summary}: {total} candidatos")
+    return total
+
+
+# Quebras guardadas em party_summary além do total do partido: dimensão -> coluna do resumo
+PARTY_BREAKDOWNS = {
+    "genero": "COALESCE(genero, '(não informado)')",
+    "situacao": "COALESCE(situacao, '(não informado)')",
+}
+
+
+def build_party_summary(con: duckdb.DuckDBPyConnection, tables: Tables | None = None) -> int:
+    """
+    (Re)cria o cubo de totais por partido a partir do resumo de candidatos.
+
+    Uma linha `dimensao='total'` por partido e uma por valor de cada quebra
+    de PARTY_BREAKDOWNS (`dimensao='genero'`, `valor='FEMININO'`...), com
+    candidatos, eleitos, votos, receitas, despesas e bens. `pct_votos` é a
+    fatia dos votos da UF (linhas total) ou do partido (quebras);
+    `rank_votos` ordena os partidos. `eleitos` é NULL se o arquivo de
+    candidatos não traz o resultado da eleição.
+
+    Returns:
+        Número de partidos (0 se não há resumo de candidatos).
+    """
+    t = tables or default_dataset().tables
+    if t.candidate_summary not in _tables(con):
+        con.execute(f"DROP TABLE IF EXISTS {t.party_summary}")
+        print(f"[SKIP] {t.party_summary}: tabela {t.candidate_summary} não existe")
+        return 0
+
+    dims = list(PARTY_BREAKDOWNS)
+    dimensao = " ".join(f"WHEN GROUPING({d}) = 0 THEN '{d}'" for d in dims)
+    valor = " ".join(f"WHEN GROUPING({d}) = 0 THEN {d}" for d in dims)
+    sets = ", ".join(["(partido)"] + [f"(partido, {d})" for d in dims])
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {t.party_summary} AS
+        WITH s AS (
+            SELECT COALESCE(partido, '') AS partido,
+                   {", ".join(f"{expr} AS {d}" for d, expr in PARTY_BREAKDOWNS.items())},
+                   eleito, total_votos, total_receitas, total_despesas, total_bens
+            FROM {t.candidate_summary}
+        ),
+        g AS (
+            SELECT
+                partido,
+                CASE {dimensao} ELSE 'total' END AS dimensao,
+                CASE {valor} ELSE '' END AS valor,
+                COUNT(*) AS candidatos,
+                CASE WHEN COUNT(eleito) = 0 THEN NULL ELSE COUNT(*) FILTER (WHERE eleito) END AS eleitos,
+                CAST(SUM(total_votos) AS BIGINT) AS total_votos,
+                CAST(SUM(total_receitas) AS DOUBLE) AS total_receitas,
+                CAST(SUM(total_despesas) AS DOUBLE) AS total_despesas,
+                CAST(SUM(total_bens) AS DOUBLE) AS total_bens
+            FROM s
+            GROUP BY GROUPING SETS ({sets})
+        )
+        SELECT
+            *,
+            COALESCE(total_votos / NULLIF(
+                CASE WHEN dimensao = 'total'
+                     THEN SUM(total_votos) OVER (PARTITION BY dimensao)
+                     ELSE SUM(total_votos) OVER (PARTITION BY partido, dimensao) END, 0), 0) AS pct_votos,
+            CASE WHEN dimensao = 'total'
+                 THEN ROW_NUMBER() OVER (PARTITION BY dimensao ORDER BY total_votos DESC, partido) END AS rank_votos
+        FROM g
+        ORDER BY dimensao <> 'total', rank_votos, partido, dimensao, total_votos DESC, valor
+        """
+    )
+    total = con.execute(f"SELECT COUNT(*) FROM {t.party_summary} WHERE dimensao = 'total'").fetchone()[0]
+    print(f"[DB] {t.party_summary}: {total} partidos")
+    return total
+
+
+def build_municipio_tables(con: duckdb.DuckDBPyConnection, tables: Tables | None = None) -> int:
+    """
+    (Re)cria as tabelas por município a partir dos votos por município.
+
+    - `votes_by_municipio_*`: cópia dos votos ordenada por (cd_municipio,
+      rank), com nome/partido do candidato e `pct_votos` (fatia dos votos do
+      município). Como está ordenada por município, `WHERE cd_municipio = ?`
+      lê só os row groups daquele município.
+    - `municipios_*`: uma linha por município com total de votos, candidatos
+      votados e o mais votado.
+
+    Exige `cd_municipio` no agregado de votos (ETL de votos atual).
+
+    Returns:
+        Número de municípios (0 se faltam as fontes).
+    """
+    t = tables or default_dataset().tables
+    existing = _tables(con)
+    missing = [name for name in (t.votes_mun, t.candidate_summary) if name not in existing]
+    if not missing and "cd_municipio" not in _columns(con, t.votes_mun):
+        missing = [f"{t.votes_mun}.cd_municipio (rode o ETL de votos de novo)"]
+    if missing:
+        for table in (t.municipio_votes, t.municipios):
+            con.execute(f"DROP TABLE IF EXISTS {table}")
+        print(f"[SKIP] {t.municipios}: falta {', '.join(missing)}")
+        return 0
+
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {t.municipio_votes} AS
+        SELECT
+            v.cd_municipio,
+            COALESCE(v.municipio, '') AS municipio,
+            ROW_NUMBER() OVER (PARTITION BY v.cd_municipio ORDER BY v.votos_municipio DESC, v.candidate_id) AS rank,
+            v.candidate_id,
+            s.nome_urna,
+            s.partido,
+            CAST(COALESCE(v.votos_municipio, 0) AS BIGINT) AS votos,
+            COALESCE(v.votos_municipio / NULLIF(SUM(v.votos_municipio) OVER (PARTITION BY v.cd_municipio), 0), 0)
+                AS pct_votos
+        FROM {t.votes_mun} v
+        LEFT JOIN {t.candidate_summary} s ON s.id = v.candidate_id
+        WHERE v.cd_municipio IS NOT NULL
+        ORDER BY v.cd_municipio, rank
+        """
+    )
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {t.municipios} AS
+        SELECT
+            cd_municipio,
+            any_value(municipio) AS municipio,
+            CAST(SUM(votos) AS BIGINT) AS total_votos,
+            COUNT(*) FILTER (WHERE votos > 0) AS candidatos,
+            any_value(candidate_id) FILTER (WHERE rank = 1) AS lider_id,
+            any_value(nome_urna) FILTER (WHERE rank = 1) AS lider_nome,
+            any_value(partido) FILTER (WHERE rank = 1) AS lider_partido,
+            any_value(pct_votos) FILTER (WHERE rank = 1) AS lider_pct_votos
+        FROM {t.municipio_votes}
+        GROUP BY cd_municipio
+        ORDER BY cd_municipio
+        """
+    )
+    total = con.execute(f"SELECT COUNT(*) FROM {t.municipios}").fetchone()[0]
+    print(f"[DB] {t.municipios}: {total} municípios")
+    return total
+
+
+def build_zona_totals(con: duckdb.DuckDBPyConnection, tables: Tables | None = None) -> int:
+    """
+    (Re)cria os totais por zona eleitoral a partir dos votos brutos (munzona).
+
+    Uma linha por (cd_municipio, zona), ordenada assim, com total de votos,
+    candidatos votados e o mais votado. Serve `/municipios/{cd}/zonas` e o
+    denominador de `pct_zona` em `/candidates/{id}/votes_zona`.
+
+    Returns:
+        Número de zonas (0 se faltam as fontes).
+    """
+    t = tables or default_dataset().tables
+    existing = _tables(con)
+    missing = [name for name in (t.votes_munzona, t.candidate_summary) if name not in existing]
+    if missing:
+        con.execute(f"DROP TABLE IF EXISTS {t.votes_zona}")
+        print(f"[SKIP] {t.votes_zona}: falta {', '.join(missing)}")
+        return 0
+
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {t.votes_zona} AS
+        WITH c AS (
+            SELECT cd_municipio, zona, candidate_id,
+                   any_value(municipio) AS municipio, SUM(COALESCE(votos, 0)) AS votos
+            FROM {t.votes_munzona}
+            WHERE cd_municipio IS NOT NULL AND zona IS NOT NULL
+            GROUP BY 1, 2, 3
+        ),
+        r AS (
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY cd_municipio, zona ORDER BY votos DESC, candidate_id) AS rank
+            FROM c
+        )
+        SELECT
+            r.cd_municipio,
+            r.zona,
+            COALESCE(any_value(r.municipio), '') AS municipio,
+            CAST(SUM(r.votos) AS BIGINT) AS total_votos,
+            COUNT(*) FILTER (WHERE r.votos > 0) AS candidatos,
+            any_value(r.candidate_id) FILTER (WHERE r.rank = 1) AS lider_id,
+            any_value(s.nome_urna) FILTER (WHERE r.rank = 1) AS lider_nome,
+            any_value(s.partido) FILTER (WHERE r.rank = 1) AS lider_partido,
+            COALESCE(any_value(r.votos) FILTER (WHERE r.rank = 1) / NULLIF(SUM(r.votos), 0), 0) AS lider_pct_votos
+        FROM r
+        LEFT JOIN {t.candidate_summary} s ON s.id = r.candidate_id
+        GROUP BY r.cd_municipio, r.zona
+        ORDER BY r.cd_municipio, r.zona
+        """
+    )
+    total = con.execute(f"SELECT COUNT(*) FROM {t.votes_zona}").fetchone()[0]
+    print(f"[DB] {t.votes_zona}: {total} zonas")
+    return total
+
+
+def build_finance_top(
+    con: duckdb.DuckDBPyConnection, top_n: int = FINANCE_TOP_N, tables: Tables | None = None
+) -> None:
+    """
+    (Re)cria as tabelas de top doadores e top fornecedores por candidato.
+
+    Agrupa os lançamentos pelas chaves normalizadas de `counterparty_keys` e
+    guarda as `top_n` maiores contrapartes de cada candidato com a coluna
+    `rank` (1 = maior total; empate por doc e nome). O endpoint de finanças
+    só filtra `rank <= top`.
+
+    Args:
+        con: Conexão DuckDB (não read-only).
+        top_n: Contrapartes guardadas por candidato.
+        tables: Tabelas do conjunto (padrão: `default_dataset()`).
+    """
+    t = tables or default_dataset().tables
+    existing = _tables(con)
+    for prefix, names in COUNTERPARTIES.items():
+        source, target = (getattr(t, name) for name in names)
+        if source not in existing:
+            con.execute(f"DROP TABLE IF EXISTS {target}")
+            print(f"[SKIP] {target}: tabela {source} não existe")
+            continue
+
+        nome, doc = counterparty_keys(prefix)
+        con.execute(
+            f"""
+            CREATE OR REPLACE TABLE {target} AS
+            WITH g AS (
+                SELECT candidate_id, {nome} AS nome, {doc} AS doc, SUM(COALESCE(valor, 0)) AS total
+                FROM {source}
+                GROUP BY 1, 2, 3
+            )
+            SELECT candidate_id, rank, nome, doc, total
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY candidate_id ORDER BY total DESC, doc, nome) AS rank
+                FROM g
+            )
+            WHERE rank <= {int(top_n)}
+            ORDER BY candidate_id, rank
+            """
+        )
+        total = con.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0]
+        print(f"[DB] {target}: {total} linhas (top {top_n} por candidato)")
+
+
+def refresh_derived(con: duckdb.DuckDBPyConnection, tables: Tables | None = None) -> None:
+    """
+    Reconstrói todas as tabelas derivadas cujas fontes existem e garante os
+    índices (`ensure_indexes`).
+
+    Args:
+        con: Conexão DuckDB (não read-only).
+        tables: Tabelas do conjunto (padrão: `default_dataset()`).
+    """
+    t = tables or default_dataset().tables
+    build_candidate_summary(con, t)
+    build_party_summary(con, t)
+    build_municipio_tables(con, t)
+    build_zona_totals(con, t)
+    build_finance_top(con, tables=t)
+    ensure_indexes(con, t)
+
+
+if __name__ == "__main__":
+    # Reconstrói numa versão nova do banco e publica (ver etl/prepare.py)
+    from .prepare import main
+
+    main()
@@ -0,0 +1,334 @@
+"""
+Orquestrador dos ETLs: estágios num grafo de dependências, em paralelo.
+
+Bens, votos e finanças dependem só da tabela de candidatos, então rodam ao
+mesmo tempo assim que ela fica pronta: a atualização completa leva mais ou
+menos o tempo do estágio mais lento, não a soma de todos.
+
+Cada estágio grava num banco de staging próprio (ETL_STAGING_DIR), com as
+tabelas das dependências visíveis por views sobre o staging delas (ou sobre
+a versão publicada, se a dependência não foi selecionada). No fim, as
+tabelas de todos os estágios são copiadas (ATTACH) para uma versão nova do
+banco, que é preparada e publicada de uma vez (ver `DatasetBuild`).
+
+O primeiro erro interrompe as queries dos demais estágios, não agenda mais
+nenhum, apaga staging e versão nova e sai com código 1; a versão publicada
+continua a mesma.
+
+    python -m src.app.etl.pipeline                     # todos os estágios
+    python -m src.app.etl.pipeline --only votes        # só votos
+    python -m src.app.etl.pipeline --from candidates   # candidatos e dependentes
+    python -m src.app.etl.pipeline --uf MG --cargo dep_est  # outro conjunto
+
+Cada conjunto (ano, uf, cargo) tem suas tabelas (`config.table_name`) e seu
+arquivo (`datasets.dataset_db_path`): o padrão (ELEICOES_UF/ELEICOES_CARGO)
+vai para o banco principal, os demais para DATASETS_DIR, onde a API os acha.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+import duckdb
+
+from ..config import ANO, CARGOS, ETL_STAGING_DIR, ETL_WORKERS
+from ..datasets import Dataset, dataset_db_path, default_dataset
+from ..db import resolve_db_path
+from . import (
+    load_assets_2022_sp_dep_fed as assets,
+    load_candidates_2022_sp_dep_fed as candidates,
+    load_finance_2022_sp_dep_fed as finance,
+    load_votes_2022_sp_dep_fed as votes,
+)
+from .prepare import DatasetBuild
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Um estágio do ETL.
+
+    `load` recebe uma conexão de escrita em que as `tables` das dependências
+    já existem e (re)cria as próprias `tables`.
+    """
+
+    name: str
+    load: Callable[[duckdb.DuckDBPyConnection], None]
+    tables: tuple[str, ...]
+    deps: tuple[str, ...] = ()
+
+
+def stages_for(ds: Dataset) -> tuple[Stage, ...]:
+    """Estágios que carregam o conjunto `ds` (tabelas e filtros de UF/cargo dele)."""
+    t = ds.tables
+    return (
+        Stage("candidates", partial(candidates.load, ds=ds), (t.candidate,)),
+        Stage("assets", partial(assets.load, ds=ds), (t.assets, t.assets_agg), ("candidates",)),
+        Stage("votes", partial(votes.load, ds=ds), (t.votes_munzona, t.votes_agg, t.votes_mun), ("candidates",)),
+        Stage(
+            "finance",
+            partial(finance.load, ds=ds),
+            (t.donations, t.expenses, t.finance_agg),
+            ("candidates",),
+        ),
+    )
+
+
+STAGES = stages_for(default_dataset())
+
+
+class StageFailed(RuntimeError):
+    """Um estágio falhou; os demais foram interrompidos e nada foi publicado."""
+
+    def __init__(self, stage: str, error: BaseException) -> None:
+        super().__init__(f"Estágio {stage} falhou: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def topological(stages: Sequence[Stage]) -> list[Stage]:
+    """
+    Estágios em ordem de dependência (estável em relação à ordem dada).
+
+    Dependências fora de `stages` contam como prontas (vêm da versão publicada).
+
+    Raises:
+        ValueError: Ciclo entre os estágios.
+    """
+    names = {s.name for s in stages}
+    ordered: list[Stage] = []
+    done: set[str] = set()
+    while len(ordered) < len(stages):
+        ready = [
+            s for s in stages if s.name not in done and all(d in done or d not in names for d in s.deps)
+        ]
+        if not ready:
+            cycle = [s.name for s in stages if s.name not in done]
+            raise ValueError(f"Ciclo entre os estágios: {cycle}")
+        ordered += ready
+        done.update(s.name for s in ready)
+    return ordered
+
+
+def select_stages(
+    stages: Sequence[Stage], only: Iterable[str] = (), start: str | None = None
+) -> list[Stage]:
+    """
+    Estágios a rodar.
+
+    Args:
+        only: Exatamente estes estágios (dependências fora da seleção são
+            lidas da versão publicada).
+        start: Este estágio e todos os que dependem dele, direta ou
+            indiretamente.
+
+    Raises:
+        ValueError: Estágio desconhecido.
+    """
+    names = [s.name for s in stages]
+    only = list(only)
+    for name in [*only, *([start] if start else [])]:
+        if name not in names:
+            raise ValueError(f"Estágio desconhecido: '{name}'. Use: {', '.join(names)}")
+    if only:
+        return [s for s in stages if s.name in only]
+    if start:
+        chosen = {start}
+        for s in topological(stages):
+            if chosen.intersection(s.deps):
+                chosen.add(s.name)
+        return [s for s in stages if s.name in chosen]
+    return list(stages)
+
+
+def _sql_path(path: Path) -> str:
+    return path.resolve().as_posix().replace("'", "''")
+
+
+class Pipeline:
+    """
+    Roda estágios em paralelo, cada um no seu staging, e publica uma versão.
+
+    `dataset` (padrão: `default_dataset()`) decide as derivadas reconstruídas
+    na publicação e, se `db_path`/`all_stages` não forem dados, o arquivo do
+    conjunto e os estágios de onde vêm as dependências.
+
+    Exemplo:
+        Pipeline(select_stages(STAGES, start="assets")).run()
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        db_path: Path | None = None,
+        workers: int = ETL_WORKERS,
+        staging_dir: Path = ETL_STAGING_DIR,
+        all_stages: Sequence[Stage] | None = None,
+        dataset: Dataset | None = None,
+    ) -> None:
+        self.dataset = dataset or default_dataset()
+        if all_stages is None:
+            all_stages = stages_for(self.dataset)
+        self.stages = topological(stages)
+        self.db_path = Path(db_path) if db_path is not None else dataset_db_path(self.dataset)
+        self.workers = max(1, min(workers, len(self.stages) or 1))
+        self.staging_dir = Path(staging_dir)
+        self._by_name = {s.name: s for s in all_stages} | {s.name: s for s in self.stages}
+        # Threads do DuckDB divididas entre os estágios simultâneos
+        self._threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._running: dict[str, duckdb.DuckDBPyConnection] = {}
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+        self.timings: dict[str, float] = {}
+
+    def staging_path(self, build: DatasetBuild, stage: str) -> Path:
+        return self.staging_dir / f"{build.path.stem}.{stage}.duckdb"
+
+    def run(self) -> Path:
+        """
+        Roda os estágios e publica a versão nova.
+
+        Returns:
+            Arquivo da versão publicada.
+
+        Raises:
+            StageFailed: Um estágio falhou (nada é publicado).
+        """
+        started = time.perf_counter()
+        build = DatasetBuild(self.db_path, self.dataset)
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        selected = {s.name for s in self.stages}
+        print(f"[PIPELINE] Estágios: {', '.join(s.name for s in self.stages)} (workers={self.workers})")
+        try:
+            self._run_stages(build, selected)
+            self._merge(build)
+        finally:
+            for stage in self.stages:
+                path = self.staging_path(build, stage.name)
+                for p in (path, Path(f"{path}.wal")):
+                    p.unlink(missing_ok=True)
+        print(f"[PIPELINE] Versão {build.path.name} publicada em {time.perf_counter() - started:.1f}s")
+        return build.path
+
+    def _run_stages(self, build: DatasetBuild, selected: set[str]) -> None:
+        pending = list(self.stages)
+        done: set[str] = set()
+        running: dict[Future[None], Stage] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="etl") as pool:
+            while pending or running:
+                for stage in [s for s in pending if all(d in done or d not in selected for d in s.deps)]:
+                    pending.remove(stage)
+                    running[pool.submit(self._run_stage, build, stage, selected)] = stage
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        self._abort()
+                        wait(running)
+                        print(f"[PIPELINE] {stage.name} falhou: {error}")
+                        raise StageFailed(stage.name, error) from error
+                    done.add(stage.name)
+
+    def _run_stage(self, build: DatasetBuild, stage: Stage, selected: set[str]) -> None:
+        if self._failed.is_set():
+            raise RuntimeError("cancelado")
+        started = time.perf_counter()
+        path = self.staging_path(build, stage.name)
+        print(f"[STAGE] {stage.name}: iniciando ({path.name})")
+        con = duckdb.connect(str(path))
+        try:
+            con.execute(f"SET threads = {self._threads}")
+            for dep in stage.deps:
+                source = self.staging_path(build, dep) if dep in selected else resolve_db_path(self.db_path)
+                if not source.exists():
+                    raise FileNotFoundError(f"Banco com as tabelas de {dep} não encontrado: {source}")
+                con.execute(f"ATTACH '{_sql_path(source)}' AS dep_{dep} (READ_ONLY)")
+                for table in self._by_name[dep].tables:
+                    con.execute(f"CREATE TEMP VIEW {table} AS SELECT * FROM dep_{dep}.{table}")
+            with self._lock:
+                self._running[stage.name] = con
+            try:
+                stage.load(con)
+            finally:
+                with self._lock:
+                    self._running.pop(stage.name, None)
+            missing = [t for t in stage.tables if not con.execute(
+                "SELECT 1 FROM duckdb_tables() WHERE database_name = current_database() AND table_name = ?", [t]
+            ).fetchone()]
+            if missing:
+                raise RuntimeError(f"Estágio {stage.name} não criou {missing}")
+            con.execute("CHECKPOINT")
+        finally:
+            con.close()
+        self.timings[stage.name] = time.perf_counter() - started
+        print(f"[STAGE] {stage.name}: ok em {self.timings[stage.name]:.1f}s")
+
+    def _abort(self) -> None:
+        """Interrompe as queries dos estágios em andamento e impede novos."""
+        self._failed.set()
+        with self._lock:
+            for con in self._running.values():
+                con.interrupt()
+
+    def _merge(self, build: DatasetBuild) -> None:
+        """Copia as tabelas dos stagings para a versão nova e a publica."""
+        con = build.connect()
+        try:
+            for stage in self.stages:
+                alias = f"stage_{stage.name}"
+                con.execute(f"ATTACH '{_sql_path(self.staging_path(build, stage.name))}' AS {alias} (READ_ONLY)")
+                for table in stage.tables:
+                    con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {alias}.{table}")
+                con.execute(f"DETACH {alias}")
+                print(f"[MERGE] {stage.name}: {', '.join(stage.tables)}")
+        except BaseException:
+            build.discard(con)
+            raise
+        build.publish(con)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    names = [s.name for s in STAGES]
+    default = default_dataset()
+    parser = argparse.ArgumentParser(description="Roda os ETLs em paralelo e publica uma versão do banco.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--only", default="", help=f"Estágios separados por vírgula ({', '.join(names)})")
+    group.add_argument("--from", dest="start", default=None, help="Estágio inicial (roda ele e os dependentes)")
+    parser.add_argument("--workers", type=int, default=ETL_WORKERS, help="Estágios simultâneos")
+    parser.add_argument("--uf", default=default.uf.upper(), help="UF do conjunto (padrão: ELEICOES_UF)")
+    parser.add_argument(
+        "--cargo", default=default.cargo, choices=sorted(CARGOS), help="Cargo do conjunto (padrão: ELEICOES_CARGO)"
+    )
+    args = parser.parse_args(argv)
+
+    if not re.fullmatch(r"[A-Za-z]{2}", args.uf):
+        parser.error(f"UF inválida: '{args.uf}'")
+    dataset = Dataset(ANO, args.uf.lower(), args.cargo)
+    try:
+        stages = select_stages(
+            stages_for(dataset), [s.strip() for s in args.only.split(",") if s.strip()], args.start
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    pipeline = Pipeline(stages, workers=args.workers, dataset=dataset)
+    try:
+        published = pipeline.run()
+    except StageFailed as e:
+        raise SystemExit(f"[ERRO] {e}. Nenhuma versão publicada.")
+    summary = ", ".join(f"{name}={secs:.1f}s" for name, secs in pipeline.timings.items())
+    print(f"[OK] {dataset.key} -> {published.name}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
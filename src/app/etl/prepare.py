@@ -0,0 +1,150 @@
+"""
+Prepara e publica versões do banco: tabelas derivadas, índices e ponteiro.
+
+A API e o MCP só abrem o banco em modo read-only (vários workers no mesmo
+arquivo), então tudo o que escreve fica aqui e nos ETLs. Cada atualização é
+gravada num arquivo novo (`db/eleicoes.<data>.duckdb`, cópia da versão
+publicada) e só então publicada trocando o ponteiro `db/eleicoes.current`
+de forma atômica. A API percebe o ponteiro novo e troca de arquivo sem
+reiniciar (ver `ConnectionPool`).
+
+    python -m src.app.etl.prepare   # derivadas + índices numa versão nova
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+
+from ..config import DB_KEEP_VERSIONS, DB_PATH
+from ..datasets import Dataset, Tables, dataset_db_path, default_dataset
+from ..db import get_tables, pointer_path, resolve_db_path
+from .derived import refresh_derived
+
+
+def prepare(con: duckdb.DuckDBPyConnection, tables: Tables | None = None) -> None:
+    """
+    Reconstrói derivadas e índices e grava tudo no arquivo principal.
+
+    O CHECKPOINT esvazia o WAL, para que as conexões read-only não precisem
+    reaplicá-lo a cada abertura.
+
+    Args:
+        con: Conexão DuckDB (não read-only).
+        tables: Tabelas do conjunto (padrão: `default_dataset()`).
+    """
+    refresh_derived(con, tables)
+    con.execute("CHECKPOINT")
+
+
+def version_paths(db_path: Path = DB_PATH) -> list[Path]:
+    """Arquivos de versão (`eleicoes.<data>.duckdb`) em ordem cronológica."""
+    return sorted(db_path.parent.glob(f"{db_path.stem}.*{db_path.suffix}"))
+
+
+def publish_db(version: Path, db_path: Path = DB_PATH, keep: int = DB_KEEP_VERSIONS) -> None:
+    """
+    Publica `version` trocando o ponteiro de forma atômica.
+
+    Escreve o ponteiro num arquivo temporário e o renomeia por cima do atual
+    (`os.replace`): quem lê o ponteiro vê a versão antiga ou a nova, nunca
+    um arquivo pela metade. Depois apaga versões antigas além de `keep`.
+    """
+    pointer = pointer_path(db_path)
+    tmp = pointer.with_name(pointer.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version.name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, pointer)
+    print(f"[PUBLISH] {pointer.name} -> {version.name}")
+    prune_versions(db_path, keep)
+
+
+def prune_versions(db_path: Path = DB_PATH, keep: int = DB_KEEP_VERSIONS) -> None:
+    """
+    Apaga versões anteriores à publicada, mantendo as `keep` mais recentes.
+
+    Versões mais novas que a publicada (builds em andamento) ficam. Workers
+    que ainda drenam uma versão apagada seguem lendo o arquivo aberto.
+    """
+    active = resolve_db_path(db_path)
+    older = [p for p in version_paths(db_path) if p.name <= active.name]
+    for old in older[: max(0, len(older) - max(1, keep))]:
+        for path in (old, Path(f"{old}.wal")):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:  # Windows: arquivo ainda aberto por um worker
+                print(f"[WARN] Não pude apagar {path.name}: {e}")
+
+
+class DatasetBuild:
+    """
+    Uma versão nova do banco, escrita por um ETL e publicada no final.
+
+    `connect()` copia a versão publicada (para manter as tabelas que o ETL
+    não recarrega) e devolve uma conexão de escrita para a cópia; a API
+    continua lendo a versão anterior até `publish()`. `dataset` diz de que
+    conjunto (ano, uf, cargo) são as derivadas reconstruídas no `publish()`;
+    o arquivo de cada conjunto vem de `dataset_db_path`.
+
+    Exemplo:
+        build = DatasetBuild(DB_PATH)
+        con = build.connect()
+        con.execute("CREATE OR REPLACE TABLE ...")
+        build.publish(con)  # derivadas + índices + checkpoint + ponteiro
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, dataset: Dataset | None = None) -> None:
+        self.db_path = Path(db_path)
+        self.dataset = dataset or default_dataset()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S%f")
+        self.path = self.db_path.with_name(f"{self.db_path.stem}.{stamp}{self.db_path.suffix}")
+
+    def connect(self) -> duckdb.DuckDBPyConnection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        active = resolve_db_path(self.db_path)
+        if active.exists():
+            shutil.copyfile(active, self.path)
+            wal = Path(f"{active}.wal")
+            if wal.exists():
+                shutil.copyfile(wal, Path(f"{self.path}.wal"))
+            print(f"[BUILD] {self.path.name} (cópia de {active.name})")
+        else:
+            print(f"[BUILD] {self.path.name} (banco novo)")
+        return duckdb.connect(str(self.path))
+
+    def publish(self, con: duckdb.DuckDBPyConnection) -> None:
+        """Prepara a versão (derivadas, índices, checkpoint), fecha e publica."""
+        prepare(con, self.dataset.tables)
+        con.close()
+        publish_db(self.path, self.db_path)
+
+    def discard(self, con: duckdb.DuckDBPyConnection) -> None:
+        """Fecha e apaga a versão sem publicar."""
+        con.close()
+        for path in (self.path, Path(f"{self.path}.wal")):
+            path.unlink(missing_ok=True)
+
+
+def main() -> None:
+    dataset = default_dataset()
+    db_path = dataset_db_path(dataset)
+    if not resolve_db_path(db_path).exists():
+        raise SystemExit(f"DB não encontrado: {db_path}. Rode os ETLs antes.")
+
+    build = DatasetBuild(db_path, dataset)
+    con = build.connect()
+    if dataset.tables.candidate not in get_tables(con):
+        build.discard(con)
+        raise SystemExit(f"Tabela {dataset.tables.candidate} não existe. Rode o ETL de candidatos primeiro.")
+    build.publish(con)
+    print(f"[OK] Banco pronto para a API (read-only): {build.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Cache em Parquet dos arquivos do TSE.
+
+Cada arquivo baixado (ZIP, ou CSV já extraído) é convertido uma vez em
+Parquet tipado e comprimido (ZSTD), particionado por UF e cargo, numa pasta
+que tem o sha256 do arquivo (e o hash do schema) no nome. Os ETLs leem o Parquet com
+`read_parquet(..., hive_partitioning = true)`: só as colunas usadas são
+lidas e o filtro por SG_UF/DS_CARGO descarta arquivos inteiros. Rodar de
+novo, ou para outra UF/cargo do mesmo arquivo, não passa mais pelo CSV.
+
+    PARQUET_CACHE_DIR/consulta_cand_2022/<sha256[:16]>-<schema>/
+        _schema.parquet                 # 0 linhas: colunas e tipos
+        _columns.json                   # coluna do schema -> coluna do CSV
+        _SP.done                        # UFs (ou BRASIL) já convertidas
+        SG_UF=SP/DS_CARGO=DEPUTADO%20FEDERAL/data_0.parquet
+
+Como em `tse_zip`, só as UFs pedidas são convertidas quando o arquivo tem
+CSV por UF; senão o `*_BRASIL.csv` é convertido inteiro, uma vez. Só as
+colunas do schema do arquivo (`tse_schema`) são lidas do CSV, com os tipos e
+nomes canônicos dele.
+
+Exemplo (UF = config.UF; os loaders passam a UF do conjunto que carregam):
+    cand = stage_zip(ZIP_PATH, CONSULTA_CAND, [UF])
+    con.execute(f"SELECT SQ_CANDIDATO, NM_URNA_CANDIDATO FROM {cand.sql} WHERE SG_UF = '{UF}'")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..config import PARQUET_CACHE_DIR, PARQUET_CACHE_KEEP
+from .tse_schema import FileSchema
+from .tse_zip import csv_members, file_csv, pick_members, read_file_header, read_header, uf_members, zip_csv
+
+# Colunas de partição (na ordem das pastas); SG_UF é obrigatória
+PARTITION_COLUMNS = ("SG_UF", "DS_CARGO")
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Staged:
+    """
+    Parquet de um arquivo do TSE, pronto para o FROM de uma query.
+
+    `columns` são as do schema (todas existem no Parquet); `available`, as
+    que existiam no CSV (as demais são NULL).
+    """
+
+    columns: tuple[str, ...]
+    available: tuple[str, ...]
+    files: tuple[str, ...]
+
+    def has(self, column: str) -> bool:
+        return column in self.available
+
+    @property
+    def sql(self) -> str:
+        """Expressão de tabela (`read_parquet`) sobre os arquivos das UFs pedidas."""
+        paths = ", ".join(f"'{_sql_path(p)}'" for p in self.files)
+        return f"read_parquet([{paths}], hive_partitioning = true)"
+
+
+def _sql_path(path: str | Path) -> str:
+    return Path(path).as_posix().replace("'", "''")
+
+
+def source_hash(path: Path, cache_root: Path) -> str:
+    """sha256 do arquivo (guardado em `cache_root/source.json` por tamanho + mtime)."""
+    stat = path.stat()
+    key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    memo = cache_root / "source.json"
+    try:
+        saved = json.loads(memo.read_text())
+        if {k: saved.get(k) for k in key} == key:
+            return saved["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    cache_root.mkdir(parents=True, exist_ok=True)
+    memo.write_text(json.dumps(key | {"sha256": digest.hexdigest()}))
+    return digest.hexdigest()
+
+
+def _cache_dir(cache_root: Path, digest: str, schema: FileSchema) -> Path:
+    """
+    Pasta da versão `digest` com `schema`, marcada como usada agora (mtime).
+
+    Cada pasta acumula as UFs já convertidas (`_<UF>.done`), então rodar
+    outra UF/cargo ou outro schema do mesmo arquivo não apaga nada; só as
+    pastas menos usadas além das PARQUET_CACHE_KEEP mais recentes saem.
+    """
+    cache = cache_root / f"{digest[:16]}-{schema.fingerprint}"
+    cache.mkdir(parents=True, exist_ok=True)
+    now = time.time_ns()  # explícito: o relógio do sistema de arquivos pode ser grosso demais
+    os.utime(cache, ns=(now, now))
+    _evict(cache_root, PARQUET_CACHE_KEEP)
+    return cache
+
+
+def _evict(cache_root: Path, keep: int) -> None:
+    """Apaga as pastas de `cache_root` além das `keep` usadas mais recentemente."""
+    dirs = [p for p in cache_root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+    dirs.sort(key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for old in dirs[max(1, keep):]:
+        print(f"[PARQUET] Removendo cache antigo {cache_root.name}/{old.name}")
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _convert(
+    cache: Path,
+    tag: str,
+    schema: FileSchema,
+    header: list[str],
+    register: Callable[[duckdb.DuckDBPyConnection, list[str]], AbstractContextManager],
+) -> None:
+    """
+    Converte as colunas do schema de um CSV (registrado como `tse_csv` por
+    `register`, que recebe as colunas a ler) para o cache.
+
+    Raises:
+        SchemaMismatch: CSV sem alguma coluna obrigatória do schema.
+        ValueError: Schema sem SG_UF.
+    """
+    sources = schema.resolve(header)
+    if sources.get("SG_UF") is None:
+        raise ValueError(f"{schema.name}: schema sem SG_UF, não dá para particionar por UF")
+    renamed = [f"{src} -> {name}" for name, src in sources.items() if src not in (None, name)]
+    absent = [name for name, src in sources.items() if src is None]
+    print(f"[SCHEMA] {schema.name}: renomeadas {renamed or '-'}; ausentes (NULL) {absent or '-'}")
+
+    used = [src for src in sources.values() if src is not None]
+    partitions = ", ".join(c for c in PARTITION_COLUMNS if sources.get(c) is not None)
+    select = ", ".join(c.expr(sources[c.name]) for c in schema.columns)
+    started = time.perf_counter()
+    tmp = Path(tempfile.mkdtemp(prefix=f".{tag}.", dir=cache))
+    con = duckdb.connect()
+    try:
+        if not (cache / "_schema.parquet").exists():
+            con.register("tse_csv", pa.table({c: pa.array([], pa.string()) for c in used}))
+            con.execute(f"COPY (SELECT {select} FROM tse_csv) TO '{_sql_path(tmp / '_schema.parquet')}' (FORMAT PARQUET)")
+            con.unregister("tse_csv")
+            (tmp / "_schema.parquet").replace(cache / "_schema.parquet")
+            (cache / "_columns.json").write_text(json.dumps(sources))
+        with register(con, used):
+            con.execute(f"""
+                COPY (SELECT {select} FROM tse_csv) TO '{_sql_path(tmp / "data")}'
+                (FORMAT PARQUET, PARTITION_BY ({partitions}), COMPRESSION ZSTD)
+            """)
+        for part in sorted((tmp / "data").glob("SG_UF=*")):
+            target = cache / part.name
+            shutil.rmtree(target, ignore_errors=True)
+            part.rename(target)
+        (cache / f"_{tag}.done").touch()
+    finally:
+        con.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"[PARQUET] {cache.parent.name} ({tag}) convertido em {time.perf_counter() - started:.1f}s")
+
+
+def _staged(caches: Sequence[Path], ufs: Sequence[str]) -> Staged:
+    """Arquivos das UFs pedidas (todas, se `ufs` vazio) nas pastas `caches`."""
+    files: list[str] = []
+    for cache in caches:
+        parts = [cache / f"SG_UF={uf.upper()}" for uf in ufs] if ufs else sorted(cache.glob("SG_UF=*"))
+        files += [f"{part}/**/*.parquet" for part in parts if part.is_dir()]
+    schema = caches[0] / "_schema.parquet"
+    sources = json.loads((caches[0] / "_columns.json").read_text())
+    # Sem linhas para as UFs pedidas: só o schema (0 linhas)
+    return Staged(
+        tuple(pq.read_schema(schema).names),
+        tuple(name for name, src in sources.items() if src is not None),
+        tuple(files) or (str(schema),),
+    )
+
+
+def stage_zip(
+    zip_path: Path, schema: FileSchema, ufs: Sequence[str] = (), cache_dir: Path | None = None
+) -> Staged:
+    """
+    Parquet (colunas de `schema`) do ZIP do TSE com as UFs `ufs` (todas, se
+    vazio), convertendo o que ainda não está no cache.
+    """
+    cache_root = Path(cache_dir or PARQUET_CACHE_DIR) / zip_path.stem
+    cache = _cache_dir(cache_root, source_hash(zip_path, cache_root), schema)
+    if not (cache / "_BRASIL.done").exists():
+        per_uf = uf_members(csv_members(zip_path), ufs)
+        todo = [(uf.upper(), m) for uf, m in zip(ufs, per_uf)] if per_uf else [("BRASIL", None)]
+        for tag, member in todo:
+            if (cache / f"_{tag}.done").exists():
+                continue
+            member = member or pick_members(zip_path)[0]
+            print(f"[PARQUET] Convertendo {zip_path}:{member}")
+            _convert(
+                cache, tag, schema, read_header(zip_path, member),
+                lambda con, used, member=member: zip_csv(con, "tse_csv", zip_path, member, used),
+            )
+    return _staged([cache], ufs)
+
+
+def stage_csv_files(
+    data_dir: Path, base: str, schema: FileSchema, ufs: Sequence[str], cache_dir: Path | None = None
+) -> Staged:
+    """
+    Parquet (colunas de `schema`) dos CSVs já extraídos `<base>_<UF>.csv` (ou
+    `<base>_BRASIL.csv`, se falta o de alguma UF) em `data_dir`.
+
+    Raises:
+        FileNotFoundError: Nem os CSVs por UF nem o nacional existem.
+    """
+    per_uf = [data_dir / f"{base}_{uf.upper()}.csv" for uf in ufs]
+    if not per_uf or not all(p.exists() for p in per_uf):
+        national = data_dir / f"{base}_BRASIL.csv"
+        if not national.exists():
+            raise FileNotFoundError(f"Não achei {base}_<UF>.csv para {', '.join(ufs)} nem {national}")
+        sources = [(national, "BRASIL")]
+    else:
+        sources = [(p, uf.upper()) for p, uf in zip(per_uf, ufs)]
+
+    caches = []
+    for csv_path, tag in sources:
+        cache_root = Path(cache_dir or PARQUET_CACHE_DIR) / csv_path.stem
+        cache = _cache_dir(cache_root, source_hash(csv_path, cache_root), schema)
+        if not (cache / f"_{tag}.done").exists():
+            print(f"[PARQUET] Convertendo {csv_path}")
+            _convert(
+                cache, tag, schema, read_file_header(csv_path),
+                lambda con, used, csv_path=csv_path: file_csv(con, "tse_csv", csv_path, used),
+            )
+        caches.append(cache)
+    return _staged(caches, ufs)
@@ -0,0 +1,191 @@
+"""
+Schemas dos arquivos do TSE usados pelos ETLs.
+
+Cada arquivo tem a lista explícita das colunas que os loaders usam, com o
+tipo DuckDB e os nomes alternativos que a coluna teve em outros anos. Na
+conversão para Parquet (`tse_parquet`) só essas colunas são lidas do CSV,
+convertidas para o tipo declarado e gravadas com o nome canônico; uma
+coluna opcional ausente vira NULL do tipo certo. Os loaders usam sempre os
+nomes canônicos e não precisam adivinhar nomes nem tipos.
+
+Tipos: BIGINT/INTEGER (texto inválido, como '#NULO#', vira NULL), DOUBLE
+(número no formato do TSE, '1.234,56') e VARCHAR (texto como está, vazio ->
+NULL; documentos mantêm os zeros à esquerda).
+
+Exemplo:
+    sources = BEM_CANDIDATO.resolve(header)  # {'VR_BEM_CANDIDATO': 'VR_BEM', ...}
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+
+class SchemaMismatch(RuntimeError):
+    """O CSV não tem uma coluna obrigatória do schema (nem com outro nome)."""
+
+    def __init__(self, schema: str, missing: list[Column]) -> None:
+        names = ", ".join(" / ".join(c.names) for c in missing)
+        super().__init__(f"{schema}: colunas obrigatórias ausentes: {names}")
+        self.missing = missing
+
+
+@dataclass(frozen=True)
+class Column:
+    """Uma coluna: nome canônico, tipo DuckDB e nomes usados em outros anos."""
+
+    name: str
+    type: str = "VARCHAR"
+    aliases: tuple[str, ...] = ()
+    required: bool = True
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return (self.name, *self.aliases)
+
+    def expr(self, source: str | None) -> str:
+        """SQL que converte a coluna `source` do CSV (texto) para o tipo, com o nome canônico."""
+        if source is None:
+            return f'CAST(NULL AS {self.type}) AS "{self.name}"'
+        col = f'"{source}"'
+        if self.type == "DOUBLE":
+            col = f"REPLACE(REPLACE({col}, '.', ''), ',', '.')"
+        if self.type != "VARCHAR":
+            col = f"TRY_CAST({col} AS {self.type})"
+        return f'{col} AS "{self.name}"'
+
+
+@dataclass(frozen=True)
+class FileSchema:
+    """Colunas usadas de um arquivo do TSE (`name` é o prefixo do arquivo)."""
+
+    name: str
+    columns: tuple[Column, ...]
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash curto do schema (muda a chave do cache Parquet quando o schema muda)."""
+        return hashlib.sha256(repr(self).encode()).hexdigest()[:8]
+
+    def resolve(self, header: Sequence[str]) -> dict[str, str | None]:
+        """
+        Coluna do CSV para cada coluna do schema (None: opcional ausente).
+
+        Raises:
+            SchemaMismatch: Falta alguma coluna obrigatória.
+        """
+        present = set(header)
+        sources = {c.name: next((n for n in c.names if n in present), None) for c in self.columns}
+        missing = [c for c in self.columns if c.required and sources[c.name] is None]
+        if missing:
+            raise SchemaMismatch(self.name, missing)
+        return sources
+
+
+# Colunas de partição do cache Parquet (SG_UF é obrigatória em todos os schemas)
+UF = Column("SG_UF")
+CARGO = Column("DS_CARGO")
+OPTIONAL_CARGO = Column("DS_CARGO", required=False)
+
+PRESTADOR = Column("SQ_PRESTADOR_CONTAS", "BIGINT", ("SQ_PRESTADOR_CONTA", "SQ_PRESTADOR"))
+
+CONSULTA_CAND = FileSchema("consulta_cand", (
+    Column("SQ_CANDIDATO", "BIGINT"),
+    Column("NR_CANDIDATO"),
+    Column("NM_URNA_CANDIDATO"),
+    Column("NM_CANDIDATO"),
+    Column("SG_PARTIDO"),
+    UF,
+    CARGO,
+    Column("DS_SITUACAO_CANDIDATURA"),
+    Column(
+        "DS_DETALHE_SITUACAO_CAND",
+        aliases=("DS_DETALHE_SITUACAO_CANDIDATURA", "DS_DETALHE_SITUACAO"),
+        required=False,
+    ),
+    # Resultado da totalização (ELEITO POR QP, SUPLENTE...): só existe em arquivos pós-eleição
+    Column("DS_SIT_TOT_TURNO", required=False),
+    Column("DS_OCUPACAO"),
+    Column("DS_GRAU_INSTRUCAO"),
+    Column("DS_ESTADO_CIVIL"),
+    Column("DS_GENERO"),
+    Column("DT_NASCIMENTO"),
+))
+
+BEM_CANDIDATO = FileSchema("bem_candidato", (
+    Column("SQ_CANDIDATO", "BIGINT"),
+    UF,
+    Column("DS_TIPO_BEM_CANDIDATO", aliases=("DS_TIPO_BEM",), required=False),
+    Column("DS_BEM_CANDIDATO", aliases=("DS_BEM",), required=False),
+    Column("VR_BEM_CANDIDATO", "DOUBLE", ("VR_BEM",)),
+))
+
+VOTACAO_CANDIDATO_MUNZONA = FileSchema("votacao_candidato_munzona", (
+    Column("SQ_CANDIDATO", "BIGINT"),
+    UF,
+    OPTIONAL_CARGO,
+    Column("NR_TURNO", "INTEGER", required=False),
+    Column("CD_MUNICIPIO", "INTEGER", required=False),
+    Column("NM_MUNICIPIO", required=False),
+    Column("NR_ZONA", "INTEGER", required=False),
+    Column("QT_VOTOS_NOMINAIS", "BIGINT", ("QT_VOTOS_NOMINAIS_VALIDOS", "QT_VOTOS", "QT_VOTOS_VALIDOS")),
+))
+
+RECEITAS_CANDIDATOS = FileSchema("receitas_candidatos", (
+    Column("SQ_CANDIDATO", "BIGINT"),
+    PRESTADOR,
+    UF,
+    OPTIONAL_CARGO,
+    Column("VR_RECEITA", "DOUBLE"),
+    Column("NR_CPF_CNPJ_DOADOR", aliases=("NR_CPF_CNPJ_DOADOR_ORIG", "NR_CPF_CNPJ_DOADOR_ORIGINAL"), required=False),
+    Column("NM_DOADOR", aliases=("NM_DOADOR_ORIG", "NM_DOADOR_ORIGINAL"), required=False),
+))
+
+DESPESAS_PAGAS_CANDIDATOS = FileSchema("despesas_pagas_candidatos", (
+    PRESTADOR,
+    Column("SQ_DESPESA", "BIGINT"),
+    UF,
+    OPTIONAL_CARGO,
+    Column("VR_PAGTO_DESPESA", "DOUBLE", ("VR_PAGAMENTO_DESPESA",)),
+    # Fornecedor normalmente só vem nas contratadas
+    Column("NR_CPF_CNPJ_FORNECEDOR", required=False),
+    Column("NM_FORNECEDOR", required=False),
+))
+
+DESPESAS_CONTRATADAS_CANDIDATOS = FileSchema("despesas_contratadas_candidatos", (
+    Column("SQ_PRESTADOR_CONTAS", "BIGINT", PRESTADOR.aliases, required=False),
+    Column("SQ_DESPESA", "BIGINT", required=False),
+    UF,
+    OPTIONAL_CARGO,
+    Column("NR_CPF_CNPJ_FORNECEDOR", required=False),
+    Column("NM_FORNECEDOR", aliases=("NM_FORNECEDOR_RFB",), required=False),
+))
+
+SCHEMAS = {
+    s.name: s
+    for s in (
+        CONSULTA_CAND,
+        BEM_CANDIDATO,
+        VOTACAO_CANDIDATO_MUNZONA,
+        RECEITAS_CANDIDATOS,
+        DESPESAS_PAGAS_CANDIDATOS,
+        DESPESAS_CONTRATADAS_CANDIDATOS,
+    )
+}
+
+
+def schema_for(path: Path) -> FileSchema:
+    """
+    Schema do arquivo do TSE pelo nome (`consulta_cand_2022.zip` -> CONSULTA_CAND).
+
+    Raises:
+        KeyError: Arquivo sem schema registrado.
+    """
+    stem = path.name.lower()
+    for name, schema in SCHEMAS.items():
+        if stem.startswith(f"{name}_"):
+            return schema
+    raise KeyError(f"Sem schema para {path.name}. Registrados: {', '.join(SCHEMAS)}")
@@ -0,0 +1,198 @@
+"""
+Leitura dos CSVs do TSE direto do ZIP, sem extrair para o disco.
+
+O membro escolhido é descomprimido em streaming (`zipfile`), decodificado de
+CP1252 no caminho e convertido em record batches Arrow
+(`pyarrow.csv.open_csv`), que o DuckDB consome como uma tabela (`register`).
+Nenhum CSV é gravado em disco e a memória fica em torno de um bloco
+(CSV_BLOCK_BYTES), não do tamanho do arquivo.
+
+Todas as colunas chegam como VARCHAR (vazio -> NULL), como texto cru do
+TSE; os loaders convertem o que usam com CAST/TRY_CAST.
+
+Os ZIPs do TSE trazem um CSV por UF (`*_SP.csv`) além do `*_BRASIL.csv`:
+`pick_members` escolhe só os das UFs pedidas e cai no BRASIL (que o loader
+filtra por SG_UF) quando falta algum. Uma UF lê ~1/27 do arquivo nacional.
+
+`file_csv` faz o mesmo para um CSV já extraído (prestação de contas).
+
+Exemplo (UF = config.UF):
+    members = pick_members(ZIP_PATH, [UF])
+    with zip_csv(con, "cand_csv", ZIP_PATH, members, ["SQ_CANDIDATO", "SG_UF"]):
+        con.execute(f"CREATE TABLE t AS SELECT * FROM cand_csv WHERE SG_UF = '{UF}'")
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Sequence
+
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Tamanho do bloco lido/convertido por vez (bytes de CSV descomprimido)
+CSV_BLOCK_BYTES = 8 * 1024 * 1024
+TSE_ENCODING = "cp1252"
+
+
+def csv_members(zip_path: Path) -> list[str]:
+    """Membros .csv do ZIP, na ordem do arquivo."""
+    with zipfile.ZipFile(zip_path) as z:
+        return [n for n in z.namelist() if n.lower().endswith(".csv")]
+
+
+def uf_members(members: Sequence[str], ufs: Sequence[str]) -> list[str] | None:
+    """Um membro `*_<UF>.csv` para cada UF de `ufs`, ou None se falta alguma."""
+    by_uf = {Path(m).stem.rsplit("_", 1)[-1].upper(): m for m in members}
+    chosen = [by_uf.get(uf.upper()) for uf in ufs]
+    return chosen if chosen and all(chosen) else None
+
+
+def pick_members(zip_path: Path, ufs: Sequence[str] = ()) -> list[str]:
+    """
+    Membros a ler: os CSVs por UF de `ufs` se todos existirem; senão o
+    `*_BRASIL.csv` (ou o primeiro CSV), que precisa ser filtrado por SG_UF.
+
+    Raises:
+        FileNotFoundError: ZIP sem nenhum CSV.
+    """
+    members = csv_members(zip_path)
+    if not members:
+        raise FileNotFoundError(f"Não encontrei nenhum .csv dentro de {zip_path}.")
+    chosen = uf_members(members, ufs)
+    if chosen is None:
+        brasil = [m for m in members if "BRASIL" in Path(m).name.upper()]
+        chosen = [brasil[0] if brasil else members[0]]
+        if ufs:
+            print(f"[CSV] Sem CSV por UF para {', '.join(ufs)}; lendo o nacional com filtro")
+    print(f"[CSV] Usando: {zip_path}:{', '.join(chosen)}")
+    return chosen
+
+
+def _header(raw: IO[bytes]) -> list[str]:
+    text = io.TextIOWrapper(raw, encoding=TSE_ENCODING, newline="")
+    header = next(csv.reader(text, delimiter=";"))
+    return [h.strip().lstrip("\ufeff") for h in header]
+
+
+def read_header(zip_path: Path, member: str) -> list[str]:
+    """Nomes das colunas do membro (só a primeira linha é descomprimida)."""
+    with zipfile.ZipFile(zip_path) as z, z.open(member) as raw:
+        return _header(raw)
+
+
+def read_file_header(csv_path: Path) -> list[str]:
+    """Nomes das colunas de um CSV do TSE já extraído."""
+    with open(csv_path, "rb") as raw:
+        return _header(raw)
+
+
+def open_stream(
+    raw: IO[bytes], header: Sequence[str], columns: Sequence[str] | None = None
+) -> pa.RecordBatchReader:
+    """Leitor Arrow em streaming de um CSV do TSE, com `columns` (padrão: todas) como string."""
+    return pacsv.open_csv(
+        raw,
+        read_options=pacsv.ReadOptions(
+            encoding=TSE_ENCODING, block_size=CSV_BLOCK_BYTES, column_names=list(header), skip_rows=1
+        ),
+        parse_options=pacsv.ParseOptions(delimiter=";", newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: pa.string() for c in header},
+            include_columns=list(columns) if columns else None,
+            strings_can_be_null=True,
+            null_values=[""],
+        ),
+    )
+
+
+def open_member(
+    z: zipfile.ZipFile, member: str, header: Sequence[str], columns: Sequence[str] | None = None
+) -> pa.RecordBatchReader:
+    """Leitor Arrow em streaming do membro (ver `open_stream`)."""
+    return open_stream(z.open(member), header, columns)
+
+
+def open_members(
+    z: zipfile.ZipFile, members: Sequence[str], header: Sequence[str], columns: Sequence[str] | None = None
+) -> pa.RecordBatchReader:
+    """Os membros (mesmo cabeçalho) em sequência num único leitor Arrow."""
+    schema = pa.schema([(c, pa.string()) for c in (columns or header)])
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        for member in members:
+            with open_member(z, member, header, columns) as reader:
+                yield from reader
+
+    return pa.RecordBatchReader.from_batches(schema, batches())
+
+
+@contextmanager
+def zip_csv(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    zip_path: Path,
+    members: str | Sequence[str],
+    columns: Sequence[str] | None = None,
+) -> Iterator[list[str]]:
+    """
+    Registra os membros do ZIP (concatenados) como a tabela `name` em `con`
+    durante o bloco.
+
+    A tabela só pode ser lida uma vez (é um stream): use-a numa única query,
+    normalmente um CREATE TABLE ... AS SELECT.
+
+    Args:
+        members: Um membro ou vários com o mesmo cabeçalho (ver `pick_members`).
+        columns: Colunas a ler (as demais nem são convertidas).
+
+    Yields:
+        Todas as colunas do cabeçalho dos membros.
+
+    Raises:
+        KeyError: Alguma das `columns` não existe.
+        ValueError: Membros com cabeçalhos diferentes.
+    """
+    members = [members] if isinstance(members, str) else list(members)
+    header = read_header(zip_path, members[0])
+    for member in members[1:]:
+        if read_header(zip_path, member) != header:
+            raise ValueError(f"Cabeçalho de {member} difere de {members[0]}")
+    missing = [c for c in columns or [] if c not in header]
+    if missing:
+        raise KeyError(f"Colunas ausentes em {members[0]}: {missing}")
+    with zipfile.ZipFile(zip_path) as z:
+        reader = open_members(z, members, header, columns)
+        con.register(name, reader)
+        try:
+            yield header
+        finally:
+            con.unregister(name)
+            reader.close()
+
+
+@contextmanager
+def file_csv(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    csv_path: Path,
+    columns: Sequence[str] | None = None,
+) -> Iterator[list[str]]:
+    """Como `zip_csv`, para um CSV do TSE já extraído."""
+    header = read_file_header(csv_path)
+    missing = [c for c in columns or [] if c not in header]
+    if missing:
+        raise KeyError(f"Colunas ausentes em {csv_path}: {missing}")
+    with open(csv_path, "rb") as raw:
+        reader = open_stream(raw, header, columns)
+        con.register(name, reader)
+        try:
+            yield header
+        finally:
+            con.unregister(name)
+            reader.close()
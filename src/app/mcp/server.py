@@ -1,14 +1,14 @@
-from pathlib import Path
-
-import duckdb
 from fastmcp import FastMCP
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from ..config import CANDIDATE_TABLE
+from ..db import get_pool
+from ..search import get_search_index
+
 mcp = FastMCP("Eleicoes Brasil (MVP)")
 
-DB_PATH = Path("db/eleicoes.duckdb")
-TABLE = "candidates_sp_dep_fed_2022"
+TABLE = CANDIDATE_TABLE
 
 @mcp.custom_route("/health", methods=["GET"])
 async def health_check(request: Request):
@@ -19,25 +19,37 @@ def search_candidates_sp_dep_fed_2022(q: str = "", limit: int = 25, offset: int
     """
     Busca candidatos (SP / Dep. Federal / 2022) no DuckDB.
     """
-    if not DB_PATH.exists():
+    if not get_pool().active_path.exists():
         return {"items": [], "error": "DB não encontrado. Rode o ETL primeiro."}
 
-    con = duckdb.connect(str(DB_PATH), read_only=True)
-    q_norm = q.strip().lower()
-
-    sql = f"""
-      SELECT id, numero, nome_urna, partido, situacao
-      FROM {TABLE}
-      WHERE (? = '' OR lower(nome_urna) LIKE '%' || ? || '%'
-                  OR lower(nome_completo) LIKE '%' || ? || '%')
-      ORDER BY nome_urna
-      LIMIT ? OFFSET ?
-    """
-    rows = con.execute(sql, [q_norm, q_norm, q_norm, limit, offset]).fetchall()
-    con.close()
+    if q.strip():
+        # Índice de trigramas: ignora acentos e tolera erros de digitação
+        index = get_search_index()
+        matches = index.search(q) if index is not None else []
+        sql = f"""
+          WITH m AS (SELECT UNNEST(?::BIGINT[]) AS id, UNNEST(?::DOUBLE[]) AS score)
+          SELECT c.id, c.numero, c.nome_urna, c.partido, c.situacao
+          FROM {TABLE} c
+          JOIN m ON m.id = c.id
+          ORDER BY m.score DESC, c.nome_urna
+          LIMIT ? OFFSET ?
+        """
+        params = [[m[0] for m in matches], [m[1] for m in matches], limit, offset]
+    else:
+        sql = f"""
+          SELECT id, numero, nome_urna, partido, situacao
+          FROM {TABLE}
+          ORDER BY nome_urna
+          LIMIT ? OFFSET ?
+        """
+        params = [limit, offset]
+
+    with get_pool().cursor() as con:
+        rows = con.execute(sql, params).fetchall()
 
     items = [{"id": r[0], "numero": r[1], "nome_urna": r[2], "partido": r[3], "situacao": r[4]} for r in rows]
     return {"items": items}
 
 if __name__ == "__main__":
+    # Executar da raiz do projeto: python -m src.app.mcp.server
     mcp.run(transport="http", host="127.0.0.1", port=8001)
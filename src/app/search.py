@@ -0,0 +1,237 @@
+"""
+Índice de trigramas em memória para busca de candidatos por nome.
+
+Normaliza acentos e caixa ("JOSÉ" == "jose"), responde buscas por
+substring e tolera erros de digitação ranqueando por similaridade de
+trigramas. Cada conjunto de dados (ano, uf, cargo) tem o seu índice,
+construído a partir da tabela de candidatos do conjunto e reconstruído
+quando o arquivo do banco muda.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from collections import Counter, OrderedDict
+from itertools import chain
+from typing import Iterable
+
+import duckdb
+
+from .config import CANDIDATE_TABLE, SEARCH_FUZZY_BELOW, SEARCH_INDEX_MAX, SEARCH_MIN_SIMILARITY
+from .datasets import Dataset, get_registry
+from .db import get_pool
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_EMPTY = array("I")
+
+
+def normalize(text: str | None) -> str:
+    """
+    Remove acentos, passa para minúsculas e colapsa pontuação em espaços.
+
+    Exemplo:
+        normalize("  José  D'Ávila ") -> "jose d avila"
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", ascii_text.lower()).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Trigramas por palavra com padding (estilo pg_trgm): "ana" -> {"  a", " an", "ana", "na "}.
+
+    Espera texto já normalizado.
+    """
+    grams: set[str] = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def inner_trigrams(text: str) -> set[str]:
+    """
+    Trigramas que todo texto contendo `text` como substring também tem.
+
+    A primeira palavra pode ser sufixo e a última prefixo de palavras do
+    documento; as do meio são palavras inteiras. Espera texto normalizado.
+    """
+    words = text.split()
+    if len(words) == 1:
+        w = words[0]
+        return {w[i : i + 3] for i in range(len(w) - 2)}
+    parts = [f"{words[0]} "] + [f"  {w} " for w in words[1:-1]] + [f"  {words[-1]}"]
+    return {p[i : i + 3] for p in parts for i in range(len(p) - 2)}
+
+
+class TrigramIndex:
+    """
+    Índice invertido trigrama -> documentos.
+
+    Cada documento é um candidato (id, nome_urna, nome_completo). As listas
+    de postings são `array('I')` de posições em ordem crescente, o que
+    mantém dezenas de milhares de candidatos em poucos MB.
+
+    Exemplo:
+        index = TrigramIndex([(1, "JOSÉ SILVA", "JOSÉ DA SILVA")])
+        index.search("jose silv")  # [(1, 1.0)]
+    """
+
+    def __init__(self, docs: Iterable[tuple[int, str | None, str | None]]) -> None:
+        self._ids: list[int] = []
+        self._texts: list[str] = []
+        postings: dict[str, array] = {}
+        word_grams: dict[str, set[str]] = {}
+
+        for doc_id, nome_urna, nome_completo in docs:
+            text = " ".join(t for t in (normalize(nome_urna), normalize(nome_completo)) if t)
+            pos = len(self._ids)
+            self._ids.append(int(doc_id))
+            self._texts.append(text)
+            grams: set[str] = set()
+            for word in text.split():
+                wg = word_grams.get(word)
+                if wg is None:
+                    wg = word_grams[word] = trigrams(word)
+                grams |= wg
+            for g in grams:
+                lst = postings.get(g)
+                if lst is None:
+                    lst = postings[g] = array("I")
+                lst.append(pos)
+
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _substring(self, q: str) -> list[int]:
+        """Posições cujo texto contém `q` (filtra pelos trigramas internos antes)."""
+        inner = inner_trigrams(q)
+        if not inner:
+            # busca com 1-2 letras: scan linear
+            return [pos for pos, text in enumerate(self._texts) if q in text]
+        lists = sorted((self._postings.get(g, _EMPTY) for g in inner), key=len)
+        candidates = set(lists[0])
+        for lst in lists[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(lst)
+        return sorted(pos for pos in candidates if q in self._texts[pos])
+
+    def _fuzzy(self, q: str, min_similarity: float) -> dict[int, float]:
+        """
+        Similaridade = fração dos trigramas (com padding) da busca presentes no nome.
+
+        Usa filtro de prefixo: um documento com similaridade >= s precisa ter
+        ao menos um dos (n - ceil(s*n) + 1) trigramas mais raros da busca, então
+        só esses postings geram candidatos; os demais só incrementam contagens.
+        """
+        grams = sorted(trigrams(q), key=lambda g: len(self._postings.get(g, _EMPTY)))
+        n = len(grams)
+        need = max(1, math.ceil(min_similarity * n))
+        prefix = n - need + 1
+        counts = Counter(chain.from_iterable(self._postings.get(g, _EMPTY) for g in grams[:prefix]))
+        for g in grams[prefix:]:
+            counts.update(filter(counts.__contains__, self._postings.get(g, _EMPTY)))
+        return {pos: round(c / n, 4) for pos, c in counts.items() if c >= need}
+
+    def search(
+        self,
+        query: str,
+        min_similarity: float = SEARCH_MIN_SIMILARITY,
+        fuzzy_below: int = SEARCH_FUZZY_BELOW,
+    ) -> list[tuple[int, float]]:
+        """
+        Busca candidatos cujo nome contém `query` ou se parece com ela.
+
+        Args:
+            query: Texto livre (acentos e caixa são ignorados).
+            min_similarity: Fração mínima dos trigramas da busca presentes
+                no nome para um resultado aproximado (0..1).
+            fuzzy_below: A busca aproximada só roda quando há menos que
+                isso de correspondências exatas (0 desliga).
+
+        Returns:
+            Lista de (id, score): substrings exatas primeiro com score 1.0,
+            depois aproximações por score decrescente.
+        """
+        q = normalize(query)
+        if not q:
+            return []
+
+        exact = self._substring(q)
+        results = [(self._ids[pos], 1.0) for pos in exact]
+
+        if len(exact) < fuzzy_below:
+            seen = set(exact)
+            approx = [(pos, sim) for pos, sim in self._fuzzy(q, min_similarity).items() if pos not in seen]
+            approx.sort(key=lambda kv: (-kv[1], kv[0]))
+            results.extend((self._ids[pos], sim) for pos, sim in approx)
+        return results
+
+
+# Conjunto -> (versão do banco, índice), do uso mais antigo ao mais recente
+_index: OrderedDict[str, tuple[str | None, TrigramIndex]] = OrderedDict()
+# `_index_lock` só protege o dicionário; a construção usa o lock do conjunto
+_index_lock = threading.Lock()
+_build_locks: dict[str, threading.Lock] = {}
+
+
+def build_index(con: duckdb.DuckDBPyConnection, table: str = CANDIDATE_TABLE) -> TrigramIndex:
+    """Constrói o índice a partir da tabela de candidatos `table`."""
+    rows = con.execute(f"SELECT id, nome_urna, nome_completo FROM {table}").fetchall()
+    return TrigramIndex(rows)
+
+
+def _cached(key: str, version: str | None) -> TrigramIndex | None:
+    with _index_lock:
+        entry = _index.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        _index.move_to_end(key)
+        return entry[1]
+
+
+def get_search_index(dataset: Dataset | None = None) -> TrigramIndex | None:
+    """
+    Índice do conjunto (padrão: o conjunto padrão), reconstruído quando a versão do banco muda.
+
+    Cada conjunto é construído sob o seu próprio lock: a primeira busca num
+    conjunto não bloqueia as buscas nos demais. Mantém os índices dos
+    SEARCH_INDEX_MAX conjuntos usados mais recentemente.
+
+    Returns:
+        O índice, ou None se a tabela de candidatos do conjunto não existe.
+    """
+    registry = get_registry()
+    ds = dataset or registry.default
+    catalog = registry.catalog(ds)
+    version = catalog.version
+    index = _cached(ds.key, version)
+    if index is not None:
+        return index
+    with _index_lock:
+        build_lock = _build_locks.setdefault(ds.key, threading.Lock())
+    with build_lock:
+        # Outra thread pode ter construído enquanto esta esperava
+        index = _cached(ds.key, version)
+        if index is not None:
+            return index
+        if not catalog.has(ds.tables.candidate):
+            return None
+        with get_pool().cursor(ds) as con:
+            index = build_index(con, ds.tables.candidate)
+        with _index_lock:
+            _index[ds.key] = (version, index)
+            _index.move_to_end(ds.key)
+            while len(_index) > max(1, SEARCH_INDEX_MAX):
+                _index.popitem(last=False)
+    return index
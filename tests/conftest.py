@@ -0,0 +1,147 @@
+"""
+Fixtures compartilhadas: banco DuckDB sintético no formato dos ETLs.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator
+
+import duckdb
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import config
+from src.app import datasets as datasets_module
+from src.app import db as db_module
+from src.app import search as search_module
+from src.app.api import main as api_main
+from src.app.api import profiling as profiling_module
+from src.app.api.cache import ResponseCache
+from src.app.etl.derived import refresh_derived
+
+NOMES = ["JOSÉ SILVA", "MARIA SOUZA", "JOÃO PEREIRA", "ANA LÚCIA", "PEDRO ALVES"]
+
+
+def build_sample_db(path: Path, n_candidates: int = 60) -> None:
+    """Cria as tabelas base dos ETLs com dados determinísticos e as derivadas."""
+    con = duckdb.connect(str(path))
+    nomes_sql = ", ".join(f"'{n}'" for n in NOMES)
+    con.execute(f"""
+        CREATE TABLE {config.CANDIDATE_TABLE} AS
+        SELECT
+            range AS id,
+            CAST(1000 + range AS VARCHAR) AS numero,
+            list_extract([{nomes_sql}], 1 + range % 5) || ' ' || range AS nome_urna,
+            'NOME COMPLETO ' || range AS nome_completo,
+            'P' || (range % 4) AS partido,
+            'SP' AS uf,
+            'DEPUTADO FEDERAL' AS cargo,
+            CASE WHEN range % 10 = 0 THEN 'INAPTO' ELSE 'APTO' END AS situacao,
+            CASE range % 6 WHEN 1 THEN 'ELEITO POR QP' WHEN 2 THEN 'SUPLENTE' ELSE 'NÃO ELEITO' END AS situacao_turno,
+            CASE WHEN range % 2 = 0 THEN 'MASCULINO' ELSE 'FEMININO' END AS genero
+        FROM range({n_candidates})
+    """)
+    con.execute(f"""
+        CREATE TABLE {config.ASSETS_TABLE} AS
+        SELECT c.id AS candidate_id, 'Imóvel' AS tipo, 'bem ' || k.range AS descricao,
+               CAST((c.id * 37 + k.range * 1000) % 90000 AS DOUBLE) AS valor
+        FROM {config.CANDIDATE_TABLE} c, range(3) k
+        WHERE c.id % 4 <> 0
+    """)
+    con.execute(f"""
+        CREATE TABLE {config.ASSETS_AGG_TABLE} AS
+        SELECT candidate_id, SUM(valor) AS total_bens, COUNT(*) AS qtd_bens
+        FROM {config.ASSETS_TABLE} GROUP BY 1
+    """)
+    con.execute(f"""
+        CREATE TABLE votes_munzona_sp_dep_fed_2022 AS
+        SELECT c.id AS candidate_id, 'MUNICIPIO ' || m.range AS municipio,
+               CAST(71000 + m.range AS INTEGER) AS cd_municipio, CAST(z.range + 1 AS INTEGER) AS zona,
+               1 AS turno, CAST((c.id * 13 + m.range * 7 + z.range) % 300 AS BIGINT) AS votos
+        FROM {config.CANDIDATE_TABLE} c, range(5) m, range(2) z
+        ORDER BY candidate_id, cd_municipio, zona
+    """)
+    con.execute(f"""
+        CREATE TABLE {config.VOTES_AGG_TABLE} AS
+        SELECT candidate_id, SUM(votos) AS total_votos FROM votes_munzona_sp_dep_fed_2022 GROUP BY 1
+    """)
+    con.execute(f"""
+        CREATE TABLE {config.VOTES_MUN_TABLE} AS
+        SELECT candidate_id, cd_municipio, municipio, SUM(votos) AS votos_municipio
+        FROM votes_munzona_sp_dep_fed_2022 GROUP BY 1, 2, 3
+    """)
+    con.execute(f"""
+        CREATE TABLE {config.DONATIONS_TABLE} AS
+        SELECT c.id AS candidate_id, CAST((c.id + k.range * 101) % 5000 AS DOUBLE) AS valor,
+               ' ' || (k.range % 5) || '0001 ' AS doador_doc, ' DOADOR ' || (k.range % 5) AS doador_nome
+        FROM {config.CANDIDATE_TABLE} c, range(8) k
+    """)
+    con.execute(f"""
+        CREATE TABLE {config.EXPENSES_TABLE} AS
+        SELECT c.id AS candidate_id, CAST((c.id * 3 + k.range * 77) % 4000 AS DOUBLE) AS valor,
+               CAST(k.range % 3 AS VARCHAR) AS fornecedor_doc, 'FORNECEDOR ' || (k.range % 3) AS fornecedor_nome
+        FROM {config.CANDIDATE_TABLE} c, range(6) k
+    """)
+    con.execute(f"""
+        CREATE TABLE {config.FINANCE_AGG_TABLE} AS
+        WITH d AS (
+            SELECT candidate_id, SUM(valor) AS total_receitas,
+                   COUNT(DISTINCT TRIM(doador_doc)) AS doadores_unicos
+            FROM {config.DONATIONS_TABLE} GROUP BY 1
+        ),
+        x AS (
+            SELECT candidate_id, SUM(valor) AS total_despesas,
+                   COUNT(DISTINCT fornecedor_doc) AS fornecedores_unicos
+            FROM {config.EXPENSES_TABLE} GROUP BY 1
+        )
+        SELECT c.id AS candidate_id,
+               COALESCE(d.total_receitas, 0) AS total_receitas,
+               COALESCE(x.total_despesas, 0) AS total_despesas,
+               COALESCE(d.doadores_unicos, 0) AS doadores_unicos,
+               COALESCE(x.fornecedores_unicos, 0) AS fornecedores_unicos
+        FROM {config.CANDIDATE_TABLE} c
+        LEFT JOIN d ON d.candidate_id = c.id
+        LEFT JOIN x ON x.candidate_id = c.id
+    """)
+    refresh_derived(con)
+    con.close()
+
+
+def build_dataset_file(path: Path, uf: str, cargo: str, ano: int = config.ANO, n_candidates: int = 30) -> None:
+    """Arquivo de um conjunto (ano, uf, cargo): o banco sintético com as tabelas renomeadas."""
+    source = path.with_name(path.stem + ".src.duckdb")
+    build_sample_db(source, n_candidates)
+    suffix = f"_{config.UF.lower()}_{config.CARGO}_{config.ANO}"
+    con = duckdb.connect(str(path))
+    con.execute(f"ATTACH '{source}' AS src (READ_ONLY)")
+    names = [r[0] for r in con.execute("SELECT table_name FROM information_schema.tables WHERE table_catalog = 'src'").fetchall()]
+    for name in names:
+        target = name.removesuffix(suffix) + f"_{uf}_{cargo}_{ano}"
+        con.execute(f"CREATE TABLE {target} AS SELECT * FROM src.{name}")
+    con.execute("DETACH src")
+    con.close()
+    source.unlink()
+
+
+@pytest.fixture
+def sample_db(tmp_path: Path) -> Path:
+    """Arquivo DuckDB sintético com todas as tabelas dos ETLs."""
+    path = tmp_path / "eleicoes.duckdb"
+    build_sample_db(path)
+    return path
+
+
+@pytest.fixture
+def sample_client(sample_db: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    """Cliente da API apontando para o banco sintético."""
+    monkeypatch.setattr(db_module, "_pool", db_module.ConnectionPool(db_path=sample_db))
+    monkeypatch.setattr(db_module, "_catalog", None)
+    monkeypatch.setattr(search_module, "_index", OrderedDict())
+    monkeypatch.setattr(datasets_module, "_registry", datasets_module.DatasetRegistry(sample_db.parent / "datasets"))
+    monkeypatch.setattr(api_main, "_response_cache", ResponseCache(max_bytes=8 * 1024 * 1024))
+    monkeypatch.setattr(profiling_module, "_slow_log", profiling_module.SlowQueryLog(sample_db.parent / "slow.jsonl"))
+    yield TestClient(api_main.app)
+    profiling_module.close_slow_log()
+    db_module.close_pool()
@@ -8,9 +8,12 @@ Requer: pip install pytest pytest-asyncio httpx
 
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
+from src.app import config
 from src.app.api.main import app
 
 
@@ -131,3 +134,417 @@ def test_offset_parameter(client: TestClient) -> None:
             ids1 = {item["id"] for item in data1["items"]}
             ids2 = {item["id"] for item in data2["items"]}
             assert len(ids1 & ids2) == 0  # intersecção vazia
+
+
+def test_candidates_from_summary(sample_client: TestClient) -> None:
+    """/candidates lê a tabela de resumo, ordenada por votos."""
+    response = sample_client.get("/candidates?limit=10")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["assets_enabled"] and data["votes_enabled"] and data["finance_enabled"]
+    votos = [item["total_votos"] for item in data["items"]]
+    assert len(votos) == 10
+    assert votos == sorted(votos, reverse=True)
+    assert all("total_receitas" in item for item in data["items"])
+
+
+def test_candidates_search_ignores_accents(sample_client: TestClient) -> None:
+    """Busca "jose" encontra "JOSÉ" e devolve score de similaridade."""
+    response = sample_client.get("/candidates?q=jose&limit=50")
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items
+    assert all(item["nome_urna"].startswith("JOSÉ") for item in items)
+    assert all(item["score"] == 1.0 for item in items)
+
+
+def test_candidates_cursor_pagination(sample_client: TestClient) -> None:
+    """Cursores percorrem todas as linhas sem repetir, na mesma ordem do offset."""
+    full = sample_client.get("/candidates?limit=1000").json()
+    assert full["has_more"] is False
+    assert full["next_cursor"] is None
+
+    ids, pages = [], []
+    data = sample_client.get("/candidates?limit=7").json()
+    while True:
+        pages.append(data)
+        ids.extend(item["id"] for item in data["items"])
+        if not data["has_more"]:
+            break
+        data = sample_client.get(f"/candidates?limit=7&cursor={data['next_cursor']}").json()
+    assert ids == [item["id"] for item in full["items"]]
+
+    back = sample_client.get(f"/candidates?limit=7&cursor={pages[2]['prev_cursor']}").json()
+    assert [i["id"] for i in back["items"]] == [i["id"] for i in pages[1]["items"]]
+    assert back["has_more"] is True
+
+
+def test_candidates_offset_reports_has_more(sample_client: TestClient) -> None:
+    """Modo offset continua funcionando e informa has_more exato."""
+    data = sample_client.get("/candidates?limit=10&offset=50").json()
+    assert len(data["items"]) == 10
+    assert data["has_more"] is False
+    assert data["prev_cursor"] is not None
+
+
+def test_candidates_paging_bounds(sample_client: TestClient) -> None:
+    """limit fora de 1..CANDIDATES_MAX_LIMIT ou offset negativo respondem 422, não página vazia ou 500."""
+    for query in ("limit=0", "limit=-1", f"limit={config.CANDIDATES_MAX_LIMIT + 1}", "offset=-5"):
+        assert sample_client.get(f"/candidates?{query}").status_code == 422, query
+    assert sample_client.get(f"/candidates?limit={config.CANDIDATES_MAX_LIMIT}").status_code == 200
+
+
+def test_candidates_invalid_cursor(sample_client: TestClient) -> None:
+    """Cursor inválido ou de outra busca responde 400."""
+    assert sample_client.get("/candidates?cursor=lixo").status_code == 400
+    token = sample_client.get("/candidates?limit=5").json()["next_cursor"]
+    assert sample_client.get(f"/candidates?q=silva&cursor={token}").status_code == 400
+    token = sample_client.get("/candidates?q=silva&limit=2").json()["next_cursor"]
+    assert token is not None
+    assert sample_client.get(f"/candidates?q=silva&limit=2&cursor={token}").status_code == 200
+    assert sample_client.get(f"/candidates?q=maria&limit=2&cursor={token}").status_code == 400
+    token = sample_client.get("/candidates?partido=P1&limit=2").json()["next_cursor"]
+    assert sample_client.get(f"/candidates?partido=P2&limit=2&cursor={token}").status_code == 400
+
+
+def _walk(client: TestClient, url: str) -> list[dict]:
+    """Percorre todas as páginas via next_cursor e devolve os itens."""
+    items: list[dict] = []
+    data = client.get(url).json()
+    while True:
+        items.extend(data["items"])
+        if not data["has_more"]:
+            return items
+        data = client.get(f"{url}&cursor={data['next_cursor']}").json()
+
+
+def test_candidates_sort_server_side(sample_client: TestClient) -> None:
+    """Ordenação no servidor vale para o conjunto todo, não só para a página."""
+    items = _walk(sample_client, "/candidates?limit=9&sort=receitas")
+    assert len(items) == 60
+    receitas = [i["total_receitas"] for i in items]
+    assert receitas == sorted(receitas, reverse=True)
+
+    asc = _walk(sample_client, "/candidates?limit=9&sort=receitas:asc")
+    assert [i["id"] for i in asc] == [i["id"] for i in reversed(items)]
+
+    multi = _walk(sample_client, "/candidates?limit=9&sort=partido,votos:desc")
+    keys = [(i["partido"], -i["total_votos"]) for i in multi]
+    assert keys == sorted(keys)
+    assert len({i["id"] for i in multi}) == 60
+
+
+def test_candidates_filters(sample_client: TestClient) -> None:
+    """Filtros de partido e faixa de valores são aplicados no SQL."""
+    items = _walk(sample_client, "/candidates?limit=10&partido=p1,P2&situacao=apto&min_votos=1")
+    assert len(items) == 27  # 30 de P1/P2, menos 10, 30 e 50 (INAPTO)
+    assert all(i["partido"] in ("P1", "P2") and i["situacao"] == "APTO" for i in items)
+
+    sem_bens = sample_client.get("/candidates?limit=100&max_bens=0").json()["items"]
+    assert {i["id"] for i in sem_bens} == set(range(0, 60, 4))
+
+
+def test_candidates_invalid_sort(sample_client: TestClient) -> None:
+    """Campo de ordenação desconhecido retorna 400; cursor não vale para outra ordenação."""
+    assert sample_client.get("/candidates?sort=idade").status_code == 400
+    assert sample_client.get("/candidates?sort=votos:cima").status_code == 400
+    token = sample_client.get("/candidates?limit=5").json()["next_cursor"]
+    assert sample_client.get(f"/candidates?sort=bens&cursor={token}").status_code == 400
+
+
+def test_candidates_batch_matches_single_endpoints(sample_client: TestClient) -> None:
+    """O lote devolve o mesmo que os endpoints individuais, na ordem pedida."""
+    ids = [7, 3, 12, 9999]
+    data = sample_client.get(f"/candidates/batch?ids={','.join(map(str, ids))}&top=5").json()
+    assert [item["id"] for item in data["items"]] == [7, 3, 12]
+    assert data["missing"] == [9999]
+    assert data["unavailable"] == []
+
+    for item in data["items"]:
+        cid = item["id"]
+        finance = sample_client.get(f"/candidates/{cid}/finance?top=5").json()
+        assert item["finance"]["summary"] == finance["summary"]
+        assert item["finance"]["top_doadores"] == finance["top_doadores"]
+        assert item["finance"]["top_fornecedores"] == finance["top_fornecedores"]
+        votes = sample_client.get(f"/candidates/{cid}/votes_municipio").json()["items"]
+        assert item["votes_municipio"] == votes
+        assets = sample_client.get(f"/candidates/{cid}/assets").json()["items"]
+        assert item["assets"] == assets
+        assert item["profile"]["id"] == cid
+
+    assert data["items"][2]["assets"] == []  # id 12 não declarou bens
+
+
+def test_candidates_batch_validation(sample_client: TestClient) -> None:
+    """ids e seções inválidos retornam 400; limites fora da faixa, 422."""
+    assert sample_client.get("/candidates/batch?ids=a,b").status_code == 400
+    assert sample_client.get("/candidates/batch?ids=1&sections=fotos").status_code == 400
+    for param in ("top", "limit", "assets_limit"):
+        for value in (0, -1, config.CANDIDATES_MAX_LIMIT + 1):
+            assert sample_client.get(f"/candidates/batch?ids=1&{param}={value}").status_code == 422, (param, value)
+    only = sample_client.get("/candidates/batch?ids=1&sections=assets").json()
+    assert set(only["items"][0]) == {"id", "assets"}
+
+
+def test_finance_ranked_matches_live_aggregation(sample_client: TestClient) -> None:
+    """Recorte da tabela pré-ranqueada é igual à agregação sob demanda (top > FINANCE_TOP_N)."""
+    from src.app.config import FINANCE_TOP_N
+
+    ranked = sample_client.get("/candidates/5/finance?top=3").json()
+    live = sample_client.get(f"/candidates/5/finance?top={FINANCE_TOP_N + 1}").json()
+    assert len(ranked["top_doadores"]) == 3
+    assert ranked["top_doadores"] == live["top_doadores"][:3]
+    assert ranked["top_fornecedores"] == live["top_fornecedores"][:3]
+    assert all(d["doc"].isdigit() for d in ranked["top_doadores"])
+    assert ranked["candidate_id"] == 5 and "total_receitas" in ranked["summary"]
+
+
+def test_candidates_arrow_and_parquet_formats(sample_client: TestClient) -> None:
+    """format=/Accept devolvem a mesma página em Arrow IPC e Parquet."""
+    import io
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    page = sample_client.get("/candidates?limit=7&sort=receitas").json()
+
+    arrow = sample_client.get(
+        "/candidates?limit=7&sort=receitas", headers={"Accept": "application/vnd.apache.arrow.stream"}
+    )
+    assert arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.to_pylist() == page["items"]
+    assert arrow.headers["x-has-more"] == "true"
+    assert arrow.headers["x-next-cursor"] == page["next_cursor"]
+
+    parquet = sample_client.get("/candidates/3/votes_municipio?format=parquet")
+    rows = pq.read_table(io.BytesIO(parquet.content)).to_pylist()
+    assert rows == sample_client.get("/candidates/3/votes_municipio").json()["items"]
+
+    finance = sample_client.get("/candidates/3/finance?format=arrow&top=2")
+    table = pa.ipc.open_stream(finance.content).read_all()
+    assert table.column("papel").to_pylist() == ["doador", "doador", "fornecedor", "fornecedor"]
+    assert "x-total-receitas" in finance.headers
+
+    assert sample_client.get("/candidates/3/assets?format=xml").status_code == 400
+
+
+def test_accept_honours_quality_and_order(sample_client: TestClient) -> None:
+    """Accept escolhe pelo maior q; no empate vale a ordem; q=0 recusa o tipo."""
+    from src.app.api import formats
+
+    arrow, json_ = "application/vnd.apache.arrow.stream", "application/json"
+    assert formats.negotiate("", f"{json_}, {arrow};q=0.1") == formats.JSON
+    assert formats.negotiate("", f"{json_}, {arrow}") == formats.JSON
+    assert formats.negotiate("", f"{arrow}, {json_}") == formats.ARROW
+    assert formats.negotiate("", f"{arrow};q=0.5, {json_};q=0.9") == formats.JSON
+    assert formats.negotiate("", f"{json_};q=0, application/x-parquet;q=0.2") == formats.PARQUET
+    assert formats.negotiate("", "text/html, */*;q=0.8") == formats.JSON
+    assert formats.negotiate("arrow", json_) == formats.ARROW
+
+    r = sample_client.get("/candidates/3/assets", headers={"Accept": f"{json_}, {arrow};q=0.1"})
+    assert r.headers["content-type"].startswith(json_)
+
+
+def test_partidos_from_cube(sample_client: TestClient) -> None:
+    """Totais por partido batem com a soma dos candidatos; quebras somam o total."""
+    items = sample_client.get("/partidos").json()["items"]
+    assert [p["rank_votos"] for p in items] == [1, 2, 3, 4]
+    assert sum(p["candidatos"] for p in items) == 60
+    assert abs(sum(p["pct_votos"] for p in items) - 1) < 1e-9
+
+    candidates = sample_client.get("/candidates?limit=100&partido=P1").json()["items"]
+    p1 = sample_client.get("/partidos/p1?limit=100").json()
+    assert p1["partido"]["total_votos"] == sum(c["total_votos"] for c in candidates)
+    assert p1["partido"]["eleitos"] == 5  # ids 1, 13, 25, 37, 49 (id % 6 == 1)
+    assert sum(g["candidatos"] for g in p1["situacao"]) == p1["partido"]["candidatos"]
+    assert [g["valor"] for g in p1["genero"]] == ["FEMININO"]
+    assert len(p1["candidatos"]) == 15
+    assert p1["candidatos"][0]["total_votos"] == max(c["total_votos"] for c in candidates)
+
+    assert sample_client.get("/partidos/XYZ").status_code == 404
+    for query in ("limit=0", "limit=-1", f"limit={config.CANDIDATES_MAX_LIMIT + 1}"):
+        assert sample_client.get(f"/partidos/p1?{query}").status_code == 422, query
+
+
+def test_municipios_ranking(sample_client: TestClient) -> None:
+    """Ranking por município soma 100% e pagina pelo rank."""
+    municipios = sample_client.get("/municipios").json()["items"]
+    assert [m["cd_municipio"] for m in municipios] == [71000, 71001, 71002, 71003, 71004]
+
+    page = sample_client.get("/municipios/71002/candidatos?limit=60").json()
+    assert page["municipio"]["municipio"] == "MUNICIPIO 2"
+    items = page["items"]
+    assert len(items) == 60 and page["has_more"] is False
+    assert abs(sum(i["pct_votos"] for i in items) - 1) < 1e-9
+    assert [i["votos"] for i in items] == sorted((i["votos"] for i in items), reverse=True)
+    assert page["municipio"]["lider_id"] == items[0]["id"]
+    assert sum(i["votos"] for i in items) == page["municipio"]["total_votos"]
+
+    # Votos do candidato no município batem com /votes_municipio
+    top = items[0]
+    votes = sample_client.get(f"/candidates/{top['id']}/votes_municipio?limit=10").json()["items"]
+    assert {"municipio": "MUNICIPIO 2", "votos": top["votos"]} in votes
+
+    second = sample_client.get("/municipios/71002/candidatos?limit=10&offset=10").json()
+    assert second["has_more"] is True and second["items"] == items[10:20]
+
+    assert sample_client.get("/municipios/1/candidatos").status_code == 404
+    for query in ("limit=0", "limit=-1", f"limit={config.CANDIDATES_MAX_LIMIT + 1}", "offset=-5"):
+        assert sample_client.get(f"/municipios/71002/candidatos?{query}").status_code == 422, query
+
+
+def test_derived_table_missing_returns_404(sample_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Sem a tabela derivada (ETL não rodou), partidos e municípios respondem 404 como os detalhes do candidato."""
+    from src.app.db import SchemaCatalog
+
+    derived = ("party_summary", "municipios", "votes_zona")
+    has = SchemaCatalog.has
+    monkeypatch.setattr(SchemaCatalog, "has", lambda self, table: not table.startswith(derived) and has(self, table))
+    for url in ("/partidos", "/partidos/P1", "/municipios", "/municipios/71002/candidatos", "/municipios/71002/zonas"):
+        r = sample_client.get(url)
+        assert r.status_code == 404, url
+        assert "não existe" in r.json()["detail"]
+
+
+def test_votes_zona_drilldown(sample_client: TestClient) -> None:
+    """Zonas do candidato somam seus votos; totais de zona fecham com o município."""
+    total = sample_client.get("/candidates/7/votes_municipio?limit=10").json()["items"]
+    zonas = sample_client.get("/candidates/7/votes_zona").json()["items"]
+    assert len(zonas) == 10  # 5 municípios x 2 zonas
+    assert sum(z["votos"] for z in zonas) == sum(m["votos"] for m in total)
+    assert abs(sum(z["pct_candidato"] for z in zonas) - 1) < 1e-9
+    assert all(0 <= z["pct_zona"] <= 1 for z in zonas)
+
+    filtered = sample_client.get("/candidates/7/votes_zona?cd_municipio=71003&limit=1").json()["items"]
+    assert len(filtered) == 1 and filtered[0]["cd_municipio"] == 71003
+
+    municipio = sample_client.get("/municipios/71003/candidatos?limit=100").json()["municipio"]
+    por_zona = sample_client.get("/municipios/71003/zonas").json()["items"]
+    assert [z["zona"] for z in por_zona] == [1, 2]
+    assert sum(z["total_votos"] for z in por_zona) == municipio["total_votos"]
+
+    zona = next(z for z in zonas if z["cd_municipio"] == 71003 and z["zona"] == 1)
+    assert zona["pct_zona"] == zona["votos"] / por_zona[0]["total_votos"]
+
+    assert sample_client.get("/municipios/1/zonas").status_code == 404
+
+
+def test_startup_is_read_only(sample_client: TestClient, sample_db, monkeypatch: pytest.MonkeyPatch) -> None:
+    """O startup só abre o banco read-only; os índices já vêm do ETL."""
+    import duckdb
+
+    modes = []
+    connect = duckdb.connect
+
+    def spy(database=":memory:", read_only=False, **kwargs):
+        modes.append(read_only)
+        return connect(database, read_only=read_only, **kwargs)
+
+    monkeypatch.setattr(duckdb, "connect", spy)
+    with sample_client as client:
+        assert client.get("/candidates?limit=3").status_code == 200
+    assert modes and all(modes)
+
+    con = connect(str(sample_db), read_only=True)
+    indexes = {r[0] for r in con.execute("SELECT index_name FROM duckdb_indexes()").fetchall()}
+    con.close()
+    assert "idx_candidates_sp_dep_fed_2022_id" in indexes
+
+
+def test_hot_swap_serves_new_version(sample_client: TestClient, sample_db) -> None:
+    """Publicar uma versão nova troca os dados servidos sem restart nem erro."""
+    from src.app import db as db_module
+    from src.app.etl.prepare import DatasetBuild
+
+    db_module.get_pool().swap_check = 0
+    first = sample_client.get("/candidates?limit=1")
+    assert first.status_code == 200
+    old_name = first.json()["items"][0]["nome_urna"]
+
+    build = DatasetBuild(sample_db)
+    con = build.connect()
+    con.execute("UPDATE candidates_sp_dep_fed_2022 SET nome_urna = 'NOVA VERSAO'")
+    build.publish(con)
+
+    second = sample_client.get("/candidates?limit=1")
+    assert second.status_code == 200
+    assert second.headers["x-cache"] == "MISS"
+    assert second.headers["etag"] != first.headers["etag"]
+    assert second.json()["items"][0]["nome_urna"] == "NOVA VERSAO" != old_name
+
+    health = sample_client.get("/health").json()
+    assert health["pool"]["file"] == build.path.name
+    assert health["pool"]["swaps"] == 1
+
+
+def test_dataset_params_serve_attached_file(sample_client: TestClient, sample_db) -> None:
+    """`uf`/`cargo`/`ano` escolhem o conjunto; arquivos em DATASETS_DIR são anexados."""
+    from tests.conftest import build_dataset_file
+
+    datasets_dir = sample_db.parent / "datasets"
+    datasets_dir.mkdir()
+    build_dataset_file(datasets_dir / "2022_mg_dep_est.duckdb", "mg", "dep_est", 2022, n_candidates=30)
+
+    listed = sample_client.get("/datasets").json()
+    assert listed["default"]["uf"] == "SP"
+    assert {(d["uf"], d["cargo"]) for d in listed["items"]} == {("SP", "dep_fed"), ("MG", "dep_est")}
+
+    default = sample_client.get("/candidates?limit=100").json()["items"]
+    mg = sample_client.get("/candidates?limit=100&uf=MG&cargo=dep_est&ano=2022")
+    assert mg.status_code == 200
+    assert len(mg.json()["items"]) == 30 != len(default)
+    assert mg.json()["votes_enabled"] is True
+
+    # Busca e rotas de detalhe usam as tabelas do conjunto
+    found = sample_client.get("/candidates?q=maria&uf=mg&cargo=dep_est").json()["items"]
+    assert found and all(item["id"] < 30 for item in found)
+    assert sample_client.get("/partidos?uf=MG&cargo=dep_est").status_code == 200
+    assert sample_client.get("/candidates/1/finance?uf=MG&cargo=dep_est").status_code == 200
+    export = sample_client.get("/export/candidates?format=ndjson&uf=MG&cargo=dep_est")
+    assert len(export.text.splitlines()) == 30
+
+    # Cache separado por conjunto
+    again = sample_client.get("/candidates?limit=100&uf=MG&cargo=dep_est&ano=2022")
+    assert again.headers["x-cache"] == "HIT"
+    assert again.headers["etag"] != sample_client.get("/candidates?limit=100").headers["etag"]
+
+    assert sample_client.get("/candidates?uf=RJ&cargo=dep_est").status_code == 404
+    assert sample_client.get("/candidates?cargo=vereador").status_code == 404
+
+
+def test_dataset_lookup_runs_off_the_event_loop(
+    sample_client: TestClient, sample_db, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Resolver o conjunto, ler a versão e abrir cursores (catálogo, queries) não rodam no event loop."""
+    from tests.conftest import build_dataset_file
+
+    from src.app import datasets as datasets_module
+    from src.app import db as db_module
+
+    datasets_dir = sample_db.parent / "datasets"
+    datasets_dir.mkdir()
+    build_dataset_file(datasets_dir / "2022_mg_dep_est.duckdb", "mg", "dep_est", 2022, n_candidates=30)
+
+    on_loop: list[str] = []
+
+    def spy(cls, name):
+        original = getattr(cls, name)
+
+        def wrapper(self, *args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(name)
+            except RuntimeError:
+                pass
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(cls, name, wrapper)
+
+    spy(datasets_module.DatasetRegistry, "resolve")
+    spy(datasets_module.DatasetRegistry, "version")
+    spy(db_module.ConnectionPool, "cursor")
+
+    for url in ("/candidates?uf=MG&cargo=dep_est", "/candidates?uf=MG&cargo=dep_est", "/partidos", "/candidates/1/assets"):
+        assert sample_client.get(url).status_code == 200
+    assert on_loop == []
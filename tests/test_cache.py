@@ -0,0 +1,108 @@
+"""
+Testes do cache de respostas versionado (src/app/api/cache.py).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app.api.cache import CachedResponse, ResponseCache, not_modified
+
+
+def test_lru_evicts_by_bytes() -> None:
+    """Entradas menos usadas saem quando o total passa do limite."""
+    cache = ResponseCache(max_bytes=10)
+    cache.put(("a",), CachedResponse(b"12345", "text/plain"))
+    cache.put(("b",), CachedResponse(b"12345", "text/plain"))
+    assert cache.get(("a",)) is not None  # "a" vira o mais recente
+    cache.put(("c",), CachedResponse(b"123", "text/plain"))
+    assert cache.get(("b",)) is None
+    assert cache.get(("c",)) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] == 8
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_not_modified_rules() -> None:
+    """If-None-Match tem precedência; If-Modified-Since compara segundos."""
+    assert not_modified('"v1", "v2"', None, '"v2"', 0)
+    assert not not_modified('"v1"', "Thu, 01 Jan 2099 00:00:00 GMT", '"v2"', 0)
+    assert not_modified(None, "Thu, 01 Jan 2099 00:00:00 GMT", '"v2"', 1000.5)
+    assert not not_modified(None, "lixo", '"v2"', 0)
+
+
+def test_api_cache_hit_and_304(sample_client: TestClient) -> None:
+    """Segunda chamada idêntica vem do cache; ETag atual responde 304."""
+    first = sample_client.get("/candidates?limit=5")
+    assert first.headers["x-cache"] == "MISS"
+    second = sample_client.get("/candidates?limit=5")
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert "last-modified" in first.headers
+
+    revalidated = sample_client.get("/candidates?limit=5", headers={"If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert sample_client.get("/health").json()["cache"]["hits"] == 1
+
+
+def test_api_cache_validates_before_304(sample_client: TestClient) -> None:
+    """Parâmetros inválidos respondem 422 mesmo com ETag atual (o cache não responde antes da validação)."""
+    etag = sample_client.get("/candidates?limit=5").headers["etag"]
+    for url in ("/candidates?limit=-3", "/candidates?limit=abc", "/municipios/abc/candidatos"):
+        r = sample_client.get(url, headers={"If-None-Match": etag})
+        assert r.status_code == 422, url
+
+
+def test_api_cache_maps_dataset_errors(sample_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Falhas ao ler a versão do conjunto viram 503, como nos handlers, e não 500."""
+    import duckdb
+
+    from src.app.api import main
+    from src.app.db import PoolExhausted
+
+    for exc in (PoolExhausted("sem cursores"), duckdb.IOException("arquivo sumiu")):
+        def broken(*args, exc=exc):
+            raise exc
+
+        monkeypatch.setattr(main, "_dataset_state", broken)
+        r = sample_client.get("/candidates?limit=5")
+        assert r.status_code == 503, exc
+        assert r.headers["retry-after"] == "1"
+
+
+def test_api_cache_invalidated_by_new_version(sample_client: TestClient, sample_db: Path) -> None:
+    """Quando o arquivo do banco muda, ETag muda e o cache não é usado."""
+    first = sample_client.get("/candidates/1/assets")
+    st = os.stat(sample_db)
+    os.utime(sample_db, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    after = sample_client.get("/candidates/1/assets", headers={"If-None-Match": first.headers["etag"]})
+    assert after.status_code == 200
+    assert after.headers["x-cache"] == "MISS"
+    assert after.headers["etag"] != first.headers["etag"]
+
+
+def test_api_cache_varies_on_accept(sample_client: TestClient) -> None:
+    """JSON e Arrow da mesma URL têm ETags diferentes e `Vary: Accept`; o ETag de um não revalida o outro."""
+    arrow = {"Accept": "application/vnd.apache.arrow.stream"}
+    as_json = sample_client.get("/candidates?limit=2", headers={"Origin": "http://dash"})
+    as_arrow = sample_client.get("/candidates?limit=2", headers=arrow)
+    assert as_json.headers["etag"] != as_arrow.headers["etag"]
+    assert as_arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    # Accept entra sem apagar nem duplicar o Vary do CORS (Origin, conforme a versão do Starlette)
+    vary = [v.strip().lower() for v in as_json.headers["vary"].split(",")]
+    assert "accept" in vary and len(vary) == len(set(vary))
+    assert "accept" in sample_client.get("/candidates?limit=2", headers=arrow).headers["vary"].lower()  # HIT
+
+    cross = sample_client.get("/candidates?limit=2", headers={**arrow, "If-None-Match": as_json.headers["etag"]})
+    assert cross.status_code == 200
+    assert cross.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    same = sample_client.get("/candidates?limit=2", headers={**arrow, "If-None-Match": as_arrow.headers["etag"]})
+    assert same.status_code == 304 and same.headers["vary"] == "Accept"
@@ -0,0 +1,142 @@
+"""
+Testes para utilitários de banco (src/app/db.py).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from src.app.db import ConnectionPool, PoolExhausted, SchemaCatalog, dataset_version, resolve_db_path
+from src.app.etl.prepare import publish_db
+
+
+@pytest.fixture
+def db_file(tmp_path: Path) -> Path:
+    """Banco DuckDB mínimo em diretório temporário."""
+    path = tmp_path / "test.duckdb"
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE t AS SELECT range AS id FROM range(10)")
+    con.close()
+    return path
+
+
+def test_pool_cursor_executes_query(db_file: Path) -> None:
+    """Cursor do pool lê o banco e é devolvido ao final do bloco."""
+    pool = ConnectionPool(db_path=db_file, size=2, timeout=1)
+    with pool.cursor() as con:
+        assert con.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 10
+        assert pool.in_use == 1
+    assert pool.in_use == 0
+    pool.close()
+
+
+def test_pool_is_bounded(db_file: Path) -> None:
+    """Acima de `size` cursores simultâneos o pool recusa com PoolExhausted."""
+    pool = ConnectionPool(db_path=db_file, size=1, timeout=0.05)
+    with pool.cursor():
+        with pytest.raises(PoolExhausted):
+            with pool.cursor():
+                pass
+    pool.close()
+
+
+def test_pool_health_and_reopen(db_file: Path) -> None:
+    """Health check responde e o pool reabre depois de fechado."""
+    pool = ConnectionPool(db_path=db_file, size=2, timeout=1)
+    assert pool.health()["ok"] is True
+    pool.close()
+    assert not pool.is_open
+    with pool.cursor() as con:
+        assert con.execute("SELECT 1").fetchone()[0] == 1
+    pool.close()
+
+
+def test_pool_missing_db(tmp_path: Path) -> None:
+    """Banco inexistente aparece como falha no health check."""
+    pool = ConnectionPool(db_path=tmp_path / "nao_existe.duckdb")
+    status = pool.health()
+    assert status["ok"] is False
+    assert not pool.is_open
+
+
+def test_catalog_loads_and_refreshes_on_file_change(db_file: Path) -> None:
+    """Catálogo lista tabelas/colunas e só recarrega quando o arquivo muda."""
+    pool = ConnectionPool(db_path=db_file, size=2, timeout=1)
+    catalog = SchemaCatalog(pool)
+    assert catalog.has("t")
+    assert catalog.columns("t") == ["id"]
+    assert not catalog.has("nova")
+    version = catalog.version
+    assert version == dataset_version(db_file)
+
+    pool.close()
+    con = duckdb.connect(str(db_file))
+    con.execute("CREATE TABLE nova AS SELECT 1 AS x")
+    con.close()
+
+    assert catalog.has("nova")
+    assert catalog.version != version
+    pool.close()
+
+
+def _version(path: Path, value: int) -> Path:
+    con = duckdb.connect(str(path))
+    con.execute(f"CREATE TABLE t AS SELECT {value} AS v")
+    con.close()
+    return path
+
+
+def test_pool_swaps_published_version_and_drains_old(tmp_path: Path) -> None:
+    """Versão nova publicada: próximos cursores leem dela e a antiga fecha ao esvaziar."""
+    db = tmp_path / "eleicoes.duckdb"
+    publish_db(_version(tmp_path / "eleicoes.1.duckdb", 1), db)
+    pool = ConnectionPool(db_path=db, size=2, timeout=1, swap_check=0)
+
+    with pool.cursor() as in_flight:
+        assert in_flight.execute("SELECT v FROM t").fetchone()[0] == 1
+        publish_db(_version(tmp_path / "eleicoes.2.duckdb", 2), db)
+        assert resolve_db_path(db).name == "eleicoes.2.duckdb"
+        with pool.cursor() as con:
+            assert con.execute("SELECT v FROM t").fetchone()[0] == 2
+        # A requisição em andamento termina na versão antiga
+        assert in_flight.execute("SELECT v FROM t").fetchone()[0] == 1
+        assert pool.draining == 1
+
+    assert pool.draining == 0
+    assert pool.swaps == 1
+    assert pool.health()["file"] == "eleicoes.2.duckdb"
+    pool.close()
+
+
+def test_pool_attaches_datasets_and_evicts_lru(db_file: Path, tmp_path: Path) -> None:
+    """Conjuntos em arquivo próprio são anexados sob demanda e desanexados por LRU."""
+    from src.app.datasets import Dataset
+
+    sets = []
+    for uf, value in (("mg", 1), ("rj", 2)):
+        ds = Dataset(2022, uf, "dep_est", tmp_path / f"2022_{uf}_dep_est.duckdb")
+        con = duckdb.connect(str(ds.path))
+        con.execute(f"CREATE TABLE candidates_{uf}_dep_est_2022 AS SELECT {value} AS v")
+        con.close()
+        sets.append(ds)
+
+    pool = ConnectionPool(db_path=db_file, size=2, timeout=1, max_attached=1)
+    mg, rj = sets
+    with pool.cursor(mg) as con:
+        assert con.execute(f"SELECT v FROM {mg.tables.candidate}").fetchone()[0] == 1
+    with pool.cursor(rj) as con:
+        assert con.execute(f"SELECT v FROM {rj.tables.candidate}").fetchone()[0] == 2
+        assert pool.evictions == 1
+        # rj em uso não pode ser desanexado: o limite estoura até ele ser liberado
+        with pool.cursor(mg) as other:
+            assert other.execute(f"SELECT v FROM {mg.tables.candidate}").fetchone()[0] == 1
+        assert pool.health()["attached"] == [rj.alias, mg.alias]
+
+    catalog = SchemaCatalog(pool, dataset=mg)
+    assert catalog.tables == {mg.tables.candidate: ["v"]}
+    pool.close()
@@ -0,0 +1,454 @@
+"""
+Testes para as tabelas derivadas dos ETLs (src/app/etl/derived.py).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+import zipfile
+from pathlib import Path
+from typing import Callable, Iterator
+
+import duckdb
+import pytest
+
+from src.app import config
+from src.app.datasets import Dataset, dataset_db_path
+from src.app.db import pointer_path, resolve_db_path
+from src.app.etl import load_assets_2022_sp_dep_fed as load_assets
+from src.app.etl import load_candidates_2022_sp_dep_fed as load_candidates
+from src.app.etl import load_finance_2022_sp_dep_fed as load_finance
+from src.app.etl import tse_parquet
+from src.app.etl.derived import build_candidate_summary, build_finance_top, build_party_summary
+from src.app.etl.pipeline import Pipeline, Stage, StageFailed, select_stages, stages_for
+from src.app.etl.prepare import DatasetBuild, version_paths
+from src.app.etl.tse_parquet import stage_zip
+from src.app.etl.tse_schema import BEM_CANDIDATO, CONSULTA_CAND, Column, FileSchema, SchemaMismatch, schema_for
+from src.app.etl.tse_zip import pick_members, read_header, zip_csv
+
+
+def test_candidate_summary_one_row_per_candidate(sample_db: Path) -> None:
+    """Resumo tem uma linha por candidato e soma os agregados."""
+    con = duckdb.connect(str(sample_db))
+    n_cand = con.execute(f"SELECT COUNT(*) FROM {config.CANDIDATE_TABLE}").fetchone()[0]
+    n_summary = con.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT id) FROM {config.CANDIDATE_SUMMARY_TABLE}"
+    ).fetchone()
+    assert n_summary == (n_cand, n_cand)
+
+    bens = con.execute(
+        f"SELECT total_bens FROM {config.CANDIDATE_SUMMARY_TABLE} WHERE id = 4"
+    ).fetchone()[0]
+    assert bens == 0  # candidato sem bens vira zero
+    con.close()
+
+
+def test_candidate_summary_without_aggregates(tmp_path: Path) -> None:
+    """Sem tabelas de agregados o resumo é criado com zeros."""
+    con = duckdb.connect(str(tmp_path / "db.duckdb"))
+    con.execute(f"""
+        CREATE TABLE {config.CANDIDATE_TABLE} AS
+        SELECT 1::BIGINT AS id, '10' AS numero, 'A' AS nome_urna, 'A A' AS nome_completo,
+               'P' AS partido, 'SP' AS uf, 'DEPUTADO FEDERAL' AS cargo, 'APTO' AS situacao
+    """)
+    assert build_candidate_summary(con) == 1
+    row = con.execute(
+        f"SELECT total_votos, total_bens, total_receitas FROM {config.CANDIDATE_SUMMARY_TABLE}"
+    ).fetchone()
+    assert row == (0, 0.0, 0.0)
+
+    # Sem situacao_turno não dá para saber quem foi eleito
+    assert build_party_summary(con) == 1
+    eleitos = con.execute(
+        f"SELECT eleitos FROM {config.PARTY_SUMMARY_TABLE} WHERE dimensao = 'total'"
+    ).fetchone()[0]
+    assert eleitos is None
+    con.close()
+
+
+def test_finance_top_ranked_and_normalized(sample_db: Path) -> None:
+    """Top doadores guarda no máximo top_n por candidato, com chaves normalizadas."""
+    con = duckdb.connect(str(sample_db))
+    build_finance_top(con, top_n=2)
+    ranks = con.execute(
+        f"SELECT candidate_id, MAX(rank), COUNT(*) FROM {config.TOP_DONORS_TABLE} GROUP BY 1"
+    ).fetchall()
+    assert ranks and all(r[1] == 2 and r[2] == 2 for r in ranks)
+
+    nome, doc = con.execute(f"SELECT nome, doc FROM {config.TOP_DONORS_TABLE} LIMIT 1").fetchone()
+    assert doc.isdigit() and nome == nome.strip().upper()
+
+    totals = con.execute(
+        f"SELECT total FROM {config.TOP_DONORS_TABLE} WHERE candidate_id = 1 ORDER BY rank"
+    ).fetchall()
+    assert totals[0][0] >= totals[1][0]
+    con.close()
+
+
+def test_dataset_build_publishes_copy_and_prunes(sample_db: Path) -> None:
+    """ETL grava numa cópia; a publicada só muda com o ponteiro, e versões velhas somem."""
+    before = sample_db.stat().st_mtime_ns
+    builds = []
+    for nome in ("PRIMEIRA", "SEGUNDA", "TERCEIRA", "QUARTA"):
+        build = DatasetBuild(sample_db)
+        con = build.connect()
+        con.execute(f"UPDATE {config.CANDIDATE_TABLE} SET nome_urna = '{nome}' WHERE id = 1")
+        build.publish(con)
+        builds.append(build.path)
+
+    assert sample_db.stat().st_mtime_ns == before  # arquivo antigo intocado
+    assert pointer_path(sample_db).read_text().strip() == builds[-1].name
+    assert resolve_db_path(sample_db) == builds[-1]
+    assert version_paths(sample_db) == builds[-3:]  # ELEICOES_DB_KEEP_VERSIONS=3
+
+    con = duckdb.connect(str(builds[-1]), read_only=True)
+    nome = con.execute(f"SELECT nome_urna FROM {config.CANDIDATE_SUMMARY_TABLE} WHERE id = 1").fetchone()[0]
+    con.close()
+    assert nome == "QUARTA"  # derivadas reconstruídas na versão nova
+
+    build = DatasetBuild(sample_db)
+    build.discard(build.connect())
+    assert not build.path.exists()
+
+
+def _stage_tables(name: str) -> tuple[str, ...]:
+    return (f"{name}_sp_dep_fed_2022",)
+
+
+def test_pipeline_runs_independent_stages_in_parallel(tmp_path: Path) -> None:
+    """Estágios sem dependência entre si rodam juntos e tudo sai numa versão só."""
+    both_running = threading.Barrier(2, timeout=10)
+
+    def load_candidates(con: duckdb.DuckDBPyConnection) -> None:
+        con.execute(f"""
+            CREATE TABLE {config.CANDIDATE_TABLE} AS
+            SELECT range::BIGINT AS id, '10' AS numero, 'A' AS nome_urna, 'A A' AS nome_completo,
+                   'P' AS partido, 'SP' AS uf, 'DEPUTADO FEDERAL' AS cargo, 'APTO' AS situacao
+            FROM range(5)
+        """)
+
+    def loader(name: str):
+        def load(con: duckdb.DuckDBPyConnection) -> None:
+            both_running.wait()  # só passa se o outro estágio estiver rodando ao mesmo tempo
+            con.execute(f"CREATE TABLE {name}_sp_dep_fed_2022 AS SELECT id FROM {config.CANDIDATE_TABLE}")
+        return load
+
+    stages = (
+        Stage("candidates", load_candidates, (config.CANDIDATE_TABLE,)),
+        Stage("a", loader("a"), _stage_tables("a"), ("candidates",)),
+        Stage("b", loader("b"), _stage_tables("b"), ("candidates",)),
+    )
+    db = tmp_path / "eleicoes.duckdb"
+    staging = tmp_path / "staging"
+    published = Pipeline(stages, db_path=db, workers=3, staging_dir=staging, all_stages=stages).run()
+
+    assert resolve_db_path(db) == published
+    con = duckdb.connect(str(published), read_only=True)
+    assert con.execute("SELECT COUNT(*) FROM a_sp_dep_fed_2022").fetchone()[0] == 5
+    assert con.execute("SELECT COUNT(*) FROM b_sp_dep_fed_2022").fetchone()[0] == 5
+    assert con.execute(f"SELECT COUNT(*) FROM {config.CANDIDATE_SUMMARY_TABLE}").fetchone()[0] == 5
+    con.close()
+    assert not list(staging.iterdir())
+
+    # --only: dependências fora da seleção vêm da versão publicada
+    assert [s.name for s in select_stages(stages, only=["b"])] == ["b"]
+    assert [s.name for s in select_stages(stages, start="candidates")] == ["candidates", "a", "b"]
+    both_running = threading.Barrier(1)  # agora "b" roda sozinho
+    second = Pipeline(select_stages(stages, only=["b"]), db_path=db, staging_dir=staging, all_stages=stages).run()
+    assert resolve_db_path(db) == second != published
+
+
+def test_pipeline_fails_fast_without_publishing(tmp_path: Path) -> None:
+    """Um estágio com erro cancela os dependentes e nada é publicado."""
+    ran: list[str] = []
+
+    def broken(con: duckdb.DuckDBPyConnection) -> None:
+        raise RuntimeError("arquivo do TSE corrompido")
+
+    def dependent(con: duckdb.DuckDBPyConnection) -> None:
+        ran.append("dependent")
+
+    stages = (
+        Stage("candidates", broken, (config.CANDIDATE_TABLE,)),
+        Stage("a", dependent, _stage_tables("a"), ("candidates",)),
+    )
+    db = tmp_path / "eleicoes.duckdb"
+    with pytest.raises(StageFailed, match="candidates"):
+        Pipeline(stages, db_path=db, staging_dir=tmp_path / "staging", all_stages=stages).run()
+
+    assert ran == []
+    assert not pointer_path(db).exists()
+    assert version_paths(db) == []
+    assert not list((tmp_path / "staging").iterdir())
+
+
+CAND_HEADER = [
+    "SQ_CANDIDATO", "NR_CANDIDATO", "NM_URNA_CANDIDATO", "NM_CANDIDATO", "SG_PARTIDO", "SG_UF", "DS_CARGO",
+    "DS_SITUACAO_CANDIDATURA", "DS_OCUPACAO", "DS_GRAU_INSTRUCAO", "DS_ESTADO_CIVIL", "DS_GENERO",
+    "DT_NASCIMENTO",
+]
+
+
+def _tse_zip(path: Path, members: dict[str, list[list[str]]]) -> Path:
+    """ZIP no formato do TSE: CSVs com ';', aspas e CP1252."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, rows in members.items():
+            text = "\r\n".join(";".join(f'"{v}"' for v in row) for row in rows) + "\r\n"
+            z.writestr(name, text.encode("cp1252"))
+    return path
+
+
+def _cand_row(sq: int, uf: str, nome: str, cargo: str = "DEPUTADO FEDERAL") -> list[str]:
+    return [str(sq), "1234", nome, nome, "PT", uf, cargo, "APTO", "", "", "", "", "01/01/1970"]
+
+
+def test_zip_csv_streams_member_without_extracting(tmp_path: Path) -> None:
+    """O CSV é decodificado de CP1252 direto do ZIP; nada é gravado em disco."""
+    zip_path = _tse_zip(tmp_path / "consulta_cand_2022.zip", {
+        "consulta_cand_2022_AC.csv": [CAND_HEADER, _cand_row(1, "AC", "ACRE")],
+        "consulta_cand_2022_BRASIL.csv": [
+            CAND_HEADER, _cand_row(1, "AC", "ACRE"), _cand_row(2, "SP", "JOÃO ÇÉU"),
+        ],
+    })
+    member, = pick_members(zip_path)
+    assert member == "consulta_cand_2022_BRASIL.csv"
+    assert read_header(zip_path, member) == CAND_HEADER
+
+    con = duckdb.connect()
+    with zip_csv(con, "cand_csv", zip_path, member, ["SQ_CANDIDATO", "NM_URNA_CANDIDATO", "DS_OCUPACAO"]):
+        rows = con.execute("SELECT * FROM cand_csv ORDER BY SQ_CANDIDATO").fetchall()
+    assert rows == [("1", "ACRE", None), ("2", "JOÃO ÇÉU", None)]  # vazio vira NULL
+    with pytest.raises(KeyError, match="NR_TITULO"):
+        with zip_csv(con, "cand_csv", zip_path, member, ["NR_TITULO"]):
+            pass
+    con.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["consulta_cand_2022.zip"]
+
+
+def test_pick_members_prefers_uf_files(tmp_path: Path) -> None:
+    """Só os CSVs das UFs pedidas são lidos; sem algum deles, o nacional."""
+    zip_path = _tse_zip(tmp_path / "consulta_cand_2022.zip", {
+        "consulta_cand_2022_AC.csv": [CAND_HEADER, _cand_row(1, "AC", "ACRE")],
+        "consulta_cand_2022_SP.csv": [CAND_HEADER, _cand_row(2, "SP", "SÃO PAULO")],
+        "consulta_cand_2022_BRASIL.csv": [
+            CAND_HEADER, _cand_row(1, "AC", "ACRE"), _cand_row(2, "SP", "SÃO PAULO"), _cand_row(3, "RJ", "RIO"),
+        ],
+    })
+    assert pick_members(zip_path, ["sp"]) == ["consulta_cand_2022_SP.csv"]
+    assert pick_members(zip_path, ["SP", "AC"]) == ["consulta_cand_2022_SP.csv", "consulta_cand_2022_AC.csv"]
+    assert pick_members(zip_path, ["SP", "RJ"]) == ["consulta_cand_2022_BRASIL.csv"]
+
+    con = duckdb.connect()
+    with zip_csv(con, "cand_csv", zip_path, pick_members(zip_path, ["SP", "AC"]), ["SQ_CANDIDATO", "SG_UF"]):
+        rows = con.execute("SELECT SQ_CANDIDATO, SG_UF FROM cand_csv ORDER BY 1").fetchall()
+    assert rows == [("1", "AC"), ("2", "SP")]
+    con.close()
+
+
+def test_loaders_read_tse_zips(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Candidatos, bens e finanças saem dos arquivos do TSE, filtrados pela UF/cargo e pelo join com candidatos."""
+    cand_zip = _tse_zip(tmp_path / "consulta_cand_2022.zip", {
+        "consulta_cand_2022_BRASIL.csv": [
+            CAND_HEADER,
+            _cand_row(1, "SP", "ANA"),
+            _cand_row(2, "SP", "BIA", cargo="SENADOR"),
+            _cand_row(3, "RJ", "CAIO"),
+        ],
+    })
+    bens_zip = _tse_zip(tmp_path / "bem_candidato_2022.zip", {
+        "bem_candidato_2022_BRASIL.csv": [
+            ["SQ_CANDIDATO", "SG_UF", "DS_TIPO_BEM_CANDIDATO", "DS_BEM_CANDIDATO", "VR_BEM_CANDIDATO"],
+            ["1", "SP", "Imóvel", "Casa", "1.234,50"],
+            ["1", "SP", "Veículo", "Carro", "100,00"],
+            ["3", "RJ", "Imóvel", "Apartamento", "9,99"],
+        ],
+    })
+    finance_dir = tmp_path / "prestacao_contas_candidatos_2022"
+    finance_dir.mkdir()
+    finance = {
+        load_finance.RECEITAS_BASE: [
+            ["SQ_CANDIDATO", "SQ_PRESTADOR_CONTAS", "SG_UF", "DS_CARGO", "VR_RECEITA", "NR_CPF_CNPJ_DOADOR", "NM_DOADOR"],
+            ["1", "10", "SP", "DEPUTADO FEDERAL", "1.000,00", "00123", "DOADOR"],
+            ["3", "30", "RJ", "DEPUTADO FEDERAL", "5,00", "00456", "OUTRO"],
+        ],
+        load_finance.DESP_PAGAS_BASE: [
+            ["SQ_PRESTADOR_CONTAS", "SQ_DESPESA", "SG_UF", "DS_CARGO", "VR_PAGTO_DESPESA"],
+            ["10", "7", "SP", "DEPUTADO FEDERAL", "250,50"],
+        ],
+        load_finance.DESP_CONTR_BASE: [
+            ["SQ_PRESTADOR_CONTAS", "SQ_DESPESA", "SG_UF", "DS_CARGO", "NR_CPF_CNPJ_FORNECEDOR", "NM_FORNECEDOR"],
+            ["10", "7", "SP", "DEPUTADO FEDERAL", "00999", "GRÁFICA"],
+        ],
+    }
+    for base, rows in finance.items():
+        text = "\r\n".join(";".join(f'"{v}"' for v in row) for row in rows) + "\r\n"
+        (finance_dir / f"{base}_BRASIL.csv").write_bytes(text.encode("cp1252"))
+    monkeypatch.setattr(load_candidates, "ZIP_PATH", cand_zip)
+    monkeypatch.setattr(load_assets, "ZIP_PATH", bens_zip)
+    monkeypatch.setattr(load_finance, "DATA_DIR", finance_dir)
+    monkeypatch.setattr(tse_parquet, "PARQUET_CACHE_DIR", tmp_path / "parquet")
+
+    con = duckdb.connect(str(tmp_path / "eleicoes.duckdb"))
+    load_candidates.load(con)
+    load_assets.load(con)
+    load_finance.load(con)
+    assert con.execute(f"SELECT id, nome_urna FROM {config.CANDIDATE_TABLE}").fetchall() == [(1, "ANA")]
+    assert con.execute(
+        f"SELECT candidate_id, total_bens, qtd_bens FROM {config.ASSETS_AGG_TABLE}"
+    ).fetchall() == [(1, 1334.5, 2)]
+    assert con.execute(f"SELECT * FROM {config.DONATIONS_TABLE}").fetchall() == [
+        (1, 1000.0, "00123", "DOADOR")
+    ]
+    assert con.execute(f"SELECT * FROM {config.EXPENSES_TABLE}").fetchall() == [
+        (1, 250.5, "00999", "GRÁFICA")
+    ]
+    con.close()
+
+
+@pytest.fixture
+def env_uf(monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable[[str], None]]:
+    """Troca ELEICOES_UF e recarrega o config; restaura os dois no fim."""
+    def set_uf(uf: str) -> None:
+        monkeypatch.setenv("ELEICOES_UF", uf)
+        importlib.reload(config)
+
+    yield set_uf
+    monkeypatch.undo()
+    importlib.reload(config)
+
+
+def test_loaders_read_members_of_configured_uf(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, env_uf: Callable[[str], None]
+) -> None:
+    """ELEICOES_UF escolhe o CSV da UF dentro do ZIP e o sufixo das tabelas."""
+    cand_zip = _tse_zip(tmp_path / "consulta_cand_2022.zip", {
+        "consulta_cand_2022_SP.csv": [CAND_HEADER, _cand_row(1, "SP", "ANA")],
+        "consulta_cand_2022_RJ.csv": [CAND_HEADER, _cand_row(2, "RJ", "BIA")],
+        # o nacional diverge de propósito: só é lido se faltar o CSV da UF
+        "consulta_cand_2022_BRASIL.csv": [CAND_HEADER, _cand_row(1, "SP", "ANA"), _cand_row(2, "RJ", "NACIONAL")],
+    })
+    monkeypatch.setattr(load_candidates, "ZIP_PATH", cand_zip)
+    monkeypatch.setattr(tse_parquet, "PARQUET_CACHE_DIR", tmp_path / "parquet")
+    env_uf("RJ")
+    assert config.CANDIDATE_TABLE == "candidates_rj_dep_fed_2022"
+
+    con = duckdb.connect(str(tmp_path / "eleicoes.duckdb"))
+    load_candidates.load(con)
+    assert con.execute(f"SELECT id, nome_urna, uf FROM {config.CANDIDATE_TABLE}").fetchall() == [(2, "BIA", "RJ")]
+    con.close()
+    cache = tmp_path / "parquet" / "consulta_cand_2022"
+    assert [d.name for d in cache.glob("*/SG_UF=*")] == ["SG_UF=RJ"]  # só o membro RJ foi convertido
+
+
+def test_pipeline_builds_other_dataset_file(
+    tmp_path: Path, sample_db: Path, sample_client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """O pipeline de outro conjunto filtra UF/cargo dele e grava o arquivo que a API serve por `?uf=`."""
+    cand_zip = _tse_zip(tmp_path / "consulta_cand_2022.zip", {
+        "consulta_cand_2022_BRASIL.csv": [
+            CAND_HEADER,
+            _cand_row(1, "SP", "ANA", cargo="DEPUTADO ESTADUAL"),
+            _cand_row(2, "MG", "BIA", cargo="DEPUTADO ESTADUAL"),
+            _cand_row(3, "MG", "CAIO", cargo="DEPUTADO ESTADUAL"),
+            _cand_row(4, "MG", "DORA"),
+        ],
+    })
+    bens_zip = _tse_zip(tmp_path / "bem_candidato_2022.zip", {
+        "bem_candidato_2022_BRASIL.csv": [
+            ["SQ_CANDIDATO", "SG_UF", "DS_TIPO_BEM_CANDIDATO", "DS_BEM_CANDIDATO", "VR_BEM_CANDIDATO"],
+            ["1", "SP", "Imóvel", "Casa", "9,99"],
+            ["2", "MG", "Imóvel", "Casa", "500,00"],
+        ],
+    })
+    monkeypatch.setattr(load_candidates, "ZIP_PATH", cand_zip)
+    monkeypatch.setattr(load_assets, "ZIP_PATH", bens_zip)
+    monkeypatch.setattr(tse_parquet, "PARQUET_CACHE_DIR", tmp_path / "parquet")
+
+    mg = Dataset(config.ANO, "mg", "dep_est")
+    db = dataset_db_path(mg, datasets_dir=sample_db.parent / "datasets")
+    assert db.name == "2022_mg_dep_est.duckdb"
+    stages = select_stages(stages_for(mg), only=["candidates", "assets"])
+    Pipeline(stages, db_path=db, staging_dir=tmp_path / "staging", dataset=mg).run()
+
+    con = duckdb.connect(str(resolve_db_path(db)), read_only=True)
+    assert con.execute(f"SELECT id FROM {mg.tables.candidate} ORDER BY id").fetchall() == [(2,), (3,)]
+    assert con.execute(f"SELECT COUNT(*) FROM {mg.tables.candidate_summary}").fetchone()[0] == 2
+    assert config.CANDIDATE_TABLE not in {r[0] for r in con.execute("SHOW TABLES").fetchall()}
+    con.close()
+
+    items = sample_client.get("/candidates?uf=MG&cargo=dep_est").json()["items"]
+    assert sorted(c["nome_urna"] for c in items) == ["BIA", "CAIO"]
+    assert next(c for c in items if c["id"] == 2)["total_bens"] == 500.0
+    assert len(sample_client.get("/candidates?limit=100").json()["items"]) == 60  # padrão intocado
+
+
+def test_parquet_cache_converts_once_per_source(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """O ZIP vira Parquet tipado uma vez por UF; versões e schemas convivem até PARQUET_CACHE_KEEP."""
+    rows = [CAND_HEADER + ["VR_DESPESA_MAX_CAMPANHA"], _cand_row(1, "SP", "ANA") + ["1.234,56"]]
+    zip_path = _tse_zip(tmp_path / "consulta_cand_2022.zip", {
+        "consulta_cand_2022_SP.csv": rows,
+        "consulta_cand_2022_RJ.csv": [rows[0], _cand_row(2, "RJ", "BIA") + ["#NULO#"]],
+    })
+    cache = tmp_path / "parquet"
+    schema = FileSchema("consulta_cand", CONSULTA_CAND.columns + (Column("VR_DESPESA_MAX_CAMPANHA", "DOUBLE"),))
+
+    sp = stage_zip(zip_path, schema, ["SP"], cache)
+    assert "[PARQUET]" in capsys.readouterr().out
+    assert stage_zip(zip_path, schema, ["SP"], cache) == sp
+    assert "[PARQUET]" not in capsys.readouterr().out  # já convertido
+    assert [d.name for d in (cache / "consulta_cand_2022").glob("*/SG_UF=*")] == ["SG_UF=SP"]
+
+    con = duckdb.connect()
+    row = con.execute(f"SELECT SQ_CANDIDATO, NR_CANDIDATO, VR_DESPESA_MAX_CAMPANHA FROM {sp.sql}").fetchone()
+    assert row == (1, "1234", 1234.56)  # SQ_ BIGINT, NR_ texto, VR_ DOUBLE
+    both = stage_zip(zip_path, schema, ["SP", "RJ"], cache)
+    assert con.execute(f"SELECT SG_UF, VR_DESPESA_MAX_CAMPANHA FROM {both.sql} ORDER BY 1").fetchall() == [
+        ("RJ", None), ("SP", 1234.56)
+    ]
+
+    # Outro schema do mesmo ZIP não apaga as UFs já convertidas
+    def versions() -> list[str]:
+        return sorted(p.name for p in (cache / "consulta_cand_2022").iterdir() if p.is_dir())
+
+    first, = versions()
+    stage_zip(zip_path, CONSULTA_CAND, ["RJ"], cache)
+    assert len(versions()) == 2
+    capsys.readouterr()
+    assert stage_zip(zip_path, schema, ["SP", "RJ"], cache) == both
+    assert "Convertendo" not in capsys.readouterr().out
+
+    # ZIP novo: outra pasta; a menos usada só sai além de PARQUET_CACHE_KEEP
+    monkeypatch.setattr(tse_parquet, "PARQUET_CACHE_KEEP", 2)
+    _tse_zip(zip_path, {"consulta_cand_2022_SP.csv": [rows[0], _cand_row(3, "SP", "CAIO") + ["1,00"]]})
+    fresh = stage_zip(zip_path, schema, ["SP"], cache)
+    assert con.execute(f"SELECT SQ_CANDIDATO FROM {fresh.sql}").fetchall() == [(3,)]
+    assert len(versions()) == 2 and first in versions()  # saiu a de CONSULTA_CAND, usada antes
+    con.close()
+
+
+def test_schema_resolves_aliases_and_reads_only_its_columns(tmp_path: Path) -> None:
+    """Nomes de outros anos viram o canônico, opcional ausente vira NULL tipado e o resto do CSV é ignorado."""
+    header = ["SQ_CANDIDATO", "SG_UF", "DS_BEM", "VR_BEM", "NR_ORDEM_BEM"]
+    zip_path = _tse_zip(tmp_path / "bem_candidato_2018.zip", {
+        "bem_candidato_2018_SP.csv": [header, ["1", "SP", "Casa", "1.234,50", "1"]],
+    })
+    assert schema_for(zip_path) is BEM_CANDIDATO
+
+    bens = stage_zip(zip_path, BEM_CANDIDATO, ["SP"], tmp_path / "parquet")
+    assert bens.columns == tuple(c.name for c in BEM_CANDIDATO.columns)
+    assert not bens.has("DS_TIPO_BEM_CANDIDATO") and bens.has("VR_BEM_CANDIDATO")
+    con = duckdb.connect()
+    assert con.execute(f"SELECT * EXCLUDE (SG_UF) FROM {bens.sql}").fetchall() == [(1, None, "Casa", 1234.5)]
+    assert con.execute(f"SELECT typeof(DS_TIPO_BEM_CANDIDATO) FROM {bens.sql}").fetchone() == ("VARCHAR",)
+    con.close()
+
+    bad = _tse_zip(tmp_path / "bem_candidato_2014.zip", {
+        "bem_candidato_2014_SP.csv": [["SQ_CANDIDATO", "SG_UF", "DS_BEM"], ["1", "SP", "Casa"]],
+    })
+    with pytest.raises(SchemaMismatch, match="VR_BEM_CANDIDATO / VR_BEM"):
+        stage_zip(bad, BEM_CANDIDATO, ["SP"], tmp_path / "parquet")
@@ -0,0 +1,69 @@
+"""
+Testes do executor de queries com admissão e prazo (src/app/api/executor.py).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app.api import executor as executor_module
+from src.app.api.executor import LIGHT, CostClass, QueryExecutor, QueryTimeout
+
+
+def _small_executor() -> QueryExecutor:
+    return QueryExecutor((CostClass(LIGHT, workers=1, max_queue=0, timeout=5), CostClass("heavy", 1, 0, 5)))
+
+
+def _wait_until(condition, seconds: float = 3) -> None:
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_timeout_interrupts_query(sample_client: TestClient) -> None:
+    """Query que passa do prazo é interrompida e libera a thread."""
+    ex = _small_executor()
+    slow = lambda con: con.execute("SELECT SUM(a.range * b.range) FROM range(100000) a, range(100000) b").fetchone()
+
+    start = time.monotonic()
+    with pytest.raises(QueryTimeout):
+        asyncio.run(ex.run(LIGHT, slow, timeout=0.2))
+    # A vaga só é devolvida quando a thread sai da query interrompida
+    _wait_until(lambda: ex.stats()[LIGHT]["running"] + ex.stats()[LIGHT]["queued"] == 0)
+    assert time.monotonic() - start < 3
+
+    assert asyncio.run(ex.run(LIGHT, lambda con: con.execute("SELECT 42").fetchone()[0])) == 42
+    stats = ex.stats()[LIGHT]
+    assert stats["timeouts"] == 1 and stats["running"] == 0
+    ex.shutdown()
+
+
+def test_overload_returns_503(sample_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Com a fila da classe cheia a API recusa na hora com Retry-After."""
+    ex = _small_executor()
+    monkeypatch.setattr(executor_module, "_executor", ex)
+    release = threading.Event()
+    blocker = threading.Thread(target=lambda: asyncio.run(ex.run(LIGHT, lambda con: release.wait(5))))
+    blocker.start()
+    try:
+        _wait_until(lambda: ex.stats()[LIGHT]["running"] == 1)
+
+        r = sample_client.get("/candidates/1/assets")
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+        assert ex.stats()[LIGHT]["rejected"] == 1
+
+        # Classe pesada tem fila própria e continua atendendo
+        assert sample_client.get("/candidates/1/finance").status_code == 200
+    finally:
+        release.set()
+        blocker.join()
+    assert sample_client.get("/candidates/1/assets").status_code == 200
+    ex.shutdown()
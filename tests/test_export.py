@@ -0,0 +1,59 @@
+"""
+Testes da exportação em streaming (src/app/api/export.py e /export).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+import pyarrow.parquet as pq
+from fastapi.testclient import TestClient
+
+from src.app import config
+from src.app.api.export import stream_export
+
+
+def test_export_formats_agree(sample_client: TestClient) -> None:
+    """CSV, NDJSON e Parquet trazem as mesmas linhas, com projeção e filtro."""
+    base = "/export/donations?columns=candidate_id,valor&candidate_id=1,2"
+    rows_csv = list(csv.DictReader(io.StringIO(sample_client.get(base).text)))
+    assert len(rows_csv) == 16
+    assert set(rows_csv[0]) == {"candidate_id", "valor"}
+
+    ndjson = sample_client.get(base + "&format=ndjson")
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    rows_json = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert sorted(r["valor"] for r in rows_json) == sorted(float(r["valor"]) for r in rows_csv)
+
+    parquet = sample_client.get(base + "&format=parquet")
+    assert "donations.parquet" in parquet.headers["content-disposition"]
+    table = pq.read_table(io.BytesIO(parquet.content))
+    assert table.num_rows == 16 and table.column_names == ["candidate_id", "valor"]
+
+
+def test_export_partido_filter_joins_candidates(sample_client: TestClient) -> None:
+    """Tabelas sem coluna partido filtram pelos candidatos do partido."""
+    rows = sample_client.get("/export/votes_municipio?format=ndjson&partido=p1").text.splitlines()
+    ids = {json.loads(line)["candidate_id"] for line in rows}
+    assert ids and all(i % 4 == 1 for i in ids)
+
+
+def test_export_streams_in_batches(sample_client: TestClient) -> None:
+    """Cada record batch vira um pedaço da resposta."""
+    sql = f"SELECT * FROM {config.DONATIONS_TABLE}"
+    chunks = list(stream_export(sql, [], "csv", batch_rows=100))
+    assert chunks[0] == b""  # primeiro item só reserva o cursor
+    assert len(chunks) > 3
+    lines = b"".join(chunks).decode().splitlines()
+    assert len(lines) == 60 * 8 + 1  # cabeçalho só uma vez
+
+
+def test_export_validation(sample_client: TestClient) -> None:
+    """Tabela, formato e colunas inválidos não iniciam o streaming."""
+    assert sample_client.get("/export/senhas").status_code == 404
+    assert sample_client.get("/export/donations?format=xlsx").status_code == 400
+    assert sample_client.get("/export/donations?columns=nao_existe").status_code == 400
@@ -0,0 +1,77 @@
+"""
+Testes das métricas Prometheus (src/app/api/metrics.py e GET /metrics).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+import threading
+
+from fastapi.testclient import TestClient
+
+from src.app.api import metrics
+
+
+def test_histogram_sums_thread_shards() -> None:
+    """Observações de várias threads aparecem somadas e com buckets cumulativos."""
+    hist = metrics.Histogram("teste_duracao", "Teste.", ("rota",), buckets=(0.1, 1.0))
+    metrics.REGISTRY.remove(hist)
+
+    def work() -> None:
+        for value in (0.05, 0.5, 5.0):
+            hist.observe(value, "/x")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    lines = hist.render()
+    assert 'teste_duracao_bucket{rota="/x",le="0.1"} 4' in lines
+    assert 'teste_duracao_bucket{rota="/x",le="1.0"} 8' in lines
+    assert 'teste_duracao_bucket{rota="/x",le="+Inf"} 12' in lines
+    assert 'teste_duracao_count{rota="/x"} 12' in lines
+    assert "# TYPE teste_duracao histogram" in lines
+
+
+def test_metrics_endpoint(sample_client: TestClient) -> None:
+    """Rotas aparecem pelo template; queries, serialização e cache são expostos."""
+    assert sample_client.get("/candidates/3/assets").status_code == 200
+    assert sample_client.get("/candidates?limit=5&format=arrow").status_code == 200
+    assert sample_client.get("/candidates?limit=5&format=arrow").headers["x-cache"] == "HIT"
+
+    r = sample_client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'route="/candidates/{candidate_id}/assets",status="200"' in body
+    assert 'eleicoes_query_duration_seconds_count{query="assets"}' in body
+    assert 'eleicoes_query_rows_total{query="candidates"}' in body
+    assert 'eleicoes_serialization_duration_seconds_count{format="arrow"}' in body
+    assert 'eleicoes_response_cache_lookups_total{result="hit"} 1' in body
+    assert 'eleicoes_response_cache_lookups_total{result="miss"} 2' in body  # assets + 1ª listagem
+    assert "eleicoes_response_cache_hit_ratio 0.333" in body
+    assert "eleicoes_db_pool_size " in body
+    assert 'eleicoes_executor_running{class="light"}' in body
+
+
+def _request_count(client: TestClient, route: str, status: str) -> int:
+    """Contagem do histograma de latência HTTP para a rota e o status."""
+    prefix = f'eleicoes_http_request_duration_seconds_count{{method="GET",route="{route}",status="{status}"}} '
+    line = next((l for l in client.get("/metrics").text.splitlines() if l.startswith(prefix)), prefix + "0")
+    return int(line.removeprefix(prefix))
+
+
+def test_cache_responses_labelled_by_route(sample_client: TestClient) -> None:
+    """HITs e 304 do cache (que não passam pelo roteador) levam o template da rota, não "(sem rota)"."""
+    url = "/municipios/71001/candidatos?limit=3"
+    etag = sample_client.get(url).headers["etag"]
+    hits = _request_count(sample_client, "/municipios/{cd_municipio}/candidatos", "200")
+    assert sample_client.get(url).headers["x-cache"] == "HIT"
+    assert _request_count(sample_client, "/municipios/{cd_municipio}/candidatos", "200") == hits + 1
+
+    not_modified = _request_count(sample_client, "/municipios/{cd_municipio}/candidatos", "304")
+    assert sample_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert _request_count(sample_client, "/municipios/{cd_municipio}/candidatos", "304") == not_modified + 1
@@ -0,0 +1,106 @@
+"""
+Testes do log de queries lentas e de `?profile=1` (src/app/api/profiling.py).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import duckdb
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import auth
+from src.app.api import executor as executor_module
+from src.app.api import profiling
+from src.app.api.executor import HEAVY, LIGHT, CostClass, QueryExecutor
+
+
+def test_explain_without_bound_parameters(monkeypatch: pytest.MonkeyPatch) -> None:
+    """DuckDB sem `?` no EXPLAIN (0.9): os parâmetros entram como literais e o plano sai em texto."""
+    sql = "SELECT ? AS a, '?' AS b, ? AS c, ? AS d"
+    assert profiling.inline_params(sql, [1, "d'água", [2, 3]]) == "SELECT 1 AS a, '?' AS b, 'd''água' AS c, [2, 3] AS d"
+
+    monkeypatch.setattr(profiling, "explain_syntax", lambda: (False, False))
+    con = duckdb.connect()
+    plan = profiling.explain_analyze(con, "SELECT range FROM range(10) WHERE range < ?", [3])
+    assert isinstance(plan, str) and "RANGE" in plan.upper()
+    con.close()
+
+
+def test_slow_query_logged_with_plan(sample_client: TestClient) -> None:
+    """Query acima do limite é gravada com plano, tempos e parâmetros."""
+    log = profiling.get_slow_log()
+    log.threshold = 1e-9  # toda query é "lenta"
+
+    assert sample_client.get("/candidates/2/votes_municipio?limit=3").status_code == 200
+    log.flush()
+
+    records = [json.loads(line) for line in log.path.read_text(encoding="utf-8").splitlines()]
+    record = next(r for r in records if r["query"] == "votes_municipio")
+    assert record["params"] == [[2], 3]
+    assert record["elapsed_ms"] >= 0 and record["profiled_ms"] >= 0
+    assert "children" in record["plan"] or "EXPLAIN" in str(record["plan"])
+    assert log.captured == len(records)
+
+
+def test_fast_query_not_logged(sample_client: TestClient) -> None:
+    """Abaixo do limite nada é capturado."""
+    log = profiling.get_slow_log()
+    log.threshold = 60.0
+    assert sample_client.get("/candidates/2/votes_municipio").status_code == 200
+    log.flush()
+    assert log.captured == 0 and not log.path.exists()
+
+
+def test_profile_flag_requires_admin(sample_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """profile=1 devolve os planos inline só com o token de administrador."""
+    assert sample_client.get("/candidates/1/finance?profile=1").status_code == 403
+
+    monkeypatch.setattr(auth, "ADMIN_API_KEY", "admin")
+    headers = {"Authorization": "Bearer admin"}
+    r = sample_client.get("/candidates/1/finance?profile=1", headers=headers)
+    assert r.status_code == 200
+    plans = r.json()["profile"]
+    assert [p["query"] for p in plans] == ["finance_summary", "top_doadores", "top_fornecedores"]
+    assert all(p["plan"] for p in plans)
+
+    r = sample_client.get("/candidates?limit=3&profile=1", headers=headers)
+    assert [p["query"] for p in r.json()["profile"]] == ["candidates"]
+    assert "x-cache" not in r.headers  # respostas com profile não vão para o cache
+
+    assert sample_client.get("/candidates/1/assets?profile=1&format=arrow", headers=headers).status_code == 400
+    assert "profile" not in sample_client.get("/candidates/1/finance").json()
+
+
+def test_slow_query_capture_goes_through_heavy_lane(sample_client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """O EXPLAIN da captura roda na classe heavy: respeita a fila e o prazo dela."""
+    ex = QueryExecutor((CostClass(LIGHT, 1, 0, 5), CostClass(HEAVY, workers=1, max_queue=0, timeout=0.2)))
+    monkeypatch.setattr(executor_module, "_executor", ex)
+    log = profiling.get_slow_log()
+    sql, params = "SELECT SUM(a.range * b.range) FROM range(100000) a, range(100000) b WHERE a.range > ?", [-1]
+
+    # Lane cheia: a captura é descartada em vez de pegar um cursor por fora
+    release = threading.Event()
+    blocker = threading.Thread(target=lambda: ex.run_sync(HEAVY, lambda con: release.wait(5), timeout=5))
+    blocker.start()
+    try:
+        while ex.stats()[HEAVY]["running"] == 0:
+            time.sleep(0.01)
+        assert log.submit("lenta", 10.0, sql, params)
+        log.flush()
+    finally:
+        release.set()
+        blocker.join()
+    assert (log.captured, log.dropped) == (0, 1)
+
+    # EXPLAIN ANALYZE que passa do prazo é interrompido como uma query da API
+    assert log.submit("lenta", 10.0, sql, params)
+    log.flush()
+    assert (log.captured, log.dropped) == (0, 2)
+    assert ex.stats()[HEAVY]["timeouts"] == 1
+    ex.shutdown()
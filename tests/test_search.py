@@ -0,0 +1,80 @@
+"""
+Testes para o índice de trigramas (src/app/search.py).
+
+Executar com: pytest tests/
+"""
+
+from __future__ import annotations
+
+import threading
+
+from src.app.search import TrigramIndex, normalize
+
+DOCS = [
+    (1, "JOSÉ SILVA", "JOSÉ DA SILVA"),
+    (2, "MARIA", "MARIA SOUZA"),
+    (3, "JOÃO", "JOÃO SILVEIRA"),
+]
+
+
+def test_normalize_removes_accents_and_case() -> None:
+    assert normalize("  José  D'Ávila ") == "jose d avila"
+    assert normalize(None) == ""
+
+
+def test_search_is_accent_insensitive() -> None:
+    index = TrigramIndex(DOCS)
+    assert index.search("JOSE") == [(1, 1.0)]
+    assert index.search("joão") == [(3, 1.0)]
+
+
+def test_search_substring_inside_and_across_words() -> None:
+    index = TrigramIndex(DOCS)
+    assert index.search("ilva") == [(1, 1.0)]
+    assert index.search("ria sou") == [(2, 1.0)]
+    assert [doc_id for doc_id, _ in index.search("silv")] == [1, 3]
+
+
+def test_search_tolerates_typos() -> None:
+    index = TrigramIndex(DOCS)
+    results = index.search("silvaa")
+    assert results[0][0] == 1
+    assert 0 < results[0][1] < 1.0
+
+
+def test_search_fuzzy_can_be_disabled() -> None:
+    index = TrigramIndex(DOCS)
+    assert index.search("silvaa", fuzzy_below=0) == []
+    assert index.search("") == []
+
+
+def test_index_build_does_not_block_other_datasets(sample_client, sample_db, monkeypatch) -> None:
+    """Construir o índice de um conjunto não trava a busca nos outros."""
+    from src.app import search
+    from src.app.datasets import get_registry
+    from tests.conftest import build_dataset_file
+
+    datasets_dir = sample_db.parent / "datasets"
+    datasets_dir.mkdir()
+    build_dataset_file(datasets_dir / "2022_mg_dep_est.duckdb", "mg", "dep_est", 2022)
+    mg = get_registry().resolve(2022, "mg", "dep_est")
+
+    started, release = threading.Event(), threading.Event()
+    real_build = search.build_index
+
+    def slow_build(con, table):
+        if table == mg.tables.candidate:
+            started.set()
+            release.wait(5)
+        return real_build(con, table)
+
+    monkeypatch.setattr(search, "build_index", slow_build)
+    worker = threading.Thread(target=search.get_search_index, args=(mg,))
+    worker.start()
+    assert started.wait(5)
+    try:
+        assert len(search.get_search_index()) > 0  # conjunto padrão enquanto o MG constrói
+    finally:
+        release.set()
+        worker.join(5)
+    assert search.get_search_index(mg) is search.get_search_index(mg)